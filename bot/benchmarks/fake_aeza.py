@@ -0,0 +1,88 @@
+import asyncio
+import random
+from collections import Counter
+from typing import Optional
+
+from aiohttp import web
+
+
+class FakeAezaAPI:
+    """
+    Заглушка Aeza API: список услуг, услуга по id и управление
+    (`/services/{id}/ctl`). При каждом запросе списка `churn` доля
+    услуг меняет статус, чтобы синхронизация видела изменения.
+    """
+
+    def __init__(
+        self,
+        services: int = 1000,
+        latency: float = 0.0,
+        churn: float = 0.01,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.churn = churn
+        self.calls: Counter[str] = Counter()
+        self._random = random.Random(seed)
+        self.services = {
+            service_id: {
+                "id": service_id,
+                "name": f"vpn-{service_id}",
+                "status": "active",
+                "ip": f"10.0.{service_id // 256 % 256}.{service_id % 256}",
+                "productId": 1,
+            }
+            for service_id in range(1, services + 1)
+        }
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get("/api/services", self.list_services)
+        app.router.add_get("/api/services/{id:\\d+}", self.get_service)
+        app.router.add_post("/api/services/{id:\\d+}/ctl", self.control)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}/api"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _delay(self, name: str) -> None:
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def list_services(self, request: web.Request) -> web.Response:
+        await self._delay("list_services")
+        changed = int(len(self.services) * self.churn)
+        for service_id in self._random.sample(list(self.services), changed):
+            service = self.services[service_id]
+            service["status"] = (
+                "suspended" if service["status"] == "active" else "active"
+            )
+        return web.json_response(
+            {"data": {"items": list(self.services.values())}}
+        )
+
+    async def get_service(self, request: web.Request) -> web.Response:
+        await self._delay("get_service")
+        service = self.services.get(int(request.match_info["id"]))
+        if service is None:
+            return web.json_response({"error": "not found"}, status=404)
+        return web.json_response({"data": {"items": [service]}})
+
+    async def control(self, request: web.Request) -> web.Response:
+        await self._delay("control")
+        service = self.services.get(int(request.match_info["id"]))
+        if service is None:
+            return web.json_response({"error": "not found"}, status=404)
+        action = (await request.json()).get("action")
+        service["status"] = "suspended" if action == "suspend" else "active"
+        return web.json_response({"data": service})
@@ -0,0 +1,71 @@
+import asyncio
+import itertools
+import time
+from collections import Counter
+from typing import Optional
+
+from aiohttp import web
+
+BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "Benchmark",
+    "username": "benchmark_bot",
+}
+
+
+class FakeTelegramAPI:
+    """
+    Заглушка Bot API на aiohttp: принимает любые методы
+    `/bot<token>/<method>`, отвечает правдоподобным результатом
+    и считает вызовы. `latency` имитирует задержку сети.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self._message_ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        app.router.add_get("/bot{token}/{method}", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        params = dict(await request.post())
+        return web.json_response(
+            {"ok": True, "result": self.result(method, params)}
+        )
+
+    def result(self, method: str, params: dict):
+        if method == "getMe":
+            return BOT_USER
+        if method in ("sendMessage", "editMessageText"):
+            return {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {
+                    "id": int(params.get("chat_id", 0)),
+                    "type": "private",
+                },
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }
+        return True
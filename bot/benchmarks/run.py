@@ -0,0 +1,414 @@
+"""
+Нагрузочный прогон бота.
+
+Синтетический поток обновлений проходит через настоящий `Dispatcher`
+со всеми middleware. Bot API и Aeza заменены локальными серверами
+на aiohttp, база — временная PostgreSQL-база, которая создаётся
+на сервере из настроек (DB_*) и удаляется после прогона.
+
+Запуск из каталога bot:
+
+    python -m benchmarks.run --updates 5000 --output bench.json
+    python -m benchmarks.run --baseline bench.json
+
+Если хотя бы одно обновление завершилось исключением, прогон пишет
+типы ошибок в отчёт и завершается с кодом 1: цифры такого прогона
+не годятся для сравнения.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Update
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.utils.config import Settings
+from src.utils.container import Container
+from src.utils.metrics import DB_QUERY_LATENCY
+from src.utils.scheduler import OrderedDispatcher
+
+from .fake_aeza import FakeAezaAPI
+from .fake_telegram import FakeTelegramAPI
+
+BOT_TOKEN = "123456:BENCHMARK"
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль по отсортированному списку (ближайший ранг)."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+def git_revision() -> dict:
+    def git(*args: str) -> str:
+        result = subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=False
+        )
+        return result.stdout.strip()
+
+    return {
+        "commit": git("rev-parse", "HEAD") or None,
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+class ThrowawayDatabase:
+    """Создаёт пустую базу рядом с базой из настроек и удаляет её."""
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.name = f"bench_{uuid.uuid4().hex[:12]}"
+
+    async def _execute(self, statement: str) -> None:
+        engine = create_async_engine(
+            self.settings.DB_URL, isolation_level="AUTOCOMMIT"
+        )
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text(statement))
+        finally:
+            await engine.dispose()
+
+    async def __aenter__(self) -> Settings:
+        await self._execute(f'CREATE DATABASE "{self.name}"')
+        return self.settings.model_copy(update={"DB_NAME": self.name})
+
+    async def __aexit__(self, *exc) -> None:
+        await self._execute(
+            f'DROP DATABASE IF EXISTS "{self.name}" WITH (FORCE)'
+        )
+
+
+class UpdateStream:
+    """Воспроизводимый поток обновлений от `users` пользователей."""
+
+    def __init__(self, bot: Bot, users: int, unhandled: float, seed: int):
+        self.bot = bot
+        self.users = users
+        self.unhandled = unhandled
+        self._random = random.Random(seed)
+        self._update_id = 0
+
+    def make(self, user_id: int, message: str) -> Update:
+        self._update_id += 1
+        payload = {
+            "update_id": self._update_id,
+            "message": {
+                "message_id": self._update_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {
+                    "id": user_id,
+                    "is_bot": False,
+                    "first_name": f"user{user_id}",
+                    "language_code": "ru",
+                },
+                "text": message,
+            },
+        }
+        if message.startswith("/"):
+            payload["message"]["entities"] = [
+                {"type": "bot_command", "offset": 0, "length": len(message)}
+            ]
+        return Update.model_validate(payload, context={"bot": self.bot})
+
+    def take(self, count: int) -> list[Update]:
+        updates = []
+        for _ in range(count):
+            user_id = self._random.randint(1, self.users)
+            message = (
+                "hello" if self._random.random() < self.unhandled else "/start"
+            )
+            updates.append(self.make(user_id, message))
+        return updates
+
+
+async def replay(
+    dp: OrderedDispatcher,
+    bot: Bot,
+    updates: list[Update],
+    concurrency: int,
+) -> tuple[list[float], Counter, float]:
+    """
+    Прогоняет обновления. Возвращает задержки, число ошибок по типам
+    исключений и время. Первая ошибка каждого типа пишется в лог.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors: Counter = Counter()
+
+    async def feed(update: Update) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await dp.feed_update_and_wait(bot, update)
+            except Exception as e:
+                name = type(e).__name__
+                if name not in errors:
+                    logger.exception("Update %s failed", update.update_id)
+                errors[name] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(feed(update) for update in updates))
+    return sorted(latencies), errors, time.perf_counter() - started
+
+
+async def bench_updates(
+    container: Container,
+    telegram: FakeTelegramAPI,
+    stream: UpdateStream,
+    args: argparse.Namespace,
+) -> dict:
+    dp, bot = container.dispatcher, container.bot
+    _, warmup_errors, _ = await replay(
+        dp, bot, stream.take(args.warmup), args.concurrency
+    )
+
+    queries = DB_QUERY_LATENCY.total_count()
+    api_calls = sum(telegram.calls.values())
+    latencies, errors, duration = await replay(
+        dp, bot, stream.take(args.updates), args.concurrency
+    )
+    count = len(latencies)
+    return {
+        "count": count,
+        "errors": sum(errors.values()),
+        "error_types": dict(errors),
+        "warmup_errors": sum(warmup_errors.values()),
+        "duration_s": round(duration, 3),
+        "throughput_per_s": round(count / duration, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.5) * 1000, 3),
+            "p90": round(percentile(latencies, 0.9) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(percentile(latencies, 1.0) * 1000, 3),
+        },
+        "db_queries_per_update": round(
+            (DB_QUERY_LATENCY.total_count() - queries) / count, 3
+        ),
+        "api_calls_per_update": round(
+            (sum(telegram.calls.values()) - api_calls) / count, 3
+        ),
+    }
+
+
+async def bench_allocations(
+    container: Container, stream: UpdateStream, args: argparse.Namespace
+) -> dict:
+    """
+    Память, оставшаяся занятой после обработки обновлений, и пик
+    по tracemalloc. Отдельный проход: под tracemalloc всё медленнее.
+    """
+    updates = stream.take(args.alloc_updates)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    _, errors, _ = await replay(
+        container.dispatcher, container.bot, updates, args.concurrency
+    )
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    diff = after.compare_to(before, "filename")
+    allocated = sum(stat.size_diff for stat in diff if stat.size_diff > 0)
+    blocks = sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+    return {
+        "count": len(updates),
+        "errors": sum(errors.values()),
+        "error_types": dict(errors),
+        "retained_bytes_per_update": round(allocated / len(updates), 1),
+        "retained_blocks_per_update": round(blocks / len(updates), 2),
+        "peak_bytes": peak,
+    }
+
+
+async def bench_aeza_sync(
+    container: Container, aeza: FakeAezaAPI, args: argparse.Namespace
+) -> dict:
+    """Синхронизация зеркала услуг Aeza с поддельным API."""
+    durations = []
+    events = 0
+    for _ in range(args.aeza_syncs):
+        started = time.perf_counter()
+        events += len(await container.services.sync())
+        durations.append(time.perf_counter() - started)
+    durations.sort()
+    return {
+        "services": len(aeza.services),
+        "syncs": len(durations),
+        "events": events,
+        "sync_ms": {
+            "p50": round(percentile(durations, 0.5) * 1000, 3),
+            "max": round(percentile(durations, 1.0) * 1000, 3),
+        },
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    base = Settings(
+        BOT_TOKEN=BOT_TOKEN,
+        AEZA_TOKEN="benchmark",
+        METRICS_ENABLED=False,
+        # Троттлинг отбрасывал бы повторные обновления пользователя.
+        THROTTLE_RATE=1e9,
+        THROTTLE_BURST=1e9,
+        THROTTLE_USER_RATE=None,
+    )
+    telegram = FakeTelegramAPI(latency=args.api_latency)
+    aeza = FakeAezaAPI(services=args.aeza_services, latency=args.api_latency)
+    await telegram.start()
+    await aeza.start()
+
+    try:
+        async with ThrowawayDatabase(base) as settings:
+            container = Container()
+            container.settings = settings
+            container.bot = Bot(
+                token=BOT_TOKEN,
+                session=AiohttpSession(
+                    api=TelegramAPIServer.from_base(telegram.base_url)
+                ),
+                default=DefaultBotProperties(parse_mode="HTML"),
+            )
+            container.aeza.BASE_URL = aeza.base_url
+            try:
+                await container.db.migrate(url=settings.DB_URL)
+                await container.start_db()
+                stream = UpdateStream(
+                    container.bot, args.users, args.unhandled, args.seed
+                )
+                result = {
+                    "updates": await bench_updates(
+                        container, telegram, stream, args
+                    ),
+                    "allocations": await bench_allocations(
+                        container, stream, args
+                    ),
+                    "aeza_sync": await bench_aeza_sync(container, aeza, args),
+                }
+            finally:
+                await container.close()
+    finally:
+        await telegram.stop()
+        await aeza.stop()
+
+    return {
+        **git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "params": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "baseline")
+        },
+        **result,
+    }
+
+
+COMPARED = (
+    ("updates", "throughput_per_s", True),
+    ("updates", "latency_ms.p50", False),
+    ("updates", "latency_ms.p99", False),
+    ("updates", "db_queries_per_update", False),
+    ("allocations", "retained_bytes_per_update", False),
+    ("aeza_sync", "sync_ms.p50", False),
+)
+
+
+def _lookup(result: dict, section: str, path: str) -> Optional[float]:
+    value = result.get(section, {})
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def compare(current: dict, baseline: dict) -> str:
+    """Таблица изменений относительно прошлого прогона."""
+    lines = [
+        f"baseline {str(baseline.get('commit'))[:10]} -> "
+        f"current {str(current.get('commit'))[:10]}"
+    ]
+    for section, path, higher_is_better in COMPARED:
+        old = _lookup(baseline, section, path)
+        new = _lookup(current, section, path)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        better = change > 0 if higher_is_better else change < 0
+        mark = "+" if better else ("-" if change else " ")
+        lines.append(
+            f"  {mark} {section}.{path:<28} {old:>12} -> {new:>12}"
+            f" ({change:+.1f}%)"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--alloc-updates", type=int, default=500)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument(
+        "--unhandled",
+        type=float,
+        default=0.2,
+        help="доля сообщений, для которых нет хендлера",
+    )
+    parser.add_argument(
+        "--api-latency",
+        type=float,
+        default=0.0,
+        help="задержка ответа поддельных Bot API и Aeza, секунды",
+    )
+    parser.add_argument("--aeza-services", type=int, default=1000)
+    parser.add_argument("--aeza-syncs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="файл для JSON с результатом")
+    parser.add_argument("--baseline", help="JSON прошлого прогона")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = parse_args(argv)
+    result = asyncio.run(run(args))
+    report = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+    print(report)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            print(compare(result, json.load(file)), file=sys.stderr)
+    errors = (
+        result["updates"]["errors"]
+        + result["updates"]["warmup_errors"]
+        + result["allocations"]["errors"]
+    )
+    if errors:
+        sys.exit(f"{errors} updates failed, the results are not valid")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.models import (  # noqa: F401
+    aeza_command,
+    aeza_service,
+    bank,
+    bank_summary,
+    broadcast,
+    journal,
+    proxy,
+    user,
+)
+from src.models.base import Base
+from src.utils.config import get_settings
+from src.utils.partitions import is_partition
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def include_name(name, type_, parent_names) -> bool:
+    # Помесячные секции journal и bank создаёт PartitionManager, а
+    # DEFAULT-секции — миграция сырым SQL: autogenerate их не сравнивает.
+    return not (type_ == "table" and is_partition(name))
+
+
+def get_url() -> str:
+    return config.get_main_option("sqlalchemy.url") or get_settings().DB_URL
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        include_name=include_name,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    engine = create_async_engine(get_url())
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
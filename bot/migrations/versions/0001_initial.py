@@ -0,0 +1,80 @@
+"""initial schema
+
+Схема в том виде, в котором её создавал `AsyncORM.create_tables`.
+Для существующей базы выполните `alembic stamp 0001`, затем
+`alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("money", sa.Float(), nullable=False),
+        sa.Column("reg_date", sa.DateTime(timezone=False), nullable=False),
+        sa.Column("proxy_count", sa.BigInteger(), nullable=False),
+    )
+    op.create_table(
+        "proxies",
+        sa.Column("uuid", sa.String(), primary_key=True),
+        sa.Column("short_id", sa.String(), nullable=False),
+        sa.Column(
+            "user_id",
+            sa.BigInteger(),
+            sa.ForeignKey("users.id"),
+            nullable=False,
+        ),
+        sa.Column(
+            "create_date", sa.DateTime(timezone=False), nullable=False
+        ),
+        sa.Column("server_ip", sa.String(), nullable=False),
+        sa.Column("link", sa.String(), nullable=False),
+        sa.Column("is_freeze", sa.Boolean(), nullable=False),
+        sa.UniqueConstraint("short_id", name="proxies_short_id_key"),
+    )
+    op.create_table(
+        "bank",
+        sa.Column(
+            "id", sa.BigInteger(), primary_key=True, autoincrement=True
+        ),
+        sa.Column(
+            "user_id",
+            sa.BigInteger(),
+            sa.ForeignKey("users.id"),
+            nullable=False,
+        ),
+        sa.Column("date", sa.DateTime(timezone=False), nullable=False),
+        sa.Column("currency", sa.String(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "journal",
+        sa.Column(
+            "id", sa.BigInteger(), primary_key=True, autoincrement=True
+        ),
+        sa.Column("date", sa.DateTime(timezone=False), nullable=False),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("journal")
+    op.drop_table("bank")
+    op.drop_table("proxies")
+    op.drop_table("users")
@@ -0,0 +1,145 @@
+"""baseline additions, indexes, numeric money and native uuid
+
+Колонки и таблица broadcasts, появившиеся после исходной схемы,
+добавляются здесь, чтобы база, помеченная `alembic stamp 0001`,
+получила их при обновлении.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UTC_NOW = sa.text("timezone('utc', now())")
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=False),
+            server_default=UTC_NOW,
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "users",
+        sa.Column("blocked_at", sa.DateTime(timezone=False), nullable=True),
+    )
+    op.execute("UPDATE users SET updated_at = reg_date")
+    op.add_column(
+        "proxies", sa.Column("service_id", sa.BigInteger(), nullable=True)
+    )
+    op.create_table(
+        "broadcasts",
+        sa.Column(
+            "id", sa.BigInteger(), primary_key=True, autoincrement=True
+        ),
+        sa.Column("text", sa.String(), nullable=False),
+        sa.Column(
+            "status", sa.String(), server_default="running", nullable=False
+        ),
+        sa.Column("last_user_id", sa.BigInteger(), nullable=True),
+        sa.Column(
+            "sent", sa.BigInteger(), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "failed", sa.BigInteger(), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "blocked", sa.BigInteger(), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=False),
+            server_default=UTC_NOW,
+            nullable=False,
+        ),
+        sa.Column("finished_at", sa.DateTime(timezone=False), nullable=True),
+    )
+
+    op.alter_column(
+        "users",
+        "money",
+        type_=sa.Numeric(12, 2),
+        postgresql_using="round(money::numeric, 2)",
+    )
+    op.alter_column(
+        "bank",
+        "amount",
+        type_=sa.Numeric(12, 2),
+        postgresql_using="round(amount::numeric, 2)",
+    )
+
+    # Первичный ключ уже уникален. Отдельное ограничение есть только
+    # в базах, где его создали вручную.
+    op.execute(
+        "ALTER TABLE proxies DROP CONSTRAINT IF EXISTS proxies_uuid_key"
+    )
+    op.alter_column(
+        "proxies",
+        "uuid",
+        type_=sa.Uuid(),
+        postgresql_using="uuid::uuid",
+    )
+
+    op.create_index(
+        "ix_proxies_user_id",
+        "proxies",
+        ["user_id"],
+        postgresql_include=["short_id", "is_freeze"],
+    )
+    op.create_index(
+        "ix_proxies_frozen_user_id",
+        "proxies",
+        ["user_id"],
+        postgresql_where=sa.text("is_freeze"),
+    )
+    op.create_index(
+        "ix_bank_user_id_date",
+        "bank",
+        ["user_id", "date"],
+        postgresql_include=["amount", "currency"],
+    )
+    op.create_index("ix_journal_date", "journal", ["date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_journal_date", table_name="journal")
+    op.drop_index("ix_bank_user_id_date", table_name="bank")
+    op.drop_index("ix_proxies_frozen_user_id", table_name="proxies")
+    op.drop_index("ix_proxies_user_id", table_name="proxies")
+
+    op.alter_column(
+        "proxies",
+        "uuid",
+        type_=sa.String(),
+        postgresql_using="uuid::text",
+    )
+    op.alter_column(
+        "bank",
+        "amount",
+        type_=sa.Float(),
+        postgresql_using="amount::double precision",
+    )
+    op.alter_column(
+        "users",
+        "money",
+        type_=sa.Float(),
+        postgresql_using="money::double precision",
+    )
+
+    op.drop_table("broadcasts")
+    op.drop_column("proxies", "service_id")
+    op.drop_column("users", "blocked_at")
+    op.drop_column("users", "updated_at")
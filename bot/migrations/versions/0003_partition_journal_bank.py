@@ -0,0 +1,124 @@
+"""monthly range partitioning for journal and bank
+
+Таблицы пересоздаются как секционированные по `date`, данные
+переносятся в помесячные секции. Дальнейшие секции создаёт
+`PartitionManager`.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = {
+    "journal": (
+        "id BIGSERIAL, "
+        "date TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        "action VARCHAR NOT NULL, "
+        "description VARCHAR"
+    ),
+    "bank": (
+        "id BIGSERIAL, "
+        "user_id BIGINT NOT NULL REFERENCES users (id), "
+        "date TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        "currency VARCHAR NOT NULL, "
+        "amount NUMERIC(12, 2) NOT NULL"
+    ),
+}
+
+INDEXES = {
+    "journal": ["CREATE INDEX ix_journal_date ON journal (date)"],
+    "bank": [
+        "CREATE INDEX ix_bank_user_id_date ON bank (user_id, date) "
+        "INCLUDE (amount, currency)"
+    ],
+}
+
+SELECTS = {
+    "journal": "id, coalesce(date, now()), action, description",
+    "bank": "id, user_id, coalesce(date, now()), currency, amount",
+}
+
+LEGACY_INDEXES = {
+    "journal": ["ix_journal_date"],
+    "bank": ["ix_bank_user_id_date"],
+}
+
+
+def month_start(value: date, shift: int = 0) -> date:
+    index = value.year * 12 + value.month - 1 + shift
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_partitions(table: str, first: date, last: date) -> None:
+    month = month_start(first)
+    while month <= last:
+        end = month_start(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month}') TO ('{end}')"
+        )
+        month = end
+
+
+def repartition(table: str, partitioned: bool) -> None:
+    """Пересоздаёт таблицу (секционированной или обычной) с данными."""
+    legacy = f"{table}_legacy"
+    op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    op.execute(f"ALTER INDEX {table}_pkey RENAME TO {legacy}_pkey")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq RENAME TO {legacy}_id_seq")
+    for index in LEGACY_INDEXES[table]:
+        op.execute(f"ALTER INDEX {index} RENAME TO {index}_legacy")
+
+    if partitioned:
+        op.execute(
+            f"CREATE TABLE {table} ({COLUMNS[table]}, "
+            f"PRIMARY KEY (id, date)) PARTITION BY RANGE (date)"
+        )
+        bind = op.get_bind()
+        today = datetime.utcnow().date()
+        first = bind.execute(
+            text(f"SELECT min(date) FROM {legacy}")
+        ).scalar()
+        create_partitions(
+            table,
+            first.date() if first else today,
+            month_start(today, MONTHS_AHEAD),
+        )
+    else:
+        op.execute(
+            f"CREATE TABLE {table} ({COLUMNS[table]}, PRIMARY KEY (id))"
+        )
+
+    for statement in INDEXES[table]:
+        op.execute(statement)
+
+    op.execute(f"INSERT INTO {table} SELECT {SELECTS[table]} FROM {legacy}")
+    op.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+        f"coalesce((SELECT max(id) FROM {table}), 0) + 1, false)"
+    )
+    op.execute(f"DROP TABLE {legacy}")
+
+
+def upgrade() -> None:
+    repartition("journal", partitioned=True)
+    repartition("bank", partitioned=True)
+
+
+def downgrade() -> None:
+    repartition("journal", partitioned=False)
+    repartition("bank", partitioned=False)
@@ -0,0 +1,112 @@
+"""bank summary and monthly aggregates
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UTC_NOW = sa.text("timezone('utc', now())")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bank_summary",
+        sa.Column(
+            "user_id",
+            sa.BigInteger(),
+            sa.ForeignKey("users.id"),
+            primary_key=True,
+        ),
+        sa.Column("currency", sa.String(), primary_key=True),
+        sa.Column(
+            "total_in", sa.Numeric(14, 2), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "total_out", sa.Numeric(14, 2), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "operations", sa.BigInteger(), server_default="0", nullable=False
+        ),
+        sa.Column("last_topup_at", sa.DateTime(), nullable=True),
+        sa.Column("last_topup_amount", sa.Numeric(12, 2), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=UTC_NOW,
+            nullable=False,
+        ),
+    )
+    op.create_table(
+        "bank_monthly",
+        sa.Column(
+            "user_id",
+            sa.BigInteger(),
+            sa.ForeignKey("users.id"),
+            primary_key=True,
+        ),
+        sa.Column("currency", sa.String(), primary_key=True),
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column(
+            "total_in", sa.Numeric(14, 2), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "total_out", sa.Numeric(14, 2), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "operations", sa.BigInteger(), server_default="0", nullable=False
+        ),
+    )
+
+    # Итоги по уже накопленным операциям.
+    op.execute(
+        """
+        INSERT INTO bank_summary
+        SELECT totals.user_id, totals.currency, total_in, total_out,
+               operations, topup.date, topup.amount, now()
+        FROM (
+            SELECT user_id, coalesce(currency, 'RUB') AS currency,
+                   sum(CASE WHEN amount > 0 THEN amount ELSE 0 END)
+                       AS total_in,
+                   sum(CASE WHEN amount < 0 THEN -amount ELSE 0 END)
+                       AS total_out,
+                   count(*) AS operations
+            FROM bank
+            GROUP BY 1, 2
+        ) totals
+        LEFT JOIN (
+            SELECT DISTINCT ON (user_id, coalesce(currency, 'RUB'))
+                   user_id, coalesce(currency, 'RUB') AS currency,
+                   date, amount
+            FROM bank
+            WHERE amount > 0
+            ORDER BY user_id, coalesce(currency, 'RUB'), date DESC
+        ) topup USING (user_id, currency)
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO bank_monthly
+        SELECT user_id, coalesce(currency, 'RUB'),
+               date_trunc('month', date)::date,
+               sum(CASE WHEN amount > 0 THEN amount ELSE 0 END),
+               sum(CASE WHEN amount < 0 THEN -amount ELSE 0 END),
+               count(*)
+        FROM bank
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("bank_monthly")
+    op.drop_table("bank_summary")
@@ -0,0 +1,54 @@
+"""proxy expiry, price and aeza sync state
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "proxies", sa.Column("expires_at", sa.DateTime(), nullable=True)
+    )
+    op.add_column(
+        "proxies", sa.Column("price", sa.Numeric(12, 2), nullable=True)
+    )
+    op.add_column(
+        "proxies",
+        sa.Column(
+            "service_synced",
+            sa.Boolean(),
+            server_default=sa.true(),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_proxies_due",
+        "proxies",
+        ["expires_at"],
+        postgresql_where=sa.text("expires_at IS NOT NULL AND NOT is_freeze"),
+    )
+    op.create_index(
+        "ix_proxies_unsynced",
+        "proxies",
+        ["uuid"],
+        postgresql_where=sa.text("NOT service_synced"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_proxies_unsynced", table_name="proxies")
+    op.drop_index("ix_proxies_due", table_name="proxies")
+    op.drop_column("proxies", "service_synced")
+    op.drop_column("proxies", "price")
+    op.drop_column("proxies", "expires_at")
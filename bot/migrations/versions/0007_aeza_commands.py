@@ -0,0 +1,62 @@
+"""durable queue of aeza commands
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UTC_NOW = sa.text("timezone('utc', now())")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "aeza_commands",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("idempotency_key", sa.String(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column(
+            "status", sa.String(), server_default="pending", nullable=False
+        ),
+        sa.Column(
+            "attempts", sa.Integer(), server_default="0", nullable=False
+        ),
+        sa.Column(
+            "next_attempt_at",
+            sa.DateTime(),
+            server_default=UTC_NOW,
+            nullable=False,
+        ),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("result", postgresql.JSONB(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=UTC_NOW, nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=UTC_NOW, nullable=False
+        ),
+        sa.UniqueConstraint("idempotency_key"),
+    )
+    op.create_index(
+        "ix_aeza_commands_due",
+        "aeza_commands",
+        ["next_attempt_at"],
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_aeza_commands_due", table_name="aeza_commands")
+    op.drop_table("aeza_commands")
@@ -0,0 +1,35 @@
+"""proxy freeze reason
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "proxies", sa.Column("freeze_reason", sa.String(), nullable=True)
+    )
+    # Раньше причина не хранилась. Продление замораживает только
+    # истёкшие прокси, поэтому истёкшие считаются неоплаченными (как
+    # и обрабатывались до сих пор), остальные — замороженными вручную.
+    op.execute(
+        "UPDATE proxies SET freeze_reason = CASE"
+        " WHEN expires_at <= timezone('utc', now()) THEN 'unpaid'"
+        " ELSE 'manual' END"
+        " WHERE is_freeze"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("proxies", "freeze_reason")
@@ -0,0 +1,44 @@
+"""default partitions for journal and bank
+
+Строки за месяц без секции (PartitionManager не успел её создать или
+дата записи далеко в прошлом/будущем) попадают в DEFAULT-секцию, а не
+отклоняются с ошибкой. `ensure_partitions` переносит их в секцию
+месяца, когда создаёт её.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("journal", "bank")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(
+            f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for table in TABLES:
+        # Без DEFAULT-секции её строкам некуда деться: сначала их нужно
+        # перенести в помесячные секции через ensure_partitions.
+        if bind.execute(
+            text(f"SELECT EXISTS (SELECT FROM {table}_default)")
+        ).scalar():
+            raise RuntimeError(
+                f"{table}_default is not empty, run ensure_partitions first"
+            )
+        op.execute(f"DROP TABLE {table}_default")
@@ -1,11 +1,14 @@
 __all__ = ("router",)
 
 from aiogram import Router
+from src.utils.filters import IsAdmin
 
 from .callback import router as callback_router
 from .message import router as message_router
 
 router = Router()
+router.message.filter(IsAdmin())
+router.callback_query.filter(IsAdmin())
 router.include_routers(
     callback_router,
     message_router,
@@ -1,3 +1,25 @@
 from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+from src.utils.broadcast import Broadcaster
+from src.utils.i18n import CachedTranslatorRunner
 
 router = Router()
+
+
+@router.message(Command("broadcast"))
+async def _(
+    message: Message,
+    command: CommandObject,
+    broadcaster: Broadcaster,
+    locale: CachedTranslatorRunner,
+):
+    if not command.args:
+        await message.answer(locale.broadcast_usage())
+        return
+
+    broadcast_id = await broadcaster.start(command.args)
+    if broadcast_id is None:
+        await message.answer(locale.broadcast_failed())
+        return
+    await message.answer(locale.broadcast_started(id=broadcast_id))
@@ -1,8 +1,8 @@
 from aiogram import Bot, Router
 from aiogram.filters import Command
 from aiogram.types import Message
-from fluentogram import TranslatorRunner
 from src.utils.db import AsyncORM
+from src.utils.i18n import CachedTranslatorRunner
 
 router = Router()
 
@@ -12,6 +12,6 @@ async def _(
     message: Message,
     bot: Bot,
     db: AsyncORM,
-    locale: TranslatorRunner,
+    locale: CachedTranslatorRunner,
 ):
     await message.answer(locale.welcome_text())
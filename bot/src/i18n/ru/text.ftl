@@ -1 +1,5 @@
 welcome_text=hi
+
+broadcast_usage=Использование: /broadcast текст рассылки
+broadcast_started=Рассылка #{ $id } запущена
+broadcast_failed=Не удалось создать рассылку
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import UTC_NOW, Base
+
+
+class AezaCommand(Base):
+    """Изменяющий вызов Aeza в очереди на выполнение."""
+
+    __tablename__ = "aeza_commands"
+    __table_args__ = (
+        # Очередь: только незавершённые команды.
+        Index(
+            "ix_aeza_commands_due",
+            "next_attempt_at",
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger, primary_key=True, autoincrement=True
+    )
+    idempotency_key: Mapped[str] = mapped_column(
+        String, unique=True, nullable=False
+    )
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    # pending -> running -> done | failed (или обратно в pending).
+    status: Mapped[str] = mapped_column(
+        String,
+        nullable=False,
+        default="pending",
+        server_default=text("'pending'"),
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default=text("0")
+    )
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        default=datetime.utcnow,
+        server_default=UTC_NOW,
+    )
+    locked_until: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), nullable=True
+    )
+    result: Mapped[dict] = mapped_column(JSONB, nullable=True)
+    error: Mapped[str] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        default=datetime.utcnow,
+        server_default=UTC_NOW,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        default=datetime.utcnow,
+        server_default=UTC_NOW,
+    )
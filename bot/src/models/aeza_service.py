@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    String,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import UTC_NOW, Base
+
+
+class AezaService(Base):
+    """Локальная копия услуги Aeza, обновляемая фоновой синхронизацией."""
+
+    __tablename__ = "aeza_services"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    name: Mapped[str] = mapped_column(String, nullable=True)
+    status: Mapped[str] = mapped_column(String, nullable=True)
+    ip: Mapped[str] = mapped_column(String, nullable=True)
+    product_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        default=datetime.utcnow,
+        server_default=UTC_NOW,
+    )
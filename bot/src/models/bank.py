@@ -1,10 +1,12 @@
 from datetime import datetime
+from decimal import Decimal
 
 from sqlalchemy import (
     BigInteger,
     DateTime,
-    Float,
     ForeignKey,
+    Index,
+    Numeric,
     String,
 )
 from sqlalchemy.orm import Mapped, mapped_column
@@ -14,6 +16,17 @@ from .base import Base
 
 class Bank(Base):
     __tablename__ = "bank"
+    __table_args__ = (
+        # История операций пользователя по дате без чтения таблицы.
+        Index(
+            "ix_bank_user_id_date",
+            "user_id",
+            "date",
+            postgresql_include=["amount", "currency"],
+        ),
+        # Помесячные секции создаёт `PartitionManager`.
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
 
     id: Mapped[int] = mapped_column(
         BigInteger, primary_key=True, autoincrement=True
@@ -22,7 +35,9 @@ class Bank(Base):
         BigInteger, ForeignKey("users.id"), nullable=False
     )
     date: Mapped[datetime] = mapped_column(
-        DateTime(timezone=False), default=datetime.utcnow
+        DateTime(timezone=False), primary_key=True, default=datetime.utcnow
+    )
+    currency: Mapped[str] = mapped_column(
+        String, nullable=False, default="RUB"
     )
-    currency: Mapped[str] = mapped_column(String, default="RUB")
-    amount: Mapped[float] = mapped_column(Float, nullable=False)
+    amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
@@ -0,0 +1,68 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    ForeignKey,
+    Numeric,
+    String,
+    text,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import UTC_NOW, Base
+
+
+class BankSummary(Base):
+    """Итоги операций пользователя, обновляются вместе с записью в bank."""
+
+    __tablename__ = "bank_summary"
+
+    user_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("users.id"), primary_key=True
+    )
+    currency: Mapped[str] = mapped_column(String, primary_key=True)
+    total_in: Mapped[Decimal] = mapped_column(
+        Numeric(14, 2), nullable=False, default=0, server_default=text("0")
+    )
+    total_out: Mapped[Decimal] = mapped_column(
+        Numeric(14, 2), nullable=False, default=0, server_default=text("0")
+    )
+    operations: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default=text("0")
+    )
+    last_topup_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), nullable=True
+    )
+    last_topup_amount: Mapped[Decimal] = mapped_column(
+        Numeric(12, 2), nullable=True
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        default=datetime.utcnow,
+        server_default=UTC_NOW,
+    )
+
+
+class BankMonthly(Base):
+    """Помесячные итоги операций пользователя."""
+
+    __tablename__ = "bank_monthly"
+
+    user_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("users.id"), primary_key=True
+    )
+    currency: Mapped[str] = mapped_column(String, primary_key=True)
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+    total_in: Mapped[Decimal] = mapped_column(
+        Numeric(14, 2), nullable=False, default=0, server_default=text("0")
+    )
+    total_out: Mapped[Decimal] = mapped_column(
+        Numeric(14, 2), nullable=False, default=0, server_default=text("0")
+    )
+    operations: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default=text("0")
+    )
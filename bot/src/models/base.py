@@ -1,4 +1,8 @@
+from sqlalchemy import text
 from sqlalchemy.orm import DeclarativeBase
 
+# Текущее время UTC на стороне базы: даты хранятся без часового пояса.
+UTC_NOW = text("timezone('utc', now())")
+
 
 class Base(DeclarativeBase): ...
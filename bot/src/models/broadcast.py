@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    String,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import UTC_NOW, Base
+
+
+class Broadcast(Base):
+    __tablename__ = "broadcasts"
+
+    id: Mapped[int] = mapped_column(
+        BigInteger, primary_key=True, autoincrement=True
+    )
+    text: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(
+        String, nullable=False, default="running", server_default="running"
+    )
+    last_user_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    sent: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
+    failed: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
+    blocked: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        default=datetime.utcnow,
+        server_default=UTC_NOW,
+    )
+    finished_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), nullable=True
+    )
@@ -3,6 +3,7 @@ from datetime import datetime
 from sqlalchemy import (
     BigInteger,
     DateTime,
+    Index,
     String,
 )
 from sqlalchemy.orm import Mapped, mapped_column
@@ -12,12 +13,17 @@ from .base import Base
 
 class Journal(Base):
     __tablename__ = "journal"
+    __table_args__ = (
+        Index("ix_journal_date", "date"),
+        # Помесячные секции создаёт `PartitionManager`.
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
 
     id: Mapped[int] = mapped_column(
         BigInteger, primary_key=True, autoincrement=True
     )
     date: Mapped[datetime] = mapped_column(
-        DateTime(timezone=False), default=datetime.utcnow
+        DateTime(timezone=False), primary_key=True, default=datetime.utcnow
     )
     action: Mapped[str] = mapped_column(nullable=False)
     description: Mapped[str] = mapped_column(String, nullable=True)
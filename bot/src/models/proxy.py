@@ -1,21 +1,60 @@
 from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
 
 from sqlalchemy import (
     BigInteger,
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
+    Integer,
+    Numeric,
     String,
+    Uuid,
+    text,
+    true,
 )
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
 
+# Причины заморозки: автоматически размораживаются только неоплаченные.
+FREEZE_MANUAL = "manual"
+FREEZE_UNPAID = "unpaid"
+
 
 class Proxy(Base):
     __tablename__ = "proxies"
+    __table_args__ = (
+        Index(
+            "ix_proxies_user_id",
+            "user_id",
+            postgresql_include=["short_id", "is_freeze"],
+        ),
+        # Замороженных прокси мало, частичный индекс остаётся компактным.
+        Index(
+            "ix_proxies_frozen_user_id",
+            "user_id",
+            postgresql_where=text("is_freeze"),
+        ),
+        # Очередь продлений: активные прокси по времени окончания.
+        Index(
+            "ix_proxies_due",
+            "expires_at",
+            postgresql_where=text(
+                "expires_at IS NOT NULL AND NOT is_freeze"
+            ),
+        ),
+        # Прокси, состояние которых ещё не передано в Aeza.
+        Index(
+            "ix_proxies_unsynced",
+            "uuid",
+            postgresql_where=text("NOT service_synced"),
+        ),
+    )
 
-    uuid: Mapped[str] = mapped_column(String, primary_key=True, unique=True)
+    uuid: Mapped[UUID] = mapped_column(Uuid, primary_key=True)
     short_id: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     user_id: Mapped[int] = mapped_column(
         BigInteger, ForeignKey("users.id"), nullable=False
@@ -24,5 +63,20 @@ class Proxy(Base):
         DateTime(timezone=False), default=datetime.utcnow
     )
     server_ip: Mapped[str] = mapped_column(String, nullable=False)
+    service_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
     link: Mapped[str] = mapped_column(String, nullable=False)
     is_freeze: Mapped[bool] = mapped_column(Boolean, default=False)
+    # FREEZE_MANUAL или FREEZE_UNPAID у замороженных, иначе NULL.
+    freeze_reason: Mapped[str] = mapped_column(String, nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), nullable=True
+    )
+    price: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=True)
+    # False, пока stop/start в Aeza не выполнен для текущего is_freeze.
+    service_synced: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=True, server_default=true()
+    )
+    # Растёт при каждой смене is_freeze: входит в ключ команды Aeza.
+    state_version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default=text("0")
+    )
@@ -1,14 +1,15 @@
 from datetime import datetime
+from decimal import Decimal
 
 from sqlalchemy import (
     BigInteger,
     DateTime,
-    Float,
+    Numeric,
     String,
 )
 from sqlalchemy.orm import Mapped, mapped_column
 
-from .base import Base
+from .base import UTC_NOW, Base
 
 
 class User(Base):
@@ -16,8 +17,17 @@ class User(Base):
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
-    money: Mapped[float] = mapped_column(Float, default=0.0)
+    money: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=0)
     reg_date: Mapped[datetime] = mapped_column(
         DateTime(timezone=False), default=datetime.utcnow
     )
     proxy_count: Mapped[int] = mapped_column(BigInteger, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        default=datetime.utcnow,
+        server_default=UTC_NOW,
+    )
+    blocked_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), nullable=True
+    )
@@ -1,14 +1,31 @@
+import asyncio
+import json
+import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Optional
 
+import aiohttp
 import requests
 from requests import Response
 
+from .cache import AsyncTTLCache
+from .metrics import AEZA_ERRORS, AEZA_LATENCY, normalize_endpoint
+
 
 @dataclass
 class AezaResponse:
     status: str
     context: str
+    # Код HTTP-ответа; None, если ответа не было (сеть, таймаут).
+    http_status: Optional[int] = None
+
+
+def response_items(context: Any) -> list:
+    """Достаёт список объектов из ответа Aeza вида {"data": {"items": []}}."""
+    data = context.get("data", context) if isinstance(context, dict) else {}
+    if isinstance(data, dict):
+        return data.get("items", [data])
+    return list(data)
 
 
 class Aeza:
@@ -25,7 +42,11 @@ class Aeza:
         """Проверка ответа сервера."""
         try:
             response.raise_for_status()
-            return AezaResponse(status="ok", context=response.json())
+            return AezaResponse(
+                status="ok",
+                context=response.json(),
+                http_status=response.status_code,
+            )
         except requests.exceptions.JSONDecodeError:
             return AezaResponse(
                 status="error",
@@ -33,6 +54,7 @@ class Aeza:
                     "Ошибка: Некорректный JSON-ответ."
                     f"Ответ сервера: {response.text}"
                 ),
+                http_status=response.status_code,
             )
         except requests.exceptions.RequestException as e:
             return AezaResponse(
@@ -40,6 +62,7 @@ class Aeza:
                 context=(
                     f"Ошибка запроса: {str(e)}. Ответ сервера: {response.text}"
                 ),
+                http_status=response.status_code,
             )
 
     def _request(self, method: str, endpoint: str, **kwargs) -> AezaResponse:
@@ -182,3 +205,263 @@ class Aeza:
     def delete_service(self, service_id: int) -> AezaResponse:
         """Удаление сервера."""
         return self._request("DELETE", f"/services/{service_id}")
+
+
+class AsyncAeza:
+    """
+    Асинхронный клиент Aeza поверх одной keep-alive сессии aiohttp.
+
+    Сессия создаётся лениво при первом запросе и переиспользуется всеми
+    вызовами, поэтому соединения с my.aeza.net не открываются заново.
+    Контракт ответов тот же, что и у `Aeza`: всегда `AezaResponse`.
+    """
+
+    BASE_URL = "https://my.aeza.net/api"
+
+    # Время жизни (в секундах) кэша справочных эндпоинтов.
+    CATALOG_TTL = {
+        "/os": 24 * 3600,
+        "/vm/recipe": 24 * 3600,
+        "/services/products": 3600,
+        "/payment/currencies": 600,
+    }
+
+    def __init__(
+        self,
+        api_key: str,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 10.0,
+        limit_per_host: int = 20,
+        catalog_stale_ttl: float = 24 * 3600,
+    ):
+        self.api_key = api_key
+        self.HEADERS = {
+            "X-API-Key": self.api_key,
+            "Content-Type": "application/json",
+        }
+        self.timeout = aiohttp.ClientTimeout(
+            connect=connect_timeout, sock_read=read_timeout
+        )
+        self.limit_per_host = limit_per_host
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.catalog_cache = AsyncTTLCache(stale_ttl=catalog_stale_ttl)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Возвращает общую сессию, создавая её при необходимости."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=30,
+            )
+            self._session = aiohttp.ClientSession(
+                headers=self.HEADERS,
+                timeout=self.timeout,
+                connector=connector,
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Закрывает сессию и все открытые соединения."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request(
+        self, method: str, endpoint: str, **kwargs
+    ) -> AezaResponse:
+        """Обёртка для запросов с обработкой ошибок и замером времени."""
+        labels = {"method": method, "endpoint": normalize_endpoint(endpoint)}
+        started = time.perf_counter()
+        response, reason = await self._send(method, endpoint, **kwargs)
+        AEZA_LATENCY.observe(time.perf_counter() - started, **labels)
+        if reason is not None:
+            AEZA_ERRORS.inc(reason=reason, **labels)
+        return response
+
+    async def _send(
+        self, method: str, endpoint: str, **kwargs
+    ) -> tuple[AezaResponse, Optional[str]]:
+        """Выполняет запрос. Второй элемент — причина ошибки для метрик."""
+        session = self._get_session()
+        try:
+            async with session.request(
+                method, self.BASE_URL + endpoint, **kwargs
+            ) as response:
+                text = await response.text()
+                if response.status >= 400:
+                    return (
+                        AezaResponse(
+                            status="error",
+                            context=(
+                                f"Ошибка запроса: {response.status} "
+                                f"{response.reason}. Ответ сервера: {text}"
+                            ),
+                            http_status=response.status,
+                        ),
+                        f"http_{response.status}",
+                    )
+                try:
+                    return (
+                        AezaResponse(
+                            status="ok",
+                            context=json.loads(text),
+                            http_status=response.status,
+                        ),
+                        None,
+                    )
+                except json.JSONDecodeError:
+                    return (
+                        AezaResponse(
+                            status="error",
+                            context=(
+                                "Ошибка: Некорректный JSON-ответ."
+                                f"Ответ сервера: {text}"
+                            ),
+                            http_status=response.status,
+                        ),
+                        "invalid_json",
+                    )
+        except asyncio.TimeoutError:
+            return (
+                AezaResponse(
+                    status="error", context="Ошибка сети: превышен таймаут"
+                ),
+                "timeout",
+            )
+        except aiohttp.ClientError as e:
+            return (
+                AezaResponse(status="error", context=f"Ошибка сети: {str(e)}"),
+                "network",
+            )
+
+    async def _cached_request(self, endpoint: str) -> AezaResponse:
+        """GET-запрос к справочному эндпоинту через кэш."""
+        return await self.catalog_cache.get_or_fetch(
+            endpoint,
+            lambda: self._request("GET", endpoint),
+            ttl=self.CATALOG_TTL[endpoint],
+            should_cache=lambda response: response.status == "ok",
+        )
+
+    def invalidate_catalog(self, endpoint: Optional[str] = None) -> None:
+        """Сбрасывает кэш справочника (или всех справочников)."""
+        self.catalog_cache.invalidate(endpoint)
+
+    async def get_os(self) -> AezaResponse:
+        """Выводит список OS доступных для установки на сервер."""
+        return await self._cached_request("/os")
+
+    async def get_recipe(self) -> AezaResponse:
+        """
+        Выводит список программных обеспечений,
+        которые могут быть установлены на сервер.
+        """
+        return await self._cached_request("/vm/recipe")
+
+    async def get_payment_currencies(self) -> AezaResponse:
+        """Выводит список множителей для преобразования валют.
+
+        Формула преобразования описана в `Aeza.get_payment_currencies`.
+        """
+        return await self._cached_request("/payment/currencies")
+
+    async def get_my_services(self) -> AezaResponse:
+        """Выводит список купленных услуг."""
+        return await self._request("GET", "/services")
+
+    async def get_sevices_list(self) -> AezaResponse:
+        """Выводит список всех доступных для покупки услуг."""
+        return await self._cached_request("/services/products")
+
+    async def get_service(self, service_id: int) -> AezaResponse:
+        """Получение информации об услуге по его id."""
+        return await self._request("GET", f"/services/{service_id}")
+
+    async def get_order_list(self) -> AezaResponse:
+        """Выводит информацию о заказе."""
+        return await self._request("GET", "/services/orders")
+
+    async def create_service(
+        self,
+        count: int,
+        term: str,
+        name: str,
+        product_id: int,
+        parameters: dict,
+        auto_prolog: bool,
+        method: str,
+        backups: bool,
+    ) -> AezaResponse:
+        """Заказ сервера."""
+        data = {
+            "count": count,
+            "term": term,
+            "name": name,
+            "productId": product_id,
+            "parameters": parameters,
+            "autoProlong": auto_prolog,
+            "method": method,
+            "backups": backups,
+        }
+        return await self._request("POST", "/services/orders", json=data)
+
+    async def _control_service(
+        self, service_id: int, action: str
+    ) -> AezaResponse:
+        """
+        Универсальный метод для управления сервером
+        (запуск, стоп, перезагрузка).
+        """
+        if action not in {"resume", "suspend", "reboot"}:
+            return AezaResponse(
+                status="error", context="Некорректное действие"
+            )
+        return await self._request(
+            "POST", f"/services/{service_id}/ctl", json={"action": action}
+        )
+
+    async def start_service(self, service_id: int) -> AezaResponse:
+        """Запуск сервера."""
+        return await self._control_service(service_id, "resume")
+
+    async def stop_service(self, service_id: int) -> AezaResponse:
+        """Остановка сервера."""
+        return await self._control_service(service_id, "suspend")
+
+    async def reboot_service(self, service_id: int) -> AezaResponse:
+        """Перезагрузка сервера."""
+        return await self._control_service(service_id, "reboot")
+
+    async def reinstall_service(
+        self,
+        service_id: int,
+        os: int,
+        password: str,
+        recipe: Optional[int] = None,
+    ) -> AezaResponse:
+        """Переустановка сервера."""
+        return await self._request(
+            "POST",
+            f"/services/{service_id}/reinstall",
+            json={"os": os, "recipe": recipe, "password": password},
+        )
+
+    async def change_password(
+        self, service_id: int, password: str
+    ) -> AezaResponse:
+        """Смена пороля сервера."""
+        return await self._request(
+            "PUT",
+            f"/services/{service_id}/changePassword",
+            json={"password": password},
+        )
+
+    async def change_name(self, service_id: int, name: str) -> AezaResponse:
+        """Смена имени сервера."""
+        return await self._request(
+            "PUT", f"/services/{service_id}/changeName", json={"name": name}
+        )
+
+    async def delete_service(self, service_id: int) -> AezaResponse:
+        """Удаление сервера."""
+        return await self._request("DELETE", f"/services/{service_id}")
@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+from cachetools import TTLCache
+
+from .db import AsyncORM, UserFilter
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BroadcastStats:
+    broadcast_id: int
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    last_user_id: Optional[int] = None
+
+
+class _Watermark:
+    """
+    Наибольший id, до которого все получатели уже обработаны.
+
+    Воркеры завершают отправку не по порядку, поэтому сохранять можно
+    только непрерывный префикс — с него рассылка продолжится после
+    перезапуска. Результаты получателей за префиксом придерживаются,
+    чтобы счётчики не учли дважды тех, кому рассылка уйдёт повторно.
+    """
+
+    def __init__(self, start: Optional[int]):
+        self.value = start
+        self._pending: dict[int, Optional[str]] = {}
+
+    def add(self, user_id: int) -> None:
+        self._pending[user_id] = None
+
+    def done(self, user_id: int, result: str) -> list[tuple[int, str]]:
+        """
+        Отмечает получателя обработанным. Возвращает получателей,
+        вошедших в префикс, с их результатами.
+        """
+        self._pending[user_id] = result
+        committed = []
+        for pending_id, pending_result in list(self._pending.items()):
+            if pending_result is None:
+                break
+            self.value = pending_id
+            del self._pending[pending_id]
+            committed.append((pending_id, pending_result))
+        return committed
+
+
+class Broadcaster:
+    """
+    Рассылка сообщений всем пользователям с учётом лимитов Telegram.
+
+    Получатели читаются из базы keyset-страницами, отправка идёт через общий
+    token bucket (`rate` сообщений в секунду) и не чаще раза в
+    `per_chat_interval` секунд в один чат. На `RetryAfter` отправка
+    приостанавливается и скорость снижается (один раз на окно
+    ожидания, сколько бы воркеров его ни получили), затем постепенно
+    восстанавливается. Прогресс сохраняется в таблицу broadcasts,
+    в том числе при остановке бота.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        db: AsyncORM,
+        rate: float = 25,
+        workers: int = 20,
+        per_chat_interval: float = 1.0,
+        save_every: int = 500,
+    ):
+        self.bot = bot
+        self.db = db
+        self.max_rate = rate
+        self.min_rate = 1.0
+        self.bucket = TokenBucket(rate=rate, burst=rate)
+        self.workers = workers
+        self.per_chat_interval = per_chat_interval
+        self.save_every = save_every
+        self._last_sent = TTLCache(maxsize=100_000, ttl=per_chat_interval)
+        self._successes = 0
+        self._slowed_until = 0.0
+        self._lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+
+    def _spawn(self, coro) -> None:
+        """Запускает рассылку в фоне, храня ссылку на задачу."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """Прерывает идущие рассылки; они продолжатся после запуска."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def start(self, text: str) -> Optional[int]:
+        """Создаёт рассылку и запускает её в фоне. Возвращает её id."""
+        broadcast = await self.db.broadcast.create(text)
+        if broadcast is None:
+            return None
+        self._spawn(self.run(broadcast.id, text))
+        return broadcast.id
+
+    async def resume(self) -> None:
+        """Продолжает рассылки, прерванные перезапуском бота."""
+        for broadcast in await self.db.broadcast.get_unfinished():
+            stats = BroadcastStats(
+                broadcast_id=broadcast.id,
+                sent=broadcast.sent,
+                failed=broadcast.failed,
+                blocked=broadcast.blocked,
+                last_user_id=broadcast.last_user_id,
+            )
+            logger.info(
+                "Resuming broadcast %s after user %s",
+                broadcast.id,
+                broadcast.last_user_id,
+            )
+            self._spawn(self.run(broadcast.id, broadcast.text, stats))
+
+    async def run(
+        self,
+        broadcast_id: int,
+        text: str,
+        stats: Optional[BroadcastStats] = None,
+    ) -> BroadcastStats:
+        """Отправляет рассылку; одновременно идёт только одна рассылка."""
+        stats = stats or BroadcastStats(broadcast_id=broadcast_id)
+        async with self._lock:
+            await self._run(text, stats)
+        return stats
+
+    async def _run(self, text: str, stats: BroadcastStats) -> None:
+        watermark = _Watermark(stats.last_user_id)
+        queue: asyncio.Queue[int] = asyncio.Queue(maxsize=self.workers * 4)
+        blocked: list[int] = []
+
+        async def worker() -> None:
+            while True:
+                user_id = await queue.get()
+                try:
+                    result = await self._send(user_id, text)
+                except Exception:
+                    logger.exception("Broadcast to %s crashed", user_id)
+                    result = "failed"
+                try:
+                    for done_id, done_result in watermark.done(
+                        user_id, result
+                    ):
+                        if done_result == "sent":
+                            stats.sent += 1
+                        elif done_result == "blocked":
+                            stats.blocked += 1
+                            blocked.append(done_id)
+                        else:
+                            stats.failed += 1
+                finally:
+                    queue.task_done()
+
+        tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        # Получатели читаются короткими keyset-страницами, чтобы не держать
+        # транзакцию с курсором открытой на всё время рассылки.
+        after_id = stats.last_user_id
+        try:
+            while True:
+                page = await self.db.user.get_user_page(
+                    after_id=after_id,
+                    limit=self.save_every,
+                    filters=UserFilter(exclude_blocked=True),
+                )
+                if not page:
+                    break
+                for row in page:
+                    watermark.add(row.id)
+                    await queue.put(row.id)
+                after_id = page[-1].id
+                await self._save(stats, watermark, blocked)
+            await queue.join()
+        except asyncio.CancelledError:
+            # Бот останавливается: сохраняем префикс, чтобы после запуска
+            # не отправить повторно тем, кто уже получил сообщение.
+            await self._stop_workers(tasks)
+            await self._save(stats, watermark, blocked)
+            raise
+        finally:
+            await self._stop_workers(tasks)
+
+        await self._save(stats, watermark, blocked, status="done")
+
+    @staticmethod
+    async def _stop_workers(tasks: list[asyncio.Task]) -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _save(
+        self,
+        stats: BroadcastStats,
+        watermark: _Watermark,
+        blocked: list[int],
+        status: str = "running",
+    ) -> None:
+        pending = blocked[:]
+        blocked.clear()
+        await self.db.user.mark_blocked(pending)
+        stats.last_user_id = watermark.value
+        await self.db.broadcast.save_progress(
+            stats.broadcast_id,
+            stats.last_user_id,
+            stats.sent,
+            stats.failed,
+            stats.blocked,
+            status=status,
+        )
+
+    async def _send(self, chat_id: int, text: str, attempts: int = 3) -> str:
+        """Отправляет одно сообщение. Возвращает sent/blocked/failed."""
+        for _ in range(attempts):
+            await self._wait_chat(chat_id)
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id, text)
+            except TelegramRetryAfter as e:
+                self._slow_down(e.retry_after)
+                continue
+            except TelegramForbiddenError:
+                return "blocked"
+            except TelegramAPIError as e:
+                logger.warning("Broadcast to %s failed: %s", chat_id, e)
+                return "failed"
+            finally:
+                self._last_sent[chat_id] = time.monotonic()
+            self._speed_up()
+            return "sent"
+        return "failed"
+
+    async def _wait_chat(self, chat_id: int) -> None:
+        """Соблюдает интервал между сообщениями в один чат."""
+        last_sent = self._last_sent.get(chat_id)
+        if last_sent is not None:
+            delay = last_sent + self.per_chat_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    def _slow_down(self, retry_after: float) -> None:
+        self._successes = 0
+        self.bucket.pause(retry_after)
+        now = time.monotonic()
+        if now < self._slowed_until:
+            # Тот же flood-wait получил другой воркер: скорость уже снижена.
+            return
+        self._slowed_until = now + retry_after
+        self.bucket.rate = max(self.min_rate, self.bucket.rate * 0.7)
+        logger.warning(
+            "Flood limit hit, pausing for %ss, rate is now %.1f msg/s",
+            retry_after,
+            self.bucket.rate,
+        )
+
+    def _speed_up(self) -> None:
+        self._successes += 1
+        if self._successes >= 100 and self.bucket.rate < self.max_rate:
+            self._successes = 0
+            self.bucket.rate = min(self.max_rate, self.bucket.rate * 1.1)
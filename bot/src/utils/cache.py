@@ -0,0 +1,157 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from cachetools import TTLCache
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+
+
+class AsyncTTLCache:
+    """
+    Асинхронный TTL-кэш для редко меняющихся данных.
+
+    - Одновременные промахи по одному ключу объединяются в один запрос
+      (single-flight).
+    - Просроченное значение отдаётся сразу, а обновление запускается
+      в фоне (stale-while-revalidate), пока не истечёт `stale_ttl`.
+    - Значение можно сбросить явно через `invalidate`; загрузки,
+      начатые до сброса, результат в кэш уже не пишут.
+    """
+
+    def __init__(self, default_ttl: float = 300, stale_ttl: float = 3600):
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[Hashable, CacheEntry] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        should_cache: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        Возвращает значение из кэша или загружает его через `fetch`.
+
+        `should_cache` позволяет не сохранять неудачные ответы.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            if now < entry.expires_at:
+                return entry.value
+            if now < entry.expires_at + self.stale_ttl:
+                if key not in self._inflight:
+                    self._start_fetch(key, fetch, ttl, should_cache)
+                return entry.value
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._start_fetch(key, fetch, ttl, should_cache)
+        return await asyncio.shield(future)
+
+    def _start_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float,
+        should_cache: Callable[[Any], bool],
+    ) -> asyncio.Future:
+        """Запускает единственную загрузку значения для ключа."""
+
+        async def runner() -> Any:
+            try:
+                value = await fetch()
+                # После invalidate загрузка уже не текущая: её результат
+                # мог быть прочитан до изменения данных.
+                current = self._inflight.get(key) is asyncio.current_task()
+                if current and should_cache(value):
+                    self._entries[key] = CacheEntry(
+                        value=value, expires_at=time.monotonic() + ttl
+                    )
+                return value
+            finally:
+                if self._inflight.get(key) is asyncio.current_task():
+                    del self._inflight[key]
+
+        future = asyncio.ensure_future(runner())
+        # Исключение фонового обновления не должно теряться с предупреждением.
+        future.add_done_callback(
+            lambda f: f.cancelled() or f.exception()
+        )
+        self._inflight[key] = future
+        return future
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Сбрасывает значение по ключу или весь кэш целиком. Следующий
+        запрос начнёт новую загрузку, не дожидаясь начатой раньше.
+        """
+        if key is None:
+            self._entries.clear()
+            self._inflight.clear()
+        else:
+            self._entries.pop(key, None)
+            self._inflight.pop(key, None)
+
+
+class UserCache:
+    """
+    Кэш строк `User` по Telegram id с TTL и вытеснением по LRU.
+
+    Счётчики попаданий и промахов помогают подобрать размер кэша.
+    """
+
+    def __init__(self, maxsize: int = 50_000, ttl: float = 300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tg_id: int) -> Optional[Any]:
+        user = self._cache.get(tg_id)
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    def set(self, tg_id: int, user: Any) -> None:
+        self._cache[tg_id] = user
+
+    def update(self, tg_id: int, **values: Any) -> None:
+        """Обновляет поля закэшированного пользователя на месте."""
+        user = self._cache.get(tg_id)
+        if user is None:
+            return
+        for name, value in values.items():
+            setattr(user, name, value)
+
+    def invalidate(self, tg_id: int) -> None:
+        self._cache.pop(tg_id, None)
+
+    def configure(self, maxsize: int, ttl: float) -> None:
+        """Пересоздаёт кэш с новыми параметрами (содержимое теряется)."""
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+        }
@@ -0,0 +1,495 @@
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src.models.aeza_command import AezaCommand
+
+from .aeza import AezaResponse, AsyncAeza, response_items
+from .crypto import derive_password
+from .db import AsyncORM
+from .executor import BoundedExecutor
+from .metrics import AEZA_BREAKER_STATE, AEZA_COMMANDS
+
+logger = logging.getLogger(__name__)
+
+# Коды 4xx, после которых повтор имеет смысл.
+RETRYABLE_STATUSES = frozenset({408, 425, 429})
+# Коды, при которых Aeza точно не приняла запрос.
+REJECTED_STATUSES = frozenset({425, 429})
+FINAL_STATUSES = frozenset({"done", "failed"})
+
+
+def is_retryable(response: AezaResponse) -> bool:
+    """Ошибку сети, 5xx и неразборчивый ответ можно повторить."""
+    status = response.http_status
+    if status is None or status >= 500 or status < 400:
+        return True
+    return status in RETRYABLE_STATUSES
+
+
+def is_ambiguous(response: AezaResponse) -> bool:
+    """Неизвестно, выполнила ли Aeza запрос (таймаут, 5xx и т. п.)."""
+    return is_retryable(response) and (
+        response.http_status not in REJECTED_STATUSES
+    )
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для вызовов Aeza.
+
+    После `failure_threshold` ошибок подряд размыкается и не пропускает
+    вызовы `recovery_timeout` секунд. Затем пропускает один пробный
+    вызов: успех замыкает цепь, ошибка снова размыкает её.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self, failure_threshold: int = 5, recovery_timeout: float = 30.0
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        AEZA_BREAKER_STATE.set(0)
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self.remaining() > 0:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def remaining(self) -> float:
+        """Сколько секунд цепь ещё будет разомкнута."""
+        if self._opened_at is None:
+            return 0.0
+        elapsed = time.monotonic() - self._opened_at
+        return max(0.0, self.recovery_timeout - elapsed)
+
+    def available(self) -> bool:
+        """Пропустит ли предохранитель следующий вызов."""
+        state = self.state
+        return state == self.CLOSED or (
+            state == self.HALF_OPEN and not self._probing
+        )
+
+    def allow(self) -> bool:
+        """Разрешает вызов; в полуоткрытом состоянии — только один."""
+        if not self.available():
+            return False
+        if self.state == self.HALF_OPEN:
+            self._probing = True
+        self._publish()
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._publish()
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._probing or self._failures >= self.failure_threshold:
+            if self._opened_at is None or self._probing:
+                logger.warning(
+                    "Aeza circuit breaker opened for %.0f s",
+                    self.recovery_timeout,
+                )
+            self._opened_at = time.monotonic()
+            self._probing = False
+        self._publish()
+
+    def _publish(self) -> None:
+        AEZA_BREAKER_STATE.set(self.STATE_VALUES[self.state])
+
+
+class CommandQueue:
+    """
+    Очередь изменяющих вызовов Aeza (заказ, управление, переустановка,
+    удаление), хранящаяся в таблице aeza_commands.
+
+    Хендлер ставит команду с ключом идемпотентности и сразу отвечает
+    пользователю; повтор с тем же ключом возвращает ту же команду.
+    Воркеры забирают готовые команды через FOR UPDATE SKIP LOCKED с
+    арендой на `lease`, поэтому команды упавшего процесса подхватит
+    другой. Повторяемые ошибки откладывают команду с экспоненциальной
+    задержкой и случайным разбросом, после `max_attempts` попыток или
+    на ошибке клиента (4xx) команда помечается failed. Пока
+    предохранитель разомкнут, воркеры не обращаются к Aeza.
+
+    Заказ сервера перед отправкой отмечается в базе. Если отправка уже
+    была, следующая попытка сначала ищет заказ в списках услуг и заказов
+    Aeza и отправляет его повторно, только если он не нашёлся за
+    `order_settle` секунд: Aeza создаёт услуги асинхронно.
+
+    Пароли переустановки и смены пароля в базу не пишутся: воркер
+    выводит их из `secret` и ключа команды при выполнении (scrypt
+    в `executor`), а хендлер получает тот же пароль через `password`.
+    """
+
+    CONTROL_ACTIONS = ("start", "stop", "reboot")
+
+    def __init__(
+        self,
+        db: AsyncORM,
+        aeza: AsyncAeza,
+        secret: bytes,
+        executor: Optional[BoundedExecutor] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        workers: int = 4,
+        batch_size: int = 10,
+        lease: timedelta = timedelta(minutes=5),
+        poll_interval: float = 5.0,
+        base_delay: float = 2.0,
+        max_delay: float = 600.0,
+        max_attempts: int = 8,
+        order_settle: float = 900.0,
+        recheck_interval: float = 30.0,
+    ):
+        self.db = db
+        self.aeza = aeza
+        self.secret = secret
+        self.executor = executor
+        self.breaker = breaker or CircuitBreaker()
+        self.workers = workers
+        self.batch_size = batch_size
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.order_settle = order_settle
+        self.recheck_interval = recheck_interval
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    async def enqueue(
+        self, kind: str, payload: dict, idempotency_key: str
+    ) -> Optional[AezaCommand]:
+        """Ставит команду в очередь и будит воркеры."""
+        command = await self.db.aeza_command.enqueue(
+            kind, payload, idempotency_key
+        )
+        if command is not None and command.status == "pending":
+            self._wakeup.set()
+        return command
+
+    async def order_service(
+        self,
+        idempotency_key: str,
+        count: int,
+        term: str,
+        name: str,
+        product_id: int,
+        parameters: dict,
+        auto_prolog: bool,
+        method: str,
+        backups: bool,
+    ) -> Optional[AezaCommand]:
+        """
+        Заказ сервера. К имени добавляется метка из ключа: по ней после
+        неясной ошибки проверяется, не создан ли заказ, до повтора.
+        """
+        marker = hashlib.sha1(idempotency_key.encode()).hexdigest()[:8]
+        return await self.enqueue(
+            "create_service",
+            {
+                "count": count,
+                "term": term,
+                "name": f"{name}-{marker}",
+                "product_id": product_id,
+                "parameters": parameters,
+                "auto_prolog": auto_prolog,
+                "method": method,
+                "backups": backups,
+            },
+            idempotency_key,
+        )
+
+    async def control(
+        self, idempotency_key: str, service_id: int, action: str
+    ) -> Optional[AezaCommand]:
+        """Запуск, остановка или перезагрузка сервера."""
+        if action not in self.CONTROL_ACTIONS:
+            raise ValueError(f"Unknown control action: {action}")
+        return await self.enqueue(
+            "control",
+            {"service_id": service_id, "action": action},
+            idempotency_key,
+        )
+
+    async def reinstall(
+        self,
+        idempotency_key: str,
+        service_id: int,
+        os: int,
+        recipe: Optional[int] = None,
+    ) -> Optional[AezaCommand]:
+        """Переустановка сервера с паролем `password(idempotency_key)`."""
+        return await self.enqueue(
+            "reinstall",
+            {"service_id": service_id, "os": os, "recipe": recipe},
+            idempotency_key,
+        )
+
+    async def change_password(
+        self, idempotency_key: str, service_id: int
+    ) -> Optional[AezaCommand]:
+        """Смена пароля сервера на `password(idempotency_key)`."""
+        return await self.enqueue(
+            "change_password", {"service_id": service_id}, idempotency_key
+        )
+
+    async def delete(
+        self, idempotency_key: str, service_id: int
+    ) -> Optional[AezaCommand]:
+        """Удаление сервера."""
+        return await self.enqueue(
+            "delete", {"service_id": service_id}, idempotency_key
+        )
+
+    async def get(self, idempotency_key: str) -> Optional[AezaCommand]:
+        """Текущее состояние команды."""
+        return await self.db.aeza_command.get_by_key(idempotency_key)
+
+    async def get_many(
+        self, idempotency_keys: list[str]
+    ) -> dict[str, AezaCommand]:
+        """Текущее состояние нескольких команд одним запросом."""
+        return await self.db.aeza_command.get_by_keys(idempotency_keys)
+
+    async def wait(
+        self,
+        idempotency_key: str,
+        timeout: float,
+        interval: float = 1.0,
+    ) -> Optional[AezaCommand]:
+        """
+        Ждёт завершения команды (done или failed) не дольше `timeout`
+        секунд и возвращает её последнее состояние.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            command = await self.get(idempotency_key)
+            if command is not None and command.status in FINAL_STATUSES:
+                return command
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return command
+            await asyncio.sleep(min(interval, remaining))
+
+    async def password(self, idempotency_key: str) -> str:
+        """Пароль команды переустановки или смены пароля."""
+        if self.executor is None:
+            return await asyncio.to_thread(
+                derive_password, self.secret, idempotency_key
+            )
+        return await self.executor.run(
+            derive_password, self.secret, idempotency_key
+        )
+
+    def start(self) -> None:
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                processed = await self.drain()
+            except Exception:
+                logger.exception("Aeza command worker failed")
+                processed = 0
+            if processed:
+                continue
+            self._wakeup.clear()
+            delay = self.breaker.remaining() or self.poll_interval
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain(self) -> int:
+        """Выполняет пачку готовых команд. Возвращает число выполненных."""
+        if not self.breaker.available():
+            return 0
+        commands = await self.db.aeza_command.claim(
+            self.batch_size, self.lease
+        )
+        for index, command in enumerate(commands):
+            if not self.breaker.allow():
+                # Aeza недоступна: остаток пачки возвращается в очередь
+                # без списания попытки.
+                resume_at = datetime.utcnow() + timedelta(
+                    seconds=self.breaker.remaining()
+                )
+                for rest in commands[index:]:
+                    await self.db.aeza_command.release(rest.id, resume_at)
+                return index
+            await self._execute(command)
+        return len(commands)
+
+    def backoff(self, attempts: int) -> float:
+        """Экспоненциальная задержка с полным случайным разбросом."""
+        ceiling = self.base_delay * 2 ** min(attempts - 1, 32)
+        return random.uniform(0, min(self.max_delay, ceiling))
+
+    async def _execute(self, command: AezaCommand) -> None:
+        try:
+            response = await self._call(command)
+        except Exception as e:
+            logger.exception("Aeza command %s crashed", command.id)
+            # Ошибка на стороне бота: пробный вызов снимается.
+            self.breaker.record_success()
+            await self._fail(command, repr(e))
+            return
+
+        if response is None:
+            # Заказ уже отправлялся и пока не виден в Aeza: ждём.
+            self.breaker.record_success()
+            await self.db.aeza_command.release(
+                command.id,
+                datetime.utcnow() + timedelta(seconds=self.recheck_interval),
+            )
+            AEZA_COMMANDS.inc(kind=command.kind, outcome="recheck")
+            return
+
+        if response.status == "ok":
+            self.breaker.record_success()
+            await self.db.aeza_command.complete(command.id, response.context)
+            AEZA_COMMANDS.inc(kind=command.kind, outcome="done")
+            return
+
+        error = str(response.context)
+        if not is_retryable(response):
+            # Aeza ответила осмысленным отказом — она исправна.
+            self.breaker.record_success()
+            await self._fail(command, error)
+            return
+
+        self.breaker.record_failure()
+        if command.attempts >= self.max_attempts:
+            await self._fail(command, error)
+            return
+        await self.db.aeza_command.retry(
+            command.id,
+            error,
+            datetime.utcnow()
+            + timedelta(seconds=self.backoff(command.attempts)),
+        )
+        AEZA_COMMANDS.inc(kind=command.kind, outcome="retry")
+
+    async def _fail(self, command: AezaCommand, error: str) -> None:
+        logger.warning(
+            "Aeza command %s (%s) failed after %d attempts: %s",
+            command.id,
+            command.kind,
+            command.attempts,
+            error,
+        )
+        await self.db.aeza_command.fail(command.id, error)
+        AEZA_COMMANDS.inc(kind=command.kind, outcome="failed")
+
+    async def _call(self, command: AezaCommand) -> Optional[AezaResponse]:
+        """
+        Выполняет команду. None — заказ уже отправлен, но ещё не виден
+        в Aeza, и его нужно проверить позже.
+        """
+        payload = command.payload
+        if command.kind == "create_service":
+            return await self._order(command)
+        if command.kind == "control":
+            method = getattr(self.aeza, f"{payload['action']}_service")
+            return await method(payload["service_id"])
+        if command.kind == "reinstall":
+            password = await self.password(command.idempotency_key)
+            return await self.aeza.reinstall_service(
+                **payload, password=password
+            )
+        if command.kind == "change_password":
+            password = await self.password(command.idempotency_key)
+            return await self.aeza.change_password(
+                payload["service_id"], password
+            )
+        if command.kind == "delete":
+            response = await self.aeza.delete_service(payload["service_id"])
+            if response.http_status == 404:
+                # Сервер уже удалён, в том числе прошлой попыткой.
+                return AezaResponse(
+                    status="ok", context=None, http_status=404
+                )
+            return response
+        raise ValueError(f"Unknown Aeza command kind: {command.kind}")
+
+    async def _order(self, command: AezaCommand) -> Optional[AezaResponse]:
+        """
+        Заказ без дублей: время отправки пишется в базу до запроса,
+        поэтому и повтор, и команда, подхваченная после падения
+        процесса, сначала ищут уже созданный заказ.
+        """
+        payload = command.payload
+        sent_at = (command.result or {}).get("sent_at")
+        if sent_at is not None:
+            existing = await self._find_order(payload["name"])
+            if existing is not None:
+                return existing
+            settled = datetime.fromisoformat(sent_at) + timedelta(
+                seconds=self.order_settle
+            )
+            if datetime.utcnow() < settled:
+                return None
+
+        marked = await self.db.aeza_command.set_result(
+            command.id, {"sent_at": datetime.utcnow().isoformat()}
+        )
+        if not marked:
+            # Без отметки повтор не узнает об отправке: ждём базу.
+            return None
+        response = await self.aeza.create_service(**payload)
+        if response.status != "ok" and not is_ambiguous(response):
+            # Aeza точно не приняла заказ: повтор можно отправлять сразу.
+            await self.db.aeza_command.set_result(command.id, None)
+        return response
+
+    async def _find_order(self, name: str) -> Optional[AezaResponse]:
+        """
+        Ищет услугу или заказ с именем заказа. Найденная услуга
+        возвращается как заказ с `serviceId`. Если список получить не
+        удалось, возвращает эту ошибку, чтобы не заказать сервер
+        второй раз.
+        """
+        for fetch, is_service in (
+            (self.aeza.get_my_services, True),
+            (self.aeza.get_order_list, False),
+        ):
+            response = await fetch()
+            if response.status != "ok":
+                return response
+            for item in response_items(response.context):
+                if isinstance(item, dict) and item.get("name") == name:
+                    if is_service:
+                        item = {**item, "serviceId": item.get("id")}
+                    return AezaResponse(
+                        status="ok",
+                        context=item,
+                        http_status=response.http_status,
+                    )
+        return None
@@ -1,5 +1,7 @@
-from typing import Optional
+from functools import lru_cache
+from typing import Literal, Optional
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,8 +14,85 @@ class Settings(BaseSettings):
     DB_PORT: Optional[str] = None
     DB_NAME: str
 
+    ADMIN_IDS: list[int] = []
+
+    RUN_MODE: Literal["polling", "webhook"] = "polling"
+    WEBHOOK_BASE_URL: Optional[str] = None
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: Optional[str] = None
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_SHUTDOWN_TIMEOUT: float = 30
+
+    UPDATE_CONCURRENCY: int = 100
+    UPDATE_MAX_PENDING: int = 1000
+    UPDATE_MAX_PER_USER: int = 50
+    UPDATE_SHUTDOWN_TIMEOUT: float = 30
+
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_SLOW_QUERY_THRESHOLD: float = 0.2
+
+    METRICS_ENABLED: bool = True
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 9100
+
+    PARTITION_MONTHS_AHEAD: int = 3
+    JOURNAL_RETENTION_MONTHS: int = 12
+    JOURNAL_ARCHIVE_DIR: str = "archive"
+
+    LEDGER_RECONCILE_INTERVAL: float = 24 * 3600
+    LEDGER_RECONCILE_BATCH: int = 500
+
+    PROXY_BILLING_DAYS: int = 30
+    LIFECYCLE_INTERVAL: float = 60
+    LIFECYCLE_BATCH_SIZE: int = 1000
+
+    USER_CACHE_SIZE: int = 50_000
+    USER_CACHE_TTL: float = 300
+
+    JOURNAL_QUEUE_SIZE: int = 10_000
+    JOURNAL_BATCH_SIZE: int = 500
+    JOURNAL_FLUSH_INTERVAL: float = 1.0
+
+    I18N_HOT_RELOAD: bool = False
+
+    THROTTLE_RATE: float = 2.0
+    THROTTLE_BURST: float = 5
+    THROTTLE_USER_RATE: Optional[float] = 5.0
+    THROTTLE_USER_BURST: float = 20
+    REDIS_URL: Optional[str] = None
+
+    BROADCAST_RATE: float = 25
+    BROADCAST_WORKERS: int = 20
+
+    AEZA_CONNECT_TIMEOUT: float = 5.0
+    AEZA_READ_TIMEOUT: float = 10.0
+    AEZA_LIMIT_PER_HOST: int = 20
+    AEZA_SYNC_INTERVAL: float = 60
+    AEZA_COMMAND_WORKERS: int = 4
+    AEZA_COMMAND_MAX_ATTEMPTS: int = 8
+    AEZA_COMMAND_SECRET: Optional[str] = None
+    AEZA_BREAKER_THRESHOLD: int = 5
+    AEZA_BREAKER_RECOVERY: float = 30
+
+    EXECUTOR_CRYPTO_WORKERS: int = 2
+    EXECUTOR_CRYPTO_PROCESSES: bool = False
+    EXECUTOR_BLOCKING_WORKERS: int = 8
+    EXECUTOR_MAX_QUEUE: int = 256
+
     model_config = SettingsConfigDict(env_file="../.env")
 
+    @model_validator(mode="after")
+    def check_webhook(self) -> "Settings":
+        if self.RUN_MODE == "webhook" and not self.WEBHOOK_BASE_URL:
+            raise ValueError("WEBHOOK_BASE_URL is required in webhook mode")
+        return self
+
     @property
     def DB_URL(self):
         url = f"postgresql+asyncpg://{self.DB_USER}"
@@ -27,4 +106,7 @@ class Settings(BaseSettings):
         return url
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Читает настройки при первом обращении, а не при импорте."""
+    return Settings()
@@ -0,0 +1,336 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import cached_property
+from typing import Iterator, Optional
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+
+from .aeza import AsyncAeza
+from .broadcast import Broadcaster
+from .commands import CircuitBreaker, CommandQueue
+from .config import Settings, get_settings
+from .currency import PriceCatalogLoader
+from .db import AsyncORM, db
+from .executor import Executors
+from .i18n import Translations
+from .lifecycle import ProxyLifecycle
+from .metrics import MetricsServer, monitor_loop_lag
+from .middlewares import (
+    DataBaseMiddleware,
+    HandlerMetricsMiddleware,
+    ThrottlingMiddleware,
+    TimedMiddleware,
+    TranslateMiddleware,
+    UserMiddleware,
+)
+from .partitions import PartitionManager
+from .provisioning import ProvisioningPipeline
+from .ratelimit import MemoryBackend, RateLimiter, RedisBackend
+from .reconcile import LedgerReconciler
+from .scheduler import OrderedDispatcher
+from .services import ServiceMirror
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Замеряет длительность фаз запуска."""
+
+    def __init__(self):
+        self.phases: list[tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def report(self) -> str:
+        total = sum(duration for _, duration in self.phases)
+        lines = [
+            f"  {name:<14} {duration * 1000:8.1f} ms"
+            for name, duration in self.phases
+        ]
+        lines.append(f"  {'total':<14} {total * 1000:8.1f} ms")
+        return "Startup timings:\n" + "\n".join(lines)
+
+
+class Container:
+    """
+    Ленивый контейнер зависимостей бота.
+
+    Каждый компонент создаётся при первом обращении, поэтому точка входа
+    платит только за то, что ей действительно нужно, а импорт модулей
+    проекта не требует `.env`.
+    """
+
+    def __init__(self, timer: Optional[StartupTimer] = None):
+        self.timer = timer or StartupTimer()
+        self._background: list[asyncio.Task] = []
+
+    @cached_property
+    def settings(self) -> Settings:
+        with self.timer.phase("settings"):
+            return get_settings()
+
+    @property
+    def db(self) -> AsyncORM:
+        return db
+
+    @cached_property
+    def bot(self) -> Bot:
+        with self.timer.phase("bot"):
+            return Bot(
+                token=self.settings.BOT_TOKEN,
+                session=AiohttpSession(),
+                default=DefaultBotProperties(parse_mode="HTML"),
+            )
+
+    @cached_property
+    def aeza(self) -> AsyncAeza:
+        with self.timer.phase("aeza"):
+            return AsyncAeza(
+                api_key=self.settings.AEZA_TOKEN,
+                connect_timeout=self.settings.AEZA_CONNECT_TIMEOUT,
+                read_timeout=self.settings.AEZA_READ_TIMEOUT,
+                limit_per_host=self.settings.AEZA_LIMIT_PER_HOST,
+            )
+
+    @cached_property
+    def translations(self) -> Translations:
+        with self.timer.phase("translations"):
+            translations = Translations("src/i18n", root_locale="ru")
+            translations.load()
+        if self.settings.I18N_HOT_RELOAD:
+            self._background.append(
+                asyncio.create_task(translations.watch())
+            )
+        return translations
+
+    @cached_property
+    def executors(self) -> Executors:
+        settings = self.settings
+        return Executors(
+            crypto_workers=settings.EXECUTOR_CRYPTO_WORKERS,
+            blocking_workers=settings.EXECUTOR_BLOCKING_WORKERS,
+            max_queue=settings.EXECUTOR_MAX_QUEUE,
+            crypto_processes=settings.EXECUTOR_CRYPTO_PROCESSES,
+        )
+
+    @cached_property
+    def provisioning(self) -> ProvisioningPipeline:
+        return ProvisioningPipeline(
+            aeza=self.aeza,
+            db=self.db,
+            commands=self.commands,
+            billing_period=timedelta(days=self.settings.PROXY_BILLING_DAYS),
+        )
+
+    @cached_property
+    def services(self) -> ServiceMirror:
+        return ServiceMirror(
+            db=self.db,
+            aeza=self.aeza,
+            interval=self.settings.AEZA_SYNC_INTERVAL,
+        )
+
+    @cached_property
+    def commands(self) -> CommandQueue:
+        settings = self.settings
+        # Пароли серверов выводятся из секрета очереди. Без отдельного
+        # секрета берётся токен Aeza: его владелец и так может
+        # переустановить любой сервер.
+        secret = settings.AEZA_COMMAND_SECRET or settings.AEZA_TOKEN
+        return CommandQueue(
+            db=self.db,
+            aeza=self.aeza,
+            secret=secret.encode(),
+            executor=self.executors.crypto,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.AEZA_BREAKER_THRESHOLD,
+                recovery_timeout=settings.AEZA_BREAKER_RECOVERY,
+            ),
+            workers=settings.AEZA_COMMAND_WORKERS,
+            max_attempts=settings.AEZA_COMMAND_MAX_ATTEMPTS,
+        )
+
+    @cached_property
+    def limiter(self) -> RateLimiter:
+        settings = self.settings
+        return RateLimiter(
+            backend=(
+                RedisBackend(settings.REDIS_URL)
+                if settings.REDIS_URL
+                else MemoryBackend()
+            ),
+            rate=settings.THROTTLE_RATE,
+            burst=settings.THROTTLE_BURST,
+        )
+
+    @cached_property
+    def broadcaster(self) -> Broadcaster:
+        return Broadcaster(
+            bot=self.bot,
+            db=self.db,
+            rate=self.settings.BROADCAST_RATE,
+            workers=self.settings.BROADCAST_WORKERS,
+        )
+
+    @cached_property
+    def dispatcher(self) -> OrderedDispatcher:
+        translations, aeza = self.translations, self.aeza
+        broadcaster, limiter = self.broadcaster, self.limiter
+        services, commands = self.services, self.commands
+
+        with self.timer.phase("dispatcher"):
+            # Хендлеры импортируются только тем точкам входа,
+            # которым нужен диспетчер.
+            from src.handlers import router as main_router
+
+            dp = OrderedDispatcher(
+                concurrency=self.settings.UPDATE_CONCURRENCY,
+                max_pending=self.settings.UPDATE_MAX_PENDING,
+                max_per_key=self.settings.UPDATE_MAX_PER_USER,
+                settings=self.settings,
+                translations=translations,
+                aeza=aeza,
+                prices=PriceCatalogLoader(aeza),
+                broadcaster=broadcaster,
+                services=services,
+                commands=commands,
+            )
+            throttling_middleware = TimedMiddleware(
+                ThrottlingMiddleware(
+                    limiter,
+                    user_rate=self.settings.THROTTLE_USER_RATE,
+                    user_burst=self.settings.THROTTLE_USER_BURST,
+                )
+            )
+            user_middleware = TimedMiddleware(UserMiddleware(db=self.db))
+            database_middleware = TimedMiddleware(
+                DataBaseMiddleware(db=self.db)
+            )
+            translate_middleware = TimedMiddleware(TranslateMiddleware())
+            handler_metrics_middleware = HandlerMetricsMiddleware()
+
+            dp.message.middleware(throttling_middleware)
+            dp.message.middleware(handler_metrics_middleware)
+            dp.message.outer_middleware(user_middleware)
+            dp.message.outer_middleware(database_middleware)
+            dp.message.outer_middleware(translate_middleware)
+            # dp.message.middleware(AlbumMiddleware())
+
+            dp.callback_query.middleware(throttling_middleware)
+            dp.callback_query.middleware(handler_metrics_middleware)
+            dp.callback_query.outer_middleware(user_middleware)
+            dp.callback_query.outer_middleware(database_middleware)
+            dp.callback_query.outer_middleware(translate_middleware)
+            # dp.callback_query.middleware(AlbumMiddleware())
+
+            dp.include_router(main_router)
+        return dp
+
+    @cached_property
+    def partitions(self) -> PartitionManager:
+        return PartitionManager(
+            db=self.db,
+            months_ahead=self.settings.PARTITION_MONTHS_AHEAD,
+            journal_retention_months=self.settings.JOURNAL_RETENTION_MONTHS,
+            archive_dir=self.settings.JOURNAL_ARCHIVE_DIR,
+            executor=self.executors.blocking,
+        )
+
+    @cached_property
+    def reconciler(self) -> LedgerReconciler:
+        return LedgerReconciler(
+            db=self.db, batch_size=self.settings.LEDGER_RECONCILE_BATCH
+        )
+
+    @cached_property
+    def lifecycle(self) -> ProxyLifecycle:
+        settings = self.settings
+        return ProxyLifecycle(
+            db=self.db,
+            commands=self.commands,
+            period=timedelta(days=settings.PROXY_BILLING_DAYS),
+            batch_size=settings.LIFECYCLE_BATCH_SIZE,
+            interval=settings.LIFECYCLE_INTERVAL,
+        )
+
+    async def start_db(self) -> None:
+        settings = self.settings
+        with self.timer.phase("database"):
+            await self.db.start(settings)
+
+    async def start_background(self) -> None:
+        """Запускает фоновые задачи обслуживания."""
+        with self.timer.phase("background"):
+            await self.partitions.ensure_partitions()
+            await self.services.load()
+            self._background.append(asyncio.create_task(monitor_loop_lag()))
+            self._background.append(
+                asyncio.create_task(self.partitions.run())
+            )
+            self._background.append(
+                asyncio.create_task(
+                    self.reconciler.run(
+                        self.settings.LEDGER_RECONCILE_INTERVAL
+                    )
+                )
+            )
+            self._background.append(
+                asyncio.create_task(self.lifecycle.run())
+            )
+            self._background.append(
+                asyncio.create_task(self.services.run())
+            )
+            self.commands.start()
+
+    @cached_property
+    def metrics_server(self) -> MetricsServer:
+        return MetricsServer(
+            host=self.settings.METRICS_HOST, port=self.settings.METRICS_PORT
+        )
+
+    async def start_metrics(self) -> None:
+        """
+        Поднимает отдельный сервер `/metrics` в обоих режимах: порт
+        webhook открыт наружу, и метрики на нём не отдаются.
+        """
+        if self.settings.METRICS_ENABLED:
+            await self.metrics_server.start()
+
+    async def close(self) -> None:
+        """
+        Закрывает только те компоненты, которые были созданы. Можно
+        вызывать и после неудачного запуска.
+        """
+        for task in self._background:
+            task.cancel()
+        # Фоновые задачи работают с базой: дожидаемся их до db.stop().
+        await asyncio.gather(*self._background, return_exceptions=True)
+        self._background.clear()
+        created = self.__dict__
+        if "metrics_server" in created:
+            await self.metrics_server.stop()
+        if "commands" in created:
+            await self.commands.stop()
+        if "broadcaster" in created:
+            await self.broadcaster.close()
+        if "aeza" in created:
+            await self.aeza.close()
+        if "limiter" in created:
+            await self.limiter.close()
+        if "executors" in created:
+            self.executors.shutdown(wait=False)
+        if "bot" in created:
+            await self.bot.session.close()
+        logger.info("DB pool stats: %s", self.db.pool_stats())
+        await self.db.stop()
@@ -0,0 +1,65 @@
+import hashlib
+import hmac
+import secrets
+import string
+from typing import Callable, Iterator
+from uuid import UUID, uuid4
+
+PASSWORD_ALPHABET = string.ascii_letters + string.digits
+# Параметры scrypt: ~16 МиБ памяти и десятки миллисекунд CPU на пароль.
+SCRYPT_N = 2**14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+
+def new_proxy_identity() -> tuple[UUID, str]:
+    """UUID клиента VLESS и short_id для REALITY."""
+    return uuid4(), secrets.token_hex(8)
+
+
+def derive_password(secret: bytes, context: str, length: int = 16) -> str:
+    """
+    Пароль для `reinstall_service`/`change_password`, однозначно
+    выводимый из секрета и контекста через scrypt: его можно получить
+    заново в любом процессе, не храня в базе. scrypt не даёт подобрать
+    слабый секрет по известному паролю.
+    """
+    key = hashlib.scrypt(
+        secret,
+        salt=f"aeza-password:{context}".encode(),
+        n=SCRYPT_N,
+        r=SCRYPT_R,
+        p=SCRYPT_P,
+        dklen=32,
+    )
+    stream = _byte_stream(key)
+
+    def choice(alphabet: str) -> str:
+        # Байты выше кратного длине алфавита отбрасываются без смещения.
+        limit = 256 - 256 % len(alphabet)
+        for byte in stream:
+            if byte < limit:
+                return alphabet[byte % len(alphabet)]
+        raise AssertionError("unreachable")
+
+    return _password(choice, length)
+
+
+def _password(choice: Callable[[str], str], length: int) -> str:
+    """Пароль, в котором есть строчные и заглавные буквы и цифры."""
+    while True:
+        password = "".join(choice(PASSWORD_ALPHABET) for _ in range(length))
+        if (
+            any(char.islower() for char in password)
+            and any(char.isupper() for char in password)
+            and any(char.isdigit() for char in password)
+        ):
+            return password
+
+
+def _byte_stream(key: bytes) -> Iterator[int]:
+    """Бесконечный поток байтов HMAC-SHA256(key, счётчик)."""
+    counter = 0
+    while True:
+        yield from hmac.digest(key, counter.to_bytes(8, "big"), "sha256")
+        counter += 1
@@ -0,0 +1,184 @@
+import asyncio
+from dataclasses import dataclass, field
+from decimal import ROUND_CEILING, Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Optional
+
+from .aeza import AezaResponse, AsyncAeza, response_items
+
+BASE_CURRENCY = "RUB"
+
+
+@dataclass(frozen=True)
+class Currency:
+    code: str
+    multiplier: Decimal
+    round: int
+
+    @property
+    def quantum(self) -> Decimal:
+        """Минимальная единица валюты, 1 / R, где R = 10 ** round."""
+        return Decimal(1).scaleb(-self.round)
+
+    def convert(self, value: Decimal) -> Decimal:
+        """Перевод по формуле Aeza: ceil(value * multiplier * R) / R."""
+        return (value * self.multiplier).quantize(
+            self.quantum, rounding=ROUND_CEILING
+        )
+
+
+def to_decimal(value: Any) -> Decimal:
+    """Точное преобразование числа из JSON в Decimal (без ошибок float)."""
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def parse_price(value: Any) -> Optional[Decimal]:
+    """Конечное число из JSON или None, если значение не число."""
+    if isinstance(value, bool) or not isinstance(
+        value, (int, float, str, Decimal)
+    ):
+        return None
+    try:
+        price = to_decimal(value)
+    except InvalidOperation:
+        return None
+    return price if price.is_finite() else None
+
+
+def parse_currencies(context: Any) -> Dict[str, Currency]:
+    """
+    Разбирает ответ `get_payment_currencies`.
+
+    Поддерживает как словарь `{code: {...}}`, так и список объектов
+    с полем `code`. Валюты с некорректным курсом пропускаются.
+    """
+    items = [
+        item for item in response_items(context) if isinstance(item, dict)
+    ]
+    if len(items) == 1 and not {"code", "name"} & items[0].keys():
+        items = [
+            {"code": code, **value}
+            for code, value in items[0].items()
+            if isinstance(value, dict)
+        ]
+
+    currencies = {
+        BASE_CURRENCY: Currency(BASE_CURRENCY, Decimal(1), 2),
+    }
+    for item in items:
+        code = item.get("code") or item.get("name")
+        multiplier = parse_price(item.get("multiplier"))
+        if not code or multiplier is None:
+            continue
+        try:
+            round_ = int(item.get("round", 2))
+        except (TypeError, ValueError):
+            continue
+        currencies[code] = Currency(
+            code=code, multiplier=multiplier, round=round_
+        )
+    return currencies
+
+
+def parse_products(context: Any) -> List[dict]:
+    """Достаёт список услуг из ответа `get_sevices_list`."""
+    return [
+        item
+        for item in response_items(context)
+        if isinstance(item, dict) and "id" in item
+    ]
+
+
+@dataclass
+class PriceCatalog:
+    """
+    Прайс-лист услуг, заранее пересчитанный во все валюты.
+
+    Таблицы строятся один раз: `tables[currency][product_id][term]`.
+    """
+
+    currencies: Dict[str, Currency]
+    tables: Dict[str, Dict[int, Dict[str, Decimal]]] = field(
+        default_factory=dict
+    )
+
+    @classmethod
+    def build(
+        cls, currencies: Dict[str, Currency], products: Iterable[dict]
+    ) -> "PriceCatalog":
+        """Пересчитывает весь каталог во все валюты за один проход."""
+        base_prices: Dict[int, Dict[str, Decimal]] = {}
+        for product in products:
+            prices = product.get("prices")
+            # Список или null вместо словаря — у услуги нет цен.
+            if not isinstance(prices, dict):
+                prices = {}
+            terms = {
+                term: parse_price(value) for term, value in prices.items()
+            }
+            base_prices[product["id"]] = {
+                term: value
+                for term, value in terms.items()
+                if value is not None
+            }
+
+        tables = {
+            code: {
+                product_id: {
+                    term: currency.convert(value)
+                    for term, value in terms.items()
+                }
+                for product_id, terms in base_prices.items()
+            }
+            for code, currency in currencies.items()
+        }
+        return cls(currencies=currencies, tables=tables)
+
+    def table(self, currency: str = BASE_CURRENCY) -> Dict[int, dict]:
+        """Таблица цен в указанной валюте."""
+        return self.tables[currency]
+
+    def price(
+        self, product_id: int, term: str, currency: str = BASE_CURRENCY
+    ) -> Optional[Decimal]:
+        """Цена услуги за срок `term` в указанной валюте."""
+        return self.tables[currency].get(product_id, {}).get(term)
+
+
+class PriceCatalogLoader:
+    """
+    Строит `PriceCatalog` из кэшированных ответов Aeza.
+
+    Каталог пересобирается только когда кэш клиента вернул новые ответы,
+    поэтому рендер меню тарифов не пересчитывает цены.
+    """
+
+    def __init__(self, aeza: AsyncAeza):
+        self.aeza = aeza
+        self._catalog: Optional[PriceCatalog] = None
+        self._sources: tuple = ()
+
+    async def get(self) -> Optional[PriceCatalog]:
+        """Возвращает актуальный каталог или None при ошибке Aeza."""
+        currencies, products = await asyncio.gather(
+            self.aeza.get_payment_currencies(),
+            self.aeza.get_sevices_list(),
+        )
+        if not self._is_ok(currencies) or not self._is_ok(products):
+            return self._catalog
+
+        sources = (currencies, products)
+        if self._catalog is None or any(
+            new is not old for new, old in zip(sources, self._sources)
+        ):
+            self._catalog = PriceCatalog.build(
+                parse_currencies(currencies.context),
+                parse_products(products.context),
+            )
+            self._sources = sources
+        return self._catalog
+
+    @staticmethod
+    def _is_ok(response: AezaResponse) -> bool:
+        return response.status == "ok"
@@ -1,19 +1,192 @@
 import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, AsyncIterator
+from uuid import UUID
 
-from sqlalchemy import delete, select
+from sqlalchemy import (
+    Date,
+    Integer,
+    Row,
+    Select,
+    and_,
+    bindparam,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     async_sessionmaker,
     create_async_engine,
 )
+from src.models.aeza_command import AezaCommand
+from src.models.aeza_service import AezaService
 from src.models.bank import Bank
+from src.models.bank_summary import BankMonthly, BankSummary
 from src.models.base import Base
+from src.models.broadcast import Broadcast
 from src.models.journal import Journal
-from src.models.proxy import Proxy
+from src.models.proxy import FREEZE_MANUAL, FREEZE_UNPAID, Proxy
 from src.models.user import User
 
-from .config import settings
+from .cache import UserCache
+from .config import Settings, get_settings
+from .metrics import collect_pool, instrument_engine, registry
+from .pool import InstrumentedPool
+
+logger = logging.getLogger(__name__)
+
+# serialization_failure и deadlock_detected: транзакцию можно повторить.
+RETRYABLE_SQLSTATES = frozenset({"40001", "40P01"})
+
+
+def balance_update(tg_id: int, amount: Decimal):
+    """Атомарное изменение баланса: `money = money + amount RETURNING`."""
+    return (
+        update(User)
+        .where(User.id == tg_id)
+        .values(money=User.money + amount)
+        .returning(User.money)
+    )
+
+
+def month_of(value: datetime) -> date:
+    return value.date().replace(day=1)
+
+
+def ledger_updates(
+    tg_id: int, amount: Decimal, currency: str, at: datetime
+) -> list:
+    """
+    Инкремент итогов пользователя (`bank_summary` и `bank_monthly`)
+    для одной операции. Выполняется в транзакции записи в bank.
+    """
+    income = amount if amount > 0 else Decimal(0)
+    spent = -amount if amount < 0 else Decimal(0)
+    topup = amount > 0
+
+    summary = pg_insert(BankSummary).values(
+        user_id=tg_id,
+        currency=currency,
+        total_in=income,
+        total_out=spent,
+        operations=1,
+        last_topup_at=at if topup else None,
+        last_topup_amount=amount if topup else None,
+        updated_at=at,
+    )
+    summary = summary.on_conflict_do_update(
+        index_elements=[BankSummary.user_id, BankSummary.currency],
+        set_={
+            "total_in": BankSummary.total_in + summary.excluded.total_in,
+            "total_out": BankSummary.total_out + summary.excluded.total_out,
+            "operations": BankSummary.operations + 1,
+            "last_topup_at": func.coalesce(
+                summary.excluded.last_topup_at, BankSummary.last_topup_at
+            ),
+            "last_topup_amount": func.coalesce(
+                summary.excluded.last_topup_amount,
+                BankSummary.last_topup_amount,
+            ),
+            "updated_at": summary.excluded.updated_at,
+        },
+    )
+
+    monthly = pg_insert(BankMonthly).values(
+        user_id=tg_id,
+        currency=currency,
+        month=month_of(at),
+        total_in=income,
+        total_out=spent,
+        operations=1,
+    )
+    monthly = monthly.on_conflict_do_update(
+        index_elements=[
+            BankMonthly.user_id,
+            BankMonthly.currency,
+            BankMonthly.month,
+        ],
+        set_={
+            "total_in": BankMonthly.total_in + monthly.excluded.total_in,
+            "total_out": BankMonthly.total_out + monthly.excluded.total_out,
+            "operations": BankMonthly.operations + 1,
+        },
+    )
+    return [summary, monthly]
+
+
+def bank_currency():
+    """
+    Валюта операции (пустая считается рублями). Константа без
+    параметра, чтобы выражение совпадало в SELECT, GROUP BY и
+    DISTINCT ON.
+    """
+    return func.coalesce(Bank.currency, literal_column("'RUB'"))
+
+
+def ledger_totals(user_ids: list[int], monthly: bool = False) -> Select:
+    """Итоги, посчитанные напрямую по таблице bank."""
+    currency = bank_currency()
+    keys = [Bank.user_id, currency]
+    if monthly:
+        keys.append(cast(func.date_trunc("month", Bank.date), Date))
+    return (
+        select(
+            *keys,
+            func.sum(case((Bank.amount > 0, Bank.amount), else_=0)),
+            func.sum(case((Bank.amount < 0, -Bank.amount), else_=0)),
+            func.count(),
+        )
+        .where(Bank.user_id.in_(user_ids))
+        .group_by(*keys)
+    )
+
+
+@dataclass
+class UserFilter:
+    """Фильтры для выборки пользователей."""
+
+    has_proxies: bool = False
+    positive_balance: bool = False
+    registered_since: datetime | None = None
+    exclude_blocked: bool = False
+
+    def apply(self, query: Select) -> Select:
+        if self.has_proxies:
+            query = query.where(User.proxy_count > 0)
+        if self.positive_balance:
+            query = query.where(User.money > 0)
+        if self.registered_since is not None:
+            query = query.where(User.reg_date >= self.registered_since)
+        if self.exclude_blocked:
+            query = query.where(User.blocked_at.is_(None))
+        return query
+
+
+@dataclass
+class RenewalStats:
+    """Итог обработки одной пачки истёкших прокси."""
+
+    due: int = 0
+    renewed: int = 0
+    frozen: int = 0
+    charged: Decimal = Decimal(0)
+
+
+# Лёгкая выборка пользователей без ORM-объектов.
+USER_ROW_COLUMNS = (User.id, User.name, User.money, User.proxy_count)
 
 
 class BaseManager:
@@ -21,8 +194,9 @@ class BaseManager:
     Базовый менеджер для работы с асинхронной ORM.
     """
 
-    def __init__(self, session_maker):
+    def __init__(self, session_maker, user_cache: UserCache):
         self.session_maker = session_maker
+        self.user_cache = user_cache
 
 
 class UserManager(BaseManager):
@@ -37,39 +211,107 @@ class UserManager(BaseManager):
                 user = User(id=tg_id, name=tg_name)
                 session.add(user)
                 await session.commit()
+                self.user_cache.set(tg_id, user)
             except SQLAlchemyError as e:
                 await session.rollback()
-                print(f"Ошибка при добавлении пользователя: {e}")
+                logger.error("Ошибка при добавлении пользователя: %s", e)
+
+    async def register_user(
+        self, tg_id: int, tg_name: str, refresh_after: float = 300
+    ) -> bool:
+        """
+        Регистрирует пользователя одним `INSERT ... ON CONFLICT`.
+
+        Имя существующего пользователя обновляется, только если запись
+        не обновлялась дольше `refresh_after` секунд или пользователь
+        был помечен как заблокировавший бота. Возвращает False, если
+        запрос не удался, и True, если запись есть в базе (добавлена,
+        обновлена или уже была актуальной).
+        """
+        now = datetime.utcnow()
+        query = pg_insert(User).values(id=tg_id, name=tg_name, updated_at=now)
+        query = query.on_conflict_do_update(
+            index_elements=[User.id],
+            set_={
+                "name": query.excluded.name,
+                "updated_at": query.excluded.updated_at,
+                "blocked_at": None,
+            },
+            where=(User.updated_at < now - timedelta(seconds=refresh_after))
+            | User.blocked_at.is_not(None),
+        ).returning(User)
 
-    async def change_balance(self, tg_id: int, amount: float) -> None:
-        """Изменяет баланс пользователя на указанную сумму."""
         async with self.session_maker() as session:
             try:
-                result = await session.execute(
-                    select(User).where(User.id == tg_id)
+                result = await session.scalars(
+                    query, execution_options={"populate_existing": True}
                 )
-                user: User = result.scalar_one_or_none()
-                if user:
-                    user.money += amount
-                    await session.commit()
+                user = result.one_or_none()
+                await session.commit()
             except SQLAlchemyError as e:
                 await session.rollback()
-                print(f"Ошибка при изменении баланса: {e}")
+                logger.error("Ошибка при регистрации пользователя: %s", e)
+                return False
+
+        if user is not None:
+            self.user_cache.set(tg_id, user)
+        return True
+
+    async def get_user(self, tg_id: int) -> User | None:
+        """Возвращает пользователя из кэша или из базы."""
+        user = self.user_cache.get(tg_id)
+        if user is not None:
+            return user
+        async with self.session_maker() as session:
+            result = await session.execute(
+                select(User).where(User.id == tg_id)
+            )
+            user = result.scalar_one_or_none()
+        if user is not None:
+            self.user_cache.set(tg_id, user)
+        return user
 
-    async def change_proxy_count(self, tg_id: int, count: int) -> None:
-        """Изменяет количество прокси у пользователя."""
+    async def change_balance(
+        self, tg_id: int, amount: Decimal
+    ) -> Decimal | None:
+        """
+        Изменяет баланс пользователя на указанную сумму.
+
+        Выполняется одним `UPDATE ... RETURNING`, поэтому одновременные
+        пополнения не теряются. Возвращает новый баланс.
+        """
+        async with self.session_maker() as session:
+            try:
+                result = await session.execute(balance_update(tg_id, amount))
+                balance = result.scalar_one_or_none()
+                await session.commit()
+                self.user_cache.update(tg_id, money=balance)
+                return balance
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logger.error("Ошибка при изменении баланса: %s", e)
+
+    async def change_proxy_count(self, tg_id: int, count: int) -> int | None:
+        """
+        Изменяет количество прокси у пользователя.
+
+        Возвращает новое количество прокси.
+        """
         async with self.session_maker() as session:
             try:
                 result = await session.execute(
-                    select(User).where(User.id == tg_id)
+                    update(User)
+                    .where(User.id == tg_id)
+                    .values(proxy_count=User.proxy_count + count)
+                    .returning(User.proxy_count)
                 )
-                user: User = result.scalar_one_or_none()
-                if user:
-                    user.proxy_count += count
-                    await session.commit()
+                proxy_count = result.scalar_one_or_none()
+                await session.commit()
+                self.user_cache.update(tg_id, proxy_count=proxy_count)
+                return proxy_count
             except SQLAlchemyError as e:
                 await session.rollback()
-                print(f"Ошибка при изменении количества прокси: {e}")
+                logger.error("Ошибка при изменении количества прокси: %s", e)
 
     async def get_user_list(self) -> list[User]:
         """Выдает список пользователей."""
@@ -78,6 +320,74 @@ class UserManager(BaseManager):
             users: list[User] | None = result.scalars().all()
             return users
 
+    async def mark_blocked(self, tg_ids: list[int]) -> None:
+        """Помечает пользователей, заблокировавших бота."""
+        if not tg_ids:
+            return
+        now = datetime.utcnow()
+        async with self.session_maker() as session:
+            try:
+                await session.execute(
+                    update(User)
+                    .where(User.id.in_(tg_ids))
+                    .values(blocked_at=now)
+                )
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logger.error("Ошибка при пометке заблокированных: %s", e)
+                return
+        for tg_id in tg_ids:
+            self.user_cache.update(tg_id, blocked_at=now)
+
+    def _user_rows_query(
+        self, after_id: int | None, filters: UserFilter | None
+    ) -> Select:
+        query = select(*USER_ROW_COLUMNS).order_by(User.id)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        if filters is not None:
+            query = filters.apply(query)
+        return query
+
+    async def get_user_page(
+        self,
+        after_id: int | None = None,
+        limit: int = 1000,
+        filters: UserFilter | None = None,
+    ) -> list[Row]:
+        """
+        Страница пользователей по ключу (keyset pagination).
+
+        Следующая страница запрашивается с `after_id` равным id
+        последней строки предыдущей.
+        """
+        query = self._user_rows_query(after_id, filters).limit(limit)
+        async with self.session_maker() as session:
+            result = await session.execute(query)
+            return list(result.all())
+
+    async def iter_users(
+        self,
+        after_id: int | None = None,
+        filters: UserFilter | None = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[Row]:
+        """
+        Потоково перебирает пользователей через серверный курсор.
+
+        Строки (id, name, money, proxy_count) читаются пачками по
+        `chunk_size`, так что память не растёт с размером таблицы.
+        """
+        query = self._user_rows_query(after_id, filters).execution_options(
+            yield_per=chunk_size
+        )
+        async with self.session_maker() as session:
+            result = await session.stream(query)
+            async for partition in result.partitions():
+                for row in partition:
+                    yield row
+
 
 class ProxyManager(BaseManager):
     """
@@ -85,7 +395,12 @@ class ProxyManager(BaseManager):
     """
 
     async def add_proxy(
-        self, uuid: str, short_id: str, user_id: int, server_ip: str, link: str
+        self,
+        uuid: UUID,
+        short_id: str,
+        user_id: int,
+        server_ip: str,
+        link: str,
     ) -> None:
         """Добавляет новый прокси в таблицу proxies."""
         async with self.session_maker() as session:
@@ -101,7 +416,40 @@ class ProxyManager(BaseManager):
                 await session.commit()
             except SQLAlchemyError as e:
                 await session.rollback()
-                print(f"Ошибка при добавлении прокси: {e}")
+                logger.error("Ошибка при добавлении прокси: %s", e)
+
+    async def add_proxies(self, proxies: list[dict]) -> bool:
+        """
+        Добавляет пачку прокси одним многострочным INSERT и
+        увеличивает счётчики прокси пользователей в той же транзакции.
+        """
+        if not proxies:
+            return True
+
+        counts: dict[int, int] = {}
+        for proxy in proxies:
+            counts[proxy["user_id"]] = counts.get(proxy["user_id"], 0) + 1
+
+        async with self.session_maker() as session:
+            try:
+                await session.execute(insert(Proxy).values(proxies))
+                proxy_counts = {}
+                for user_id, count in counts.items():
+                    result = await session.execute(
+                        update(User)
+                        .where(User.id == user_id)
+                        .values(proxy_count=User.proxy_count + count)
+                        .returning(User.proxy_count)
+                    )
+                    proxy_counts[user_id] = result.scalar_one_or_none()
+                await session.commit()
+                for user_id, proxy_count in proxy_counts.items():
+                    self.user_cache.update(user_id, proxy_count=proxy_count)
+                return True
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logger.error("Ошибка при пакетном добавлении прокси: %s", e)
+                return False
 
     async def remove_proxy(self, short_id: str) -> None:
         """Удаляет прокси из таблицы proxies."""
@@ -112,10 +460,13 @@ class ProxyManager(BaseManager):
                 await session.commit()
             except SQLAlchemyError as e:
                 await session.rollback()
-                print(f"Ошибка при удалении прокси: {e}")
+                logger.error("Ошибка при удалении прокси: %s", e)
 
     async def freeze_proxy(self, short_id: str) -> None:
-        """Замораживает прокси, устанавливая флаг is_freeze в True."""
+        """
+        Замораживает прокси вручную: такой прокси не размораживается
+        при продлении, даже если баланса хватает.
+        """
         await self._update_proxy_status(short_id, True)
 
     async def unfreeze_proxy(self, short_id: str) -> None:
@@ -130,29 +481,339 @@ class ProxyManager(BaseManager):
                     select(Proxy).where(Proxy.short_id == short_id)
                 )
                 proxy: Proxy = result.scalar_one_or_none()
-                if proxy:
+                if proxy is None:
+                    return
+                if proxy.is_freeze != status:
                     proxy.is_freeze = status
-                    await session.commit()
+                    # Остановку или запуск сервера выполнит планировщик.
+                    proxy.service_synced = proxy.service_id is None
+                    proxy.state_version += 1
+                # Ручная заморозка неоплаченного прокси делает её ручной.
+                proxy.freeze_reason = FREEZE_MANUAL if status else None
+                await session.commit()
             except SQLAlchemyError as e:
                 await session.rollback()
-                print(f"Ошибка при изменении статуса прокси: {e}")
+                logger.error("Ошибка при изменении статуса прокси: %s", e)
+
+    async def renew_due(
+        self,
+        now: datetime,
+        period: timedelta,
+        limit: int = 1000,
+        frozen: bool = False,
+    ) -> RenewalStats | None:
+        """
+        Продлевает пачку истёкших прокси за счёт баланса владельцев.
+
+        Активные прокси, которые пользователь не может оплатить,
+        замораживаются с причиной FREEZE_UNPAID. Замороженные
+        (`frozen=True`) выбираются, только если заморожены за неуплату
+        и баланса хватает, и при оплате размораживаются; замороженные
+        вручную не трогаются. Строки
+        берутся через FOR UPDATE SKIP LOCKED, поэтому несколько
+        процессов не обработают один прокси дважды, а обрыв посередине
+        откатывает пачку целиком.
+        """
+        query = (
+            select(Proxy.uuid, Proxy.user_id, Proxy.price)
+            .where(Proxy.expires_at <= now, Proxy.is_freeze.is_(frozen))
+            .order_by(Proxy.expires_at)
+            .limit(limit)
+        )
+        if frozen:
+            query = query.join(User, User.id == Proxy.user_id).where(
+                Proxy.freeze_reason == FREEZE_UNPAID,
+                User.money >= func.coalesce(Proxy.price, 0),
+            )
+        query = query.with_for_update(of=Proxy, skip_locked=True)
+
+        async with self.session_maker() as session:
+            try:
+                async with session.begin():
+                    due = (await session.execute(query)).all()
+                    stats = RenewalStats(due=len(due))
+                    if not due:
+                        return stats
+
+                    user_ids = sorted({row.user_id for row in due})
+                    balances = dict(
+                        (
+                            await session.execute(
+                                select(User.id, User.money)
+                                .where(User.id.in_(user_ids))
+                                .order_by(User.id)
+                                .with_for_update()
+                            )
+                        ).all()
+                    )
+
+                    charges: dict[int, Decimal] = {}
+                    renewed, unpaid = [], []
+                    for row in due:
+                        price = row.price or Decimal(0)
+                        balance = balances.get(row.user_id) or Decimal(0)
+                        if balance >= price:
+                            balances[row.user_id] = balance - price
+                            if price:
+                                charges[row.user_id] = (
+                                    charges.get(row.user_id, 0) + price
+                                )
+                            renewed.append(row.uuid)
+                        else:
+                            unpaid.append(row.uuid)
+
+                    await self._charge(session, charges, now)
+                    if renewed:
+                        await session.execute(
+                            update(Proxy)
+                            .where(Proxy.uuid.in_(renewed))
+                            .values(
+                                expires_at=func.greatest(
+                                    Proxy.expires_at, now
+                                )
+                                + period,
+                                is_freeze=False,
+                                freeze_reason=None,
+                                state_version=Proxy.state_version
+                                + cast(Proxy.is_freeze, Integer),
+                                service_synced=or_(
+                                    Proxy.service_id.is_(None),
+                                    and_(
+                                        Proxy.service_synced,
+                                        Proxy.is_freeze.is_(False),
+                                    ),
+                                ),
+                            )
+                        )
+                    if unpaid and not frozen:
+                        await session.execute(
+                            update(Proxy)
+                            .where(Proxy.uuid.in_(unpaid))
+                            .values(
+                                is_freeze=True,
+                                freeze_reason=FREEZE_UNPAID,
+                                service_synced=Proxy.service_id.is_(None),
+                                state_version=Proxy.state_version + 1,
+                            )
+                        )
+                        stats.frozen = len(unpaid)
+                    stats.renewed = len(renewed)
+                    stats.charged = sum(charges.values(), Decimal(0))
+
+                for user_id in charges:
+                    self.user_cache.update(user_id, money=balances[user_id])
+                return stats
+            except SQLAlchemyError as e:
+                logger.error("Ошибка при продлении прокси: %s", e)
+
+    async def _charge(
+        self, session, charges: dict[int, Decimal], now: datetime
+    ) -> None:
+        """Списывает с пользователей суммы одним пакетным UPDATE."""
+        if not charges:
+            return
+        users = User.__table__
+        await session.execute(
+            update(users)
+            .where(users.c.id == bindparam("b_user_id"))
+            .values(money=users.c.money - bindparam("b_charge")),
+            [
+                {"b_user_id": user_id, "b_charge": charge}
+                for user_id, charge in charges.items()
+            ],
+        )
+        await session.execute(
+            insert(Bank).values(
+                [
+                    {
+                        "user_id": user_id,
+                        "date": now,
+                        "amount": -charge,
+                        "currency": "RUB",
+                    }
+                    for user_id, charge in charges.items()
+                ]
+            )
+        )
+        for user_id, charge in charges.items():
+            for statement in ledger_updates(user_id, -charge, "RUB", now):
+                await session.execute(statement)
+
+    async def next_expiry(self) -> datetime | None:
+        """Ближайшее время окончания среди активных прокси."""
+        async with self.session_maker() as session:
+            try:
+                return await session.scalar(
+                    select(func.min(Proxy.expires_at)).where(
+                        Proxy.expires_at.is_not(None),
+                        Proxy.is_freeze.is_(False),
+                    )
+                )
+            except SQLAlchemyError as e:
+                logger.error("Ошибка при получении времени продления: %s", e)
+
+    async def get_unsynced(
+        self, after: UUID | None = None, limit: int = 1000
+    ) -> list[Row]:
+        """Прокси, чьё состояние ещё не передано в Aeza (по uuid)."""
+        query = (
+            select(
+                Proxy.uuid,
+                Proxy.service_id,
+                Proxy.is_freeze,
+                Proxy.state_version,
+            )
+            .where(
+                Proxy.service_synced.is_(False),
+                Proxy.service_id.is_not(None),
+            )
+            .order_by(Proxy.uuid)
+            .limit(limit)
+        )
+        if after is not None:
+            query = query.where(Proxy.uuid > after)
+        async with self.session_maker() as session:
+            try:
+                result = await session.execute(query)
+                return list(result.all())
+            except SQLAlchemyError as e:
+                logger.error(
+                    "Ошибка при получении несинхронизированных прокси: %s", e
+                )
+                return []
+
+    async def mark_synced(self, versions: list[tuple[UUID, int]]) -> None:
+        """
+        Отмечает прокси синхронизированными, если их `state_version`
+        не изменился с момента постановки команды Aeza.
+        """
+        if not versions:
+            return
+        await self._update_versions(versions, service_synced=True)
+
+    async def resync(self, versions: list[tuple[UUID, int]]) -> None:
+        """
+        Увеличивает `state_version` прокси, команда Aeza для которых
+        не выполнилась: следующий цикл поставит её под новым ключом.
+        """
+        if not versions:
+            return
+        await self._update_versions(
+            versions, state_version=Proxy.state_version + 1
+        )
+
+    async def _update_versions(
+        self, versions: list[tuple[UUID, int]], **values: Any
+    ) -> None:
+        async with self.session_maker() as session:
+            try:
+                await session.execute(
+                    update(Proxy)
+                    .where(
+                        tuple_(Proxy.uuid, Proxy.state_version).in_(versions)
+                    )
+                    .values(**values)
+                )
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logger.error("Ошибка при отметке синхронизации прокси: %s", e)
 
 
 class JournalManager(BaseManager):
     """
     Менеджер для управления журналом событий.
+
+    После `start()` записи копятся в ограниченной очереди, а фоновая
+    задача сбрасывает их в базу многострочными INSERT по размеру пачки
+    или по таймеру. Если очередь заполнена, `add_journal_record` ждёт
+    освобождения места. Ошибка записи пачки (в том числе сетевая)
+    теряет только эту пачку; если фоновая задача всё же завершилась,
+    записи пишутся напрямую.
     """
 
+    def __init__(self, session_maker, user_cache: UserCache):
+        super().__init__(session_maker, user_cache)
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.batch_size = 500
+        self.flush_interval = 1.0
+
+    async def start(
+        self,
+        queue_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+    ) -> None:
+        """Запускает фоновую запись журнала."""
+        if self._task is not None:
+            return
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._task = asyncio.create_task(self._flusher())
+
+    async def stop(self) -> None:
+        """Дописывает все накопленные записи и останавливает запись."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        if not task.done():
+            await self._queue.put(None)
+        await asyncio.gather(task, return_exceptions=True)
+
     async def add_journal_record(self, action: str, description: str) -> None:
         """Добавляет запись в журнал (таблица journal)."""
+        record = {
+            "action": action,
+            "description": description,
+            "date": datetime.utcnow(),
+        }
+        if self._task is None or self._task.done():
+            await self._write([record])
+            return
+        await self._queue.put(record)
+
+    async def _flusher(self) -> None:
+        """Собирает записи в пачки и сбрасывает их в базу."""
+        loop = asyncio.get_running_loop()
+        while True:
+            record = await self._queue.get()
+            if record is None:
+                return
+            batch = [record]
+            deadline = loop.time() + self.flush_interval
+            stopping = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(
+                        self._queue.get(), timeout
+                    )
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            try:
+                await self._write(batch)
+            except Exception:
+                logger.exception("Ошибка при записи пачки журнала")
+            if stopping:
+                return
+
+    async def _write(self, records: list[dict]) -> None:
+        """Записывает пачку записей одним INSERT."""
         async with self.session_maker() as session:
             try:
-                record = Journal(action=action, description=description)
-                session.add(record)
+                await session.execute(insert(Journal).values(records))
                 await session.commit()
             except SQLAlchemyError as e:
                 await session.rollback()
-                print(f"Ошибка при добавлении записи в журнал: {e}")
+                logger.error("Ошибка при добавлении записи в журнал: %s", e)
 
 
 class BankManager(BaseManager):
@@ -160,62 +821,705 @@ class BankManager(BaseManager):
     Менеджер для управления банковскими операциями.
     """
 
-    async def add_bank_record(self, tg_id: int, amount: float) -> None:
+    async def add_bank_record(
+        self, tg_id: int, amount: Decimal, currency: str = "RUB"
+    ) -> None:
         """Добавляет запись о финансовой операции в таблицу bank."""
+        at = datetime.utcnow()
         async with self.session_maker() as session:
             try:
-                record = Bank(user_id=tg_id, amount=amount)
-                session.add(record)
+                async with session.begin():
+                    await session.execute(
+                        insert(Bank).values(
+                            user_id=tg_id,
+                            date=at,
+                            amount=amount,
+                            currency=currency,
+                        )
+                    )
+                    for statement in ledger_updates(
+                        tg_id, amount, currency, at
+                    ):
+                        await session.execute(statement)
+            except SQLAlchemyError as e:
+                logger.error("Ошибка при добавлении записи в банк: %s", e)
+
+    async def add_payment(
+        self, tg_id: int, amount: Decimal, currency: str = "RUB"
+    ) -> Decimal | None:
+        """
+        Проводит платёж: запись в bank и изменение баланса
+        в одной транзакции. Возвращает новый баланс.
+        """
+        at = datetime.utcnow()
+        async with self.session_maker() as session:
+            try:
+                async with session.begin():
+                    result = await session.execute(
+                        balance_update(tg_id, amount)
+                    )
+                    balance = result.scalar_one_or_none()
+                    if balance is None:
+                        return None
+                    await session.execute(
+                        insert(Bank).values(
+                            user_id=tg_id,
+                            date=at,
+                            amount=amount,
+                            currency=currency,
+                        )
+                    )
+                    for statement in ledger_updates(
+                        tg_id, amount, currency, at
+                    ):
+                        await session.execute(statement)
+                self.user_cache.update(tg_id, money=balance)
+                return balance
+            except SQLAlchemyError as e:
+                logger.error("Ошибка при проведении платежа: %s", e)
+
+    async def get_summary(
+        self, tg_id: int, currency: str = "RUB"
+    ) -> BankSummary | None:
+        """Итоги операций пользователя: одна строка вместо агрегации."""
+        async with self.session_maker() as session:
+            try:
+                return await session.get(BankSummary, (tg_id, currency))
+            except SQLAlchemyError as e:
+                logger.error("Ошибка при получении итогов банка: %s", e)
+
+    async def get_monthly(
+        self, tg_id: int, currency: str = "RUB", months: int = 12
+    ) -> list[BankMonthly]:
+        """Помесячные итоги пользователя, начиная с последнего месяца."""
+        async with self.session_maker() as session:
+            try:
+                result = await session.scalars(
+                    select(BankMonthly)
+                    .where(
+                        BankMonthly.user_id == tg_id,
+                        BankMonthly.currency == currency,
+                    )
+                    .order_by(BankMonthly.month.desc())
+                    .limit(months)
+                )
+                return list(result.all())
+            except SQLAlchemyError as e:
+                logger.error("Ошибка при получении помесячных итогов: %s", e)
+                return []
+
+    async def reconcile(
+        self, after_id: int | None = None, limit: int = 500, attempts: int = 3
+    ) -> tuple[int | None, list[int]] | None:
+        """
+        Сверяет итоги пачки пользователей (по id после `after_id`)
+        с таблицей bank и пересобирает расходящиеся.
+
+        Сверка идёт в одном снимке REPEATABLE READ, поэтому платежи,
+        проведённые во время сверки, не дают ложных расхождений. Если
+        платёж изменил те же итоги, Postgres отменяет транзакцию с
+        ошибкой сериализации — пачка сверяется заново, до `attempts` раз.
+        Возвращает последний проверенный id (None — пользователи
+        закончились) и id пользователей с исправленными итогами;
+        None вместо результата — пачку сверить не удалось.
+        """
+        for attempt in range(1, attempts + 1):
+            try:
+                return await self._reconcile_batch(after_id, limit)
+            except SQLAlchemyError as e:
+                sqlstate = getattr(getattr(e, "orig", None), "sqlstate", None)
+                if sqlstate in RETRYABLE_SQLSTATES and attempt < attempts:
+                    logger.warning(
+                        "Конфликт сериализации при сверке, повтор: %s", e
+                    )
+                    continue
+                logger.error("Ошибка при сверке итогов банка: %s", e)
+                return None
+
+    async def _reconcile_batch(
+        self, after_id: int | None, limit: int
+    ) -> tuple[int | None, list[int]]:
+        async with self.session_maker() as session:
+            async with session.begin():
+                await session.connection(
+                    execution_options={"isolation_level": "REPEATABLE READ"}
+                )
+                query = select(User.id).order_by(User.id).limit(limit)
+                if after_id is not None:
+                    query = query.where(User.id > after_id)
+                user_ids = list((await session.scalars(query)).all())
+                if not user_ids:
+                    return None, []
+
+                summaries, monthly = await self._ledger(session, user_ids)
+                stored_summaries = {
+                    (row.user_id, row.currency): (
+                        row.total_in,
+                        row.total_out,
+                        row.operations,
+                        row.last_topup_at,
+                        row.last_topup_amount,
+                    )
+                    for row in await session.scalars(
+                        select(BankSummary).where(
+                            BankSummary.user_id.in_(user_ids)
+                        )
+                    )
+                }
+                stored_monthly = {
+                    (row.user_id, row.currency, row.month): (
+                        row.total_in,
+                        row.total_out,
+                        row.operations,
+                    )
+                    for row in await session.scalars(
+                        select(BankMonthly).where(
+                            BankMonthly.user_id.in_(user_ids)
+                        )
+                    )
+                }
+
+                mismatched = {
+                    key[0]
+                    for expected, stored in (
+                        (summaries, stored_summaries),
+                        (monthly, stored_monthly),
+                    )
+                    for key in expected.keys() ^ stored.keys()
+                }
+                for expected, stored in (
+                    (summaries, stored_summaries),
+                    (monthly, stored_monthly),
+                ):
+                    for key in expected.keys() & stored.keys():
+                        if expected[key] != stored[key]:
+                            mismatched.add(key[0])
+
+                if mismatched:
+                    await self._rebuild(
+                        session, mismatched, summaries, monthly
+                    )
+            return user_ids[-1], sorted(mismatched)
+
+    async def _ledger(
+        self, session, user_ids: list[int]
+    ) -> tuple[dict, dict]:
+        """Итоги по таблице bank в том же виде, что и в bank_summary."""
+        by_currency = bank_currency()
+        topups = {
+            (user_id, currency): (at, amount)
+            for user_id, currency, at, amount in await session.execute(
+                select(Bank.user_id, by_currency, Bank.date, Bank.amount)
+                .where(Bank.user_id.in_(user_ids), Bank.amount > 0)
+                .distinct(Bank.user_id, by_currency)
+                .order_by(Bank.user_id, by_currency, Bank.date.desc())
+            )
+        }
+        summaries = {
+            (user_id, currency): (
+                total_in,
+                total_out,
+                operations,
+                *topups.get((user_id, currency), (None, None)),
+            )
+            for user_id, currency, total_in, total_out, operations in (
+                await session.execute(ledger_totals(user_ids))
+            )
+        }
+        monthly = {
+            (user_id, currency, month): (total_in, total_out, operations)
+            for user_id, currency, month, total_in, total_out, operations in (
+                await session.execute(ledger_totals(user_ids, monthly=True))
+            )
+        }
+        return summaries, monthly
+
+    async def _rebuild(
+        self,
+        session,
+        user_ids: set[int],
+        summaries: dict,
+        monthly: dict,
+    ) -> None:
+        """Перезаписывает итоги пользователей посчитанными по bank."""
+        now = datetime.utcnow()
+        await session.execute(
+            delete(BankSummary).where(BankSummary.user_id.in_(user_ids))
+        )
+        await session.execute(
+            delete(BankMonthly).where(BankMonthly.user_id.in_(user_ids))
+        )
+        summary_rows = [
+            {
+                "user_id": user_id,
+                "currency": currency,
+                "total_in": total_in,
+                "total_out": total_out,
+                "operations": operations,
+                "last_topup_at": last_topup_at,
+                "last_topup_amount": last_topup_amount,
+                "updated_at": now,
+            }
+            for (user_id, currency), (
+                total_in,
+                total_out,
+                operations,
+                last_topup_at,
+                last_topup_amount,
+            ) in summaries.items()
+            if user_id in user_ids
+        ]
+        monthly_rows = [
+            {
+                "user_id": user_id,
+                "currency": currency,
+                "month": month,
+                "total_in": total_in,
+                "total_out": total_out,
+                "operations": operations,
+            }
+            for (user_id, currency, month), (
+                total_in,
+                total_out,
+                operations,
+            ) in monthly.items()
+            if user_id in user_ids
+        ]
+        if summary_rows:
+            await session.execute(insert(BankSummary), summary_rows)
+        if monthly_rows:
+            await session.execute(insert(BankMonthly), monthly_rows)
+
+
+class BroadcastManager(BaseManager):
+    """
+    Менеджер для хранения состояния рассылок.
+    """
+
+    async def create(self, text: str) -> Broadcast | None:
+        """Создаёт новую рассылку."""
+        async with self.session_maker() as session:
+            try:
+                broadcast = Broadcast(text=text)
+                session.add(broadcast)
+                await session.commit()
+                return broadcast
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logger.error("Ошибка при создании рассылки: %s", e)
+
+    async def save_progress(
+        self,
+        broadcast_id: int,
+        last_user_id: int | None,
+        sent: int,
+        failed: int,
+        blocked: int,
+        status: str = "running",
+    ) -> None:
+        """Сохраняет прогресс рассылки."""
+        values = {
+            "last_user_id": last_user_id,
+            "sent": sent,
+            "failed": failed,
+            "blocked": blocked,
+            "status": status,
+        }
+        if status != "running":
+            values["finished_at"] = datetime.utcnow()
+        async with self.session_maker() as session:
+            try:
+                await session.execute(
+                    update(Broadcast)
+                    .where(Broadcast.id == broadcast_id)
+                    .values(**values)
+                )
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logger.error("Ошибка при сохранении прогресса рассылки: %s", e)
+
+    async def get_unfinished(self) -> list[Broadcast]:
+        """Выдает рассылки, прерванные до завершения."""
+        async with self.session_maker() as session:
+            result = await session.execute(
+                select(Broadcast)
+                .where(Broadcast.status == "running")
+                .order_by(Broadcast.id)
+            )
+            return list(result.scalars().all())
+
+
+class AezaServiceManager(BaseManager):
+    """
+    Менеджер локальной копии услуг Aeza.
+    """
+
+    async def get_all(self) -> list[AezaService]:
+        """Все сохранённые услуги."""
+        async with self.session_maker() as session:
+            try:
+                result = await session.scalars(select(AezaService))
+                return list(result.all())
+            except SQLAlchemyError as e:
+                logger.error("Ошибка при получении услуг Aeza: %s", e)
+                return []
+
+    async def apply_changes(
+        self, changed: list[dict], removed: list[int]
+    ) -> bool:
+        """
+        Записывает изменившиеся услуги одним многострочным upsert
+        и удаляет исчезнувшие, в одной транзакции.
+        """
+        if not changed and not removed:
+            return True
+        async with self.session_maker() as session:
+            try:
+                async with session.begin():
+                    if changed:
+                        query = pg_insert(AezaService).values(changed)
+                        await session.execute(
+                            query.on_conflict_do_update(
+                                index_elements=[AezaService.id],
+                                set_={
+                                    column: query.excluded[column]
+                                    for column in changed[0]
+                                    if column != "id"
+                                },
+                            )
+                        )
+                    if removed:
+                        await session.execute(
+                            delete(AezaService).where(
+                                AezaService.id.in_(removed)
+                            )
+                        )
+                return True
+            except SQLAlchemyError as e:
+                logger.error("Ошибка при сохранении услуг Aeza: %s", e)
+                return False
+
+
+class AezaCommandManager(BaseManager):
+    """
+    Менеджер очереди команд Aeza.
+
+    Команда берётся в работу с арендой до `locked_until`: если процесс
+    упадёт, после окончания аренды её заберёт другой воркер.
+    """
+
+    async def enqueue(
+        self, kind: str, payload: dict, idempotency_key: str
+    ) -> AezaCommand | None:
+        """
+        Ставит команду в очередь. Повтор с тем же ключом не создаёт
+        новую команду, а возвращает существующую.
+        """
+        now = datetime.utcnow()
+        query = (
+            pg_insert(AezaCommand)
+            .values(
+                idempotency_key=idempotency_key,
+                kind=kind,
+                payload=payload,
+                status="pending",
+                attempts=0,
+                next_attempt_at=now,
+                created_at=now,
+                updated_at=now,
+            )
+            .on_conflict_do_nothing(
+                index_elements=[AezaCommand.idempotency_key]
+            )
+            .returning(AezaCommand)
+        )
+        async with self.session_maker() as session:
+            try:
+                command = (await session.scalars(query)).one_or_none()
+                await session.commit()
+                if command is None:
+                    command = await session.scalar(
+                        select(AezaCommand).where(
+                            AezaCommand.idempotency_key == idempotency_key
+                        )
+                    )
+                return command
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logger.error("Ошибка при постановке команды Aeza: %s", e)
+
+    async def get_by_key(self, idempotency_key: str) -> AezaCommand | None:
+        """Команда по ключу идемпотентности."""
+        async with self.session_maker() as session:
+            try:
+                return await session.scalar(
+                    select(AezaCommand).where(
+                        AezaCommand.idempotency_key == idempotency_key
+                    )
+                )
+            except SQLAlchemyError as e:
+                logger.error("Ошибка при получении команды Aeza: %s", e)
+
+    async def get_by_keys(
+        self, idempotency_keys: list[str]
+    ) -> dict[str, AezaCommand]:
+        """Команды по ключам идемпотентности (ключ -> команда)."""
+        if not idempotency_keys:
+            return {}
+        async with self.session_maker() as session:
+            try:
+                commands = await session.scalars(
+                    select(AezaCommand).where(
+                        AezaCommand.idempotency_key.in_(idempotency_keys)
+                    )
+                )
+                return {
+                    command.idempotency_key: command for command in commands
+                }
+            except SQLAlchemyError as e:
+                logger.error("Ошибка при получении команд Aeza: %s", e)
+                return {}
+
+    async def claim(
+        self, limit: int, lease: timedelta
+    ) -> list[AezaCommand]:
+        """
+        Забирает в работу до `limit` готовых команд (и команд с
+        истёкшей арендой) через FOR UPDATE SKIP LOCKED.
+        """
+        now = datetime.utcnow()
+        due = (
+            select(AezaCommand.id)
+            .where(
+                or_(
+                    and_(
+                        AezaCommand.status == "pending",
+                        AezaCommand.next_attempt_at <= now,
+                    ),
+                    and_(
+                        AezaCommand.status == "running",
+                        AezaCommand.locked_until < now,
+                    ),
+                )
+            )
+            .order_by(AezaCommand.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        query = (
+            update(AezaCommand)
+            .where(AezaCommand.id.in_(due.scalar_subquery()))
+            .values(
+                status="running",
+                attempts=AezaCommand.attempts + 1,
+                locked_until=now + lease,
+                updated_at=now,
+            )
+            .returning(AezaCommand)
+            .execution_options(synchronize_session=False)
+        )
+        async with self.session_maker() as session:
+            try:
+                commands = list((await session.scalars(query)).all())
                 await session.commit()
+                return commands
             except SQLAlchemyError as e:
                 await session.rollback()
-                print(f"Ошибка при добавлении записи в банк: {e}")
+                logger.error("Ошибка при получении команд Aeza: %s", e)
+                return []
+
+    async def complete(self, command_id: int, result: Any) -> None:
+        """Команда выполнена."""
+        await self._update(
+            command_id, status="done", result=result, error=None
+        )
+
+    async def retry(
+        self, command_id: int, error: str, next_attempt_at: datetime
+    ) -> None:
+        """Возвращает команду в очередь до `next_attempt_at`."""
+        await self._update(
+            command_id,
+            status="pending",
+            error=error,
+            next_attempt_at=next_attempt_at,
+        )
+
+    async def fail(self, command_id: int, error: str) -> None:
+        """Команда окончательно не выполнена."""
+        await self._update(command_id, status="failed", error=error)
+
+    async def release(
+        self, command_id: int, next_attempt_at: datetime
+    ) -> None:
+        """Возвращает команду в очередь, не засчитывая попытку."""
+        await self._update(
+            command_id,
+            status="pending",
+            attempts=AezaCommand.attempts - 1,
+            next_attempt_at=next_attempt_at,
+        )
+
+    async def set_result(self, command_id: int, result: Any) -> bool:
+        """Сохраняет промежуточный результат, не снимая аренду."""
+        async with self.session_maker() as session:
+            try:
+                await session.execute(
+                    update(AezaCommand)
+                    .where(AezaCommand.id == command_id)
+                    .values(result=result, updated_at=datetime.utcnow())
+                )
+                await session.commit()
+                return True
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logger.error("Ошибка при обновлении команды Aeza: %s", e)
+                return False
+
+    async def _update(self, command_id: int, **values: Any) -> None:
+        async with self.session_maker() as session:
+            try:
+                await session.execute(
+                    update(AezaCommand)
+                    .where(AezaCommand.id == command_id)
+                    .values(
+                        locked_until=None,
+                        updated_at=datetime.utcnow(),
+                        **values,
+                    )
+                )
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logger.error("Ошибка при обновлении команды Aeza: %s", e)
 
 
 class AsyncORM:
     """
     Главный класс ORM, объединяющий управление пользователями,
-    прокси, журналом и банком.
+    прокси, журналом, банком, рассылками, копией услуг Aeza
+    и очередью команд Aeza.
     """
 
     _instance: "AsyncORM | None" = None
     _lock: asyncio.Lock
 
     _async_session: async_sessionmaker
-    _async_engine: AsyncEngine
+    _async_engine: AsyncEngine | None
+
+    user_cache: UserCache
 
     user: UserManager
     proxy: ProxyManager
     journal: JournalManager
     bank: BankManager
+    broadcast: BroadcastManager
+    aeza_service: AezaServiceManager
+    aeza_command: AezaCommandManager
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance._async_engine = create_async_engine(
-                url=settings.DB_URL, echo=False
-            )
+            # Движок создаётся в `start()`, здесь только фабрика сессий.
+            cls._instance._async_engine = None
             cls._instance._async_session = async_sessionmaker(
-                bind=cls._instance._async_engine, expire_on_commit=False
+                expire_on_commit=False
             )
 
+            cls._instance.user_cache = UserCache()
+
             # Создаем менеджеры
-            cls._instance.user = UserManager(cls._instance._async_session)
-            cls._instance.proxy = ProxyManager(cls._instance._async_session)
-            cls._instance.journal = JournalManager(
-                cls._instance._async_session
+            session_maker = cls._instance._async_session
+            user_cache = cls._instance.user_cache
+            cls._instance.user = UserManager(session_maker, user_cache)
+            cls._instance.proxy = ProxyManager(session_maker, user_cache)
+            cls._instance.journal = JournalManager(session_maker, user_cache)
+            cls._instance.bank = BankManager(session_maker, user_cache)
+            cls._instance.broadcast = BroadcastManager(
+                session_maker, user_cache
+            )
+            cls._instance.aeza_service = AezaServiceManager(
+                session_maker, user_cache
             )
-            cls._instance.bank = BankManager(cls._instance._async_session)
+            cls._instance.aeza_command = AezaCommandManager(
+                session_maker, user_cache
+            )
+            registry.add_collector(collect_pool(cls._instance.pool_stats))
         return cls._instance
 
-    async def create_tables(self) -> None:
-        """Создает все таблицы в базе данных."""
-        async with self._async_engine.begin() as connection:
-            await connection.run_sync(Base.metadata.create_all)
+    async def start(self, settings: Settings | None = None) -> None:
+        """Создаёт движок и пул соединений."""
+        if self._async_engine is not None:
+            return
+        settings = settings or get_settings()
+        self._async_engine = create_async_engine(
+            url=settings.DB_URL,
+            echo=False,
+            poolclass=InstrumentedPool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            connect_args={
+                "prepared_statement_cache_size": (
+                    settings.DB_STATEMENT_CACHE_SIZE
+                ),
+            },
+        )
+        instrument_engine(
+            self._async_engine, settings.DB_SLOW_QUERY_THRESHOLD
+        )
+        self._async_session.configure(bind=self._async_engine)
+        self.user_cache.configure(
+            maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL
+        )
+        await self.journal.start(
+            queue_size=settings.JOURNAL_QUEUE_SIZE,
+            batch_size=settings.JOURNAL_BATCH_SIZE,
+            flush_interval=settings.JOURNAL_FLUSH_INTERVAL,
+        )
+
+    async def stop(self) -> None:
+        """Дописывает журнал и закрывает все соединения пула."""
+        if self._async_engine is None:
+            return
+        await self.journal.stop()
+        await self._async_engine.dispose()
+        self._async_engine = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        """Движок базы; доступен после `start()`."""
+        if self._async_engine is None:
+            raise RuntimeError("AsyncORM is not started")
+        return self._async_engine
+
+    def pool_stats(self) -> dict:
+        """Статистика пула: размер, занятые соединения, ожидания."""
+        if self._async_engine is None:
+            return {}
+        return self._async_engine.pool.snapshot()
+
+    async def migrate(
+        self, revision: str = "head", url: str | None = None
+    ) -> None:
+        """
+        Применяет миграции Alembic из каталога migrations
+        (к базе `url`, если она задана, иначе к базе из настроек).
+        """
+        from alembic import command
+        from alembic.config import Config
+
+        config = Config("alembic.ini")
+        if url is not None:
+            config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+        await asyncio.to_thread(command.upgrade, config, revision)
 
     async def drop_tables(self) -> None:
         """Удаляет все таблицы из базы данных."""
-        async with self._async_engine.begin() as connection:
+        async with self.engine.begin() as connection:
             await connection.run_sync(Base.metadata.drop_all)
 
 
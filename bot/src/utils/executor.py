@@ -0,0 +1,101 @@
+import asyncio
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Callable, TypeVar
+
+from .metrics import EXECUTOR_DURATION, EXECUTOR_QUEUE_DEPTH, EXECUTOR_WAIT
+
+T = TypeVar("T")
+
+
+def _timed(func: Callable[..., T], args: tuple, kwargs: dict):
+    """Выполняется в пуле: возвращает время начала, конца и результат."""
+    started = time.monotonic()
+    result = func(*args, **kwargs)
+    return started, time.monotonic(), result
+
+
+class BoundedExecutor:
+    """
+    Пул потоков (или процессов) ограниченного размера с async-API.
+
+    Одновременно в пуле не больше `max_queue` заданий (ожидающих
+    и выполняемых); следующий `run` ждёт освобождения места, а не
+    копит задания в очереди пула без ограничений. Глубина очереди,
+    ожидание свободного исполнителя и время выполнения попадают
+    в метрики с меткой `pool`.
+
+    Для пула процессов функция и аргументы должны сериализоваться
+    через pickle.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int = 4,
+        max_queue: int = 256,
+        processes: bool = False,
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor: Executor = (
+            ProcessPoolExecutor(max_workers=max_workers)
+            if processes
+            else ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=name
+            )
+        )
+        self._slots = asyncio.Semaphore(max_queue)
+        self.depth = 0
+
+    async def run(self, func: Callable[..., T], /, *args, **kwargs) -> T:
+        """Выполняет `func(*args, **kwargs)` в пуле и возвращает результат."""
+        async with self._slots:
+            self.depth += 1
+            EXECUTOR_QUEUE_DEPTH.set(self.depth, pool=self.name)
+            submitted = time.monotonic()
+            try:
+                started, finished, result = (
+                    await asyncio.get_running_loop().run_in_executor(
+                        self._executor, _timed, func, args, kwargs
+                    )
+                )
+            finally:
+                self.depth -= 1
+                EXECUTOR_QUEUE_DEPTH.set(self.depth, pool=self.name)
+        EXECUTOR_WAIT.observe(max(0.0, started - submitted), pool=self.name)
+        EXECUTOR_DURATION.observe(finished - started, pool=self.name)
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class Executors:
+    """
+    Пулы бота:
+    - `crypto` — вывод паролей серверов через scrypt (CPU);
+    - `blocking` — блокирующий ввод-вывод (сжатие архивов журнала).
+    """
+
+    def __init__(
+        self,
+        crypto_workers: int = 2,
+        blocking_workers: int = 8,
+        max_queue: int = 256,
+        crypto_processes: bool = False,
+    ):
+        self.crypto = BoundedExecutor(
+            "crypto", crypto_workers, max_queue, processes=crypto_processes
+        )
+        self.blocking = BoundedExecutor(
+            "blocking", blocking_workers, max_queue
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.crypto.shutdown(wait)
+        self.blocking.shutdown(wait)
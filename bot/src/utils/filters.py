@@ -0,0 +1,19 @@
+from aiogram.filters import BaseFilter
+from aiogram.types import CallbackQuery, Message
+
+from .config import Settings
+
+
+class IsAdmin(BaseFilter):
+    """
+    Пропускает только пользователей из ADMIN_IDS. Настройки приходят
+    из данных диспетчера (`settings`), а не из глобального кэша.
+    """
+
+    async def __call__(
+        self, event: Message | CallbackQuery, settings: Settings
+    ) -> bool:
+        return (
+            event.from_user is not None
+            and event.from_user.id in settings.ADMIN_IDS
+        )
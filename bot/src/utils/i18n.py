@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from fluentogram import TranslatorHub, TranslatorRunner
+
+logger = logging.getLogger(__name__)
+
+# Локали Fluent для каталогов src/i18n/<locale>.
+FLUENT_LOCALES = {"ru": "ru-RU"}
+
+
+class CachedTranslatorRunner:
+    """
+    Обёртка над `TranslatorRunner` с тем же синтаксисом вызова
+    (`locale.welcome_text()`), которая запоминает сообщения без
+    аргументов: повторный вызов не рендерит их заново.
+    """
+
+    separator = "-"
+
+    def __init__(self, runner: "TranslatorRunner"):
+        self._runner = runner
+        self._static: Dict[str, str] = {}
+
+    def get(self, key: str, **kwargs: Any) -> str:
+        if kwargs:
+            return self._runner.get(key, **kwargs)
+        text = self._static.get(key)
+        if text is None:
+            text = self._static[key] = self._runner.get(key)
+        return text
+
+    def __getattr__(self, item: str) -> "_MessageKey":
+        return _MessageKey(self, item)
+
+
+class _MessageKey:
+    __slots__ = ("_translator", "_key")
+
+    def __init__(self, translator: CachedTranslatorRunner, key: str):
+        self._translator = translator
+        self._key = key
+
+    def __getattr__(self, item: str) -> "_MessageKey":
+        return _MessageKey(
+            self._translator, f"{self._key}{self._translator.separator}{item}"
+        )
+
+    def __call__(self, **kwargs: Any) -> str:
+        return self._translator.get(self._key, **kwargs)
+
+
+class Translations:
+    """
+    Переводы бота.
+
+    Каждая локаль (подкаталог `root`) компилируется один раз из всех
+    своих `.ftl` файлов, `TranslatorRunner` на локаль создаётся один
+    раз и переиспользуется. `watch` перечитывает файлы при изменении.
+    """
+
+    def __init__(self, root: str = "src/i18n", root_locale: str = "ru"):
+        self.root = Path(root)
+        self.root_locale = root_locale
+        self._hub: Optional["TranslatorHub"] = None
+        self._locales: set[str] = set()
+        self._runners: Dict[str, CachedTranslatorRunner] = {}
+        self._mtimes: Dict[Path, float] = {}
+
+    def _sources(self) -> Dict[str, list[Path]]:
+        """Файлы .ftl по локалям, без повторов."""
+        sources = {}
+        for locale_dir in sorted(self.root.iterdir()):
+            if locale_dir.is_dir():
+                files = sorted({p.resolve() for p in locale_dir.glob("*.ftl")})
+                if files:
+                    sources[locale_dir.name] = files
+        return sources
+
+    def load(self) -> None:
+        """Компилирует все локали и сбрасывает кэши."""
+        # Компилятор Fluent тяжёлый, импортируем его только при загрузке.
+        from fluent_compiler.bundle import FluentBundle
+        from fluentogram import FluentTranslator, TranslatorHub
+
+        sources = self._sources()
+        translators = [
+            FluentTranslator(
+                locale,
+                translator=FluentBundle.from_files(
+                    FLUENT_LOCALES.get(locale, locale),
+                    filenames=[str(path) for path in files],
+                ),
+            )
+            for locale, files in sources.items()
+        ]
+        self._hub = TranslatorHub(
+            {
+                locale: tuple(dict.fromkeys((locale, self.root_locale)))
+                for locale in sources
+            },
+            translators=translators,
+            root_locale=self.root_locale,
+        )
+        self._locales = set(sources)
+        self._runners = {}
+        self._mtimes = {
+            path: path.stat().st_mtime
+            for files in sources.values()
+            for path in files
+        }
+
+    def get(self, locale: Optional[str]) -> CachedTranslatorRunner:
+        """Переводчик для локали (для неизвестной — корневой)."""
+        if locale not in self._locales:
+            locale = self.root_locale
+        runner = self._runners.get(locale)
+        if runner is None:
+            runner = CachedTranslatorRunner(
+                self._hub.get_translator_by_locale(locale)
+            )
+            self._runners[locale] = runner
+        return runner
+
+    def _changed(self) -> bool:
+        current = {
+            path: path.stat().st_mtime
+            for files in self._sources().values()
+            for path in files
+        }
+        return current != self._mtimes
+
+    async def watch(self, interval: float = 2.0) -> None:
+        """Перезагружает переводы при изменении .ftl файлов."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self._changed():
+                    self.load()
+                    logger.info("Translations reloaded")
+            except Exception:
+                logger.exception("Failed to reload translations")
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from .commands import FINAL_STATUSES, CommandQueue
+from .db import AsyncORM, RenewalStats
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyLifecycle:
+    """
+    Планировщик жизненного цикла прокси.
+
+    Каждый цикл:
+    - продлевает истёкшие прокси пачками по `batch_size`, списывая
+      оплату с баланса, а неоплаченные замораживает;
+    - размораживает замороженные прокси, если баланса уже хватает;
+    - ставит остановку или запуск сервера в очередь команд Aeza.
+
+    Всё состояние хранится в базе: изменение `is_freeze` сбрасывает
+    `service_synced` и увеличивает `state_version`, а ключ команды
+    строится из uuid и версии. Флаг ставится обратно, когда команда
+    этой версии выполнена; проваленная команда повторяется под новой
+    версией. Поэтому после перезапуска планировщик просто продолжает
+    с того места, где остановился, и не ставит команду дважды.
+    """
+
+    def __init__(
+        self,
+        db: AsyncORM,
+        commands: CommandQueue,
+        period: timedelta = timedelta(days=30),
+        batch_size: int = 1000,
+        interval: float = 60.0,
+    ):
+        self.db = db
+        self.commands = commands
+        self.period = period
+        self.batch_size = batch_size
+        self.interval = interval
+
+    async def run(self) -> None:
+        """Выполняет циклы до отмены задачи."""
+        while True:
+            try:
+                await self.cycle()
+            except Exception:
+                logger.exception("Proxy lifecycle cycle failed")
+            await asyncio.sleep(await self._delay())
+
+    async def cycle(self) -> RenewalStats:
+        """Один цикл: продление, разморозка и синхронизация с Aeza."""
+        now = datetime.utcnow()
+        total = RenewalStats()
+        for frozen in (False, True):
+            while True:
+                stats = await self.db.proxy.renew_due(
+                    now, self.period, self.batch_size, frozen=frozen
+                )
+                if stats is None:
+                    break
+                total.due += stats.due
+                total.renewed += stats.renewed
+                total.frozen += stats.frozen
+                total.charged += stats.charged
+                if stats.due < self.batch_size:
+                    break
+        if total.due:
+            logger.info(
+                "Proxies renewed: %d, frozen: %d, charged: %s",
+                total.renewed,
+                total.frozen,
+                total.charged,
+            )
+        await self.sync_services()
+        return total
+
+    async def sync_services(self) -> None:
+        """Ставит в очередь команды для всех несинхронизированных прокси."""
+        after: UUID | None = None
+        while True:
+            rows = await self.db.proxy.get_unsynced(after, self.batch_size)
+            if not rows:
+                return
+            after = rows[-1].uuid
+            await self._sync_batch(rows)
+            if len(rows) < self.batch_size:
+                return
+
+    async def _sync_batch(self, rows: list) -> None:
+        commands = await self.commands.get_many(
+            [
+                self.sync_key(row.uuid, version)
+                for row in rows
+                for version in (row.state_version, row.state_version - 1)
+            ]
+        )
+        synced, failed = [], []
+        for row in rows:
+            version = (row.uuid, row.state_version)
+            command = commands.get(self.sync_key(*version))
+            if command is None:
+                previous = commands.get(
+                    self.sync_key(row.uuid, row.state_version - 1)
+                )
+                # Команда прошлой версии ещё в очереди: новая подождёт
+                # её, иначе stop и start могут выполниться не по порядку.
+                if previous is None or previous.status in FINAL_STATUSES:
+                    await self.commands.control(
+                        self.sync_key(*version),
+                        row.service_id,
+                        "stop" if row.is_freeze else "start",
+                    )
+            elif command.status == "done":
+                synced.append(version)
+            elif command.status == "failed":
+                logger.warning(
+                    "Aeza service %s sync failed: %s",
+                    row.service_id,
+                    command.error,
+                )
+                failed.append(version)
+        await self.db.proxy.mark_synced(synced)
+        await self.db.proxy.resync(failed)
+
+    @staticmethod
+    def sync_key(proxy_uuid: UUID, version: int) -> str:
+        """Ключ идемпотентности команды для версии состояния прокси."""
+        return f"proxy-sync:{proxy_uuid}:{version}"
+
+    async def _delay(self) -> float:
+        """Пауза до ближайшего продления, но не больше `interval`."""
+        next_expiry = await self.db.proxy.next_expiry()
+        if next_expiry is None:
+            return self.interval
+        delay = (next_expiry - datetime.utcnow()).total_seconds()
+        return min(max(delay, 1.0), self.interval)
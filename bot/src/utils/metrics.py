@@ -0,0 +1,389 @@
+import asyncio
+import bisect
+import logging
+import re
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional
+
+from aiohttp import web
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def _format_labels(pairs: Iterable[tuple[str, str]]) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """Базовая метрика с именованными метками."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labels)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self._samples()
+
+    def _samples(self) -> Iterator[str]:
+        return iter(())
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            labels = _format_labels(zip(self.labelnames, key))
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels=(),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Для каждой серии: [счётчики по корзинам (+Inf последней), сумма].
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def total_count(self) -> int:
+        """Число наблюдений по всем сериям."""
+        return sum(sum(counts) for counts, _ in self._series.values())
+
+    def _samples(self) -> Iterator[str]:
+        bounds = (*self.buckets, float("inf"))
+        for key, (counts, total) in self._series.items():
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels([*pairs, ("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(pairs)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """
+    Набор метрик процесса с выводом в текстовом формате Prometheus.
+
+    Коллекторы вызываются перед каждой выгрузкой и обновляют метрики,
+    которые дешевле снять по запросу (например, состояние пула).
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels=()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels=(),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception:
+                logger.exception("Metrics collector failed")
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HANDLER_LATENCY = registry.histogram(
+    "bot_handler_duration_seconds",
+    "Time spent in aiogram handlers.",
+    ("handler", "event"),
+)
+HANDLER_ERRORS = registry.counter(
+    "bot_handler_errors_total",
+    "Exceptions raised by aiogram handlers.",
+    ("handler", "event"),
+)
+MIDDLEWARE_LATENCY = registry.histogram(
+    "bot_middleware_duration_seconds",
+    "Own time of aiogram middlewares, excluding the rest of the chain.",
+    ("middleware", "event"),
+)
+DB_QUERY_LATENCY = registry.histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time.",
+    ("operation",),
+)
+DB_QUERY_ERRORS = registry.counter(
+    "db_query_errors_total",
+    "SQL statements that raised an error.",
+    ("operation",),
+)
+DB_SLOW_QUERIES = registry.counter(
+    "db_slow_queries_total",
+    "SQL statements slower than the slow query threshold.",
+    ("operation",),
+)
+DB_POOL = registry.gauge(
+    "db_pool",
+    "Connection pool state and checkout statistics.",
+    ("stat",),
+)
+AEZA_LATENCY = registry.histogram(
+    "aeza_request_duration_seconds",
+    "Aeza API request time.",
+    ("method", "endpoint"),
+)
+AEZA_ERRORS = registry.counter(
+    "aeza_request_errors_total",
+    "Failed Aeza API requests.",
+    ("method", "endpoint", "reason"),
+)
+LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay of event loop callbacks beyond their scheduled time.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+UPDATES_PENDING = registry.gauge(
+    "bot_updates_pending",
+    "Updates accepted by the scheduler and not yet processed.",
+)
+UPDATES_DROPPED = registry.counter(
+    "bot_updates_dropped_total",
+    "Updates dropped because the user's queue was full.",
+)
+UPDATE_QUEUE_WAIT = registry.histogram(
+    "bot_update_queue_wait_seconds",
+    "Time an update waited in the scheduler before processing.",
+)
+EXECUTOR_QUEUE_DEPTH = registry.gauge(
+    "executor_queue_depth",
+    "Jobs submitted to an executor pool and not finished yet.",
+    ("pool",),
+)
+EXECUTOR_WAIT = registry.histogram(
+    "executor_wait_seconds",
+    "Time a job waited for a free worker.",
+    ("pool",),
+)
+EXECUTOR_DURATION = registry.histogram(
+    "executor_job_duration_seconds",
+    "Time a job ran in an executor pool.",
+    ("pool",),
+)
+AEZA_COMMANDS = registry.counter(
+    "aeza_commands_total",
+    "Aeza command attempts by outcome.",
+    ("kind", "outcome"),
+)
+AEZA_BREAKER_STATE = registry.gauge(
+    "aeza_circuit_breaker_state",
+    "Aeza circuit breaker state: 0 closed, 1 half-open, 2 open.",
+)
+
+ENDPOINT_ID = re.compile(r"/\d+(?=/|$)")
+
+
+def normalize_endpoint(endpoint: str) -> str:
+    """`/services/123/ctl` -> `/services/{id}/ctl`, чтобы не плодить серии."""
+    return ENDPOINT_ID.sub("/{id}", endpoint.split("?", 1)[0])
+
+
+def _operation(statement: str) -> str:
+    words = statement.split(None, 1)
+    return words[0].upper() if words else "OTHER"
+
+
+def instrument_engine(
+    engine: AsyncEngine, slow_query_threshold: float = 0.2
+) -> None:
+    """
+    Замеряет время каждого SQL-запроса через события движка и пишет
+    в лог запросы дольше `slow_query_threshold` секунд.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(
+        connection, cursor, statement, parameters, context, executemany
+    ):
+        connection.info.setdefault("query_started", []).append(
+            time.perf_counter()
+        )
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(
+        connection, cursor, statement, parameters, context, executemany
+    ):
+        elapsed = time.perf_counter() - connection.info["query_started"].pop()
+        operation = _operation(statement)
+        DB_QUERY_LATENCY.observe(elapsed, operation=operation)
+        if elapsed >= slow_query_threshold:
+            DB_SLOW_QUERIES.inc(operation=operation)
+            logger.warning(
+                "Slow query (%.3f s): %s", elapsed, statement[:2000]
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        connection = context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+        DB_QUERY_ERRORS.inc(operation=_operation(context.statement or ""))
+
+
+def collect_pool(snapshot: Callable[[], dict]) -> Callable[[], None]:
+    """Коллектор, переносящий статистику пула в метрику `db_pool`."""
+
+    def collect() -> None:
+        for stat, value in snapshot().items():
+            DB_POOL.set(value, stat=stat)
+
+    return collect
+
+
+async def monitor_loop_lag(interval: float = 0.5) -> None:
+    """Измеряет, насколько позже запланированного просыпается цикл."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(0.0, loop.time() - started - interval))
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(
+        body=registry.render().encode(),
+        headers={"Content-Type": CONTENT_TYPE},
+    )
+
+
+class MetricsServer:
+    """Отдельный aiohttp-сервер с `GET /metrics` (по умолчанию localhost)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9100):
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", metrics_handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info("Metrics are served on %s:%s", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
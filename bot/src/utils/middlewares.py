@@ -1,25 +1,31 @@
 import logging
-from typing import Any, Awaitable, Callable, Dict
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import Update
 from cachetools import TTLCache
-from fluentogram import TranslatorHub
 from src.utils.db import AsyncORM
-
-# from src.models.user import User
-
+from src.utils.i18n import Translations
+from src.utils.metrics import (
+    HANDLER_ERRORS,
+    HANDLER_LATENCY,
+    MIDDLEWARE_LATENCY,
+)
+from src.utils.ratelimit import RateLimiter
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
-caches = {"default": TTLCache(maxsize=10_000, ttl=0.1)}
-
 
 class TranslateMiddleware(BaseMiddleware):
     """
     Fluentogram translation middleware
+
+    Переводчики берутся из `Translations`, где они скомпилированы
+    и закэшированы по локалям.
     """
 
     async def __call__(
@@ -28,11 +34,12 @@ class TranslateMiddleware(BaseMiddleware):
         event: Update,
         data: Dict[str, Any],
     ) -> Any:
-        language = data["user"].language_code if "user" in data else "ru"
+        from_user = data.get("event_from_user")
+        language = (from_user and from_user.language_code) or "ru"
 
-        hub: TranslatorHub = data.get("t_hub")
+        translations: Translations = data["translations"]
 
-        data["locale"] = hub.get_translator_by_locale(language)
+        data["locale"] = translations.get(language)
 
         return await handler(event, data)
 
@@ -40,6 +47,9 @@ class TranslateMiddleware(BaseMiddleware):
 class DataBaseMiddleware(BaseMiddleware):
     """
     Data base middleware
+
+    Кладёт в data `db` и строку `User` текущего пользователя (`user`),
+    которая берётся из кэша без запроса к базе.
     """
 
     def __init__(self, db: AsyncORM):
@@ -53,14 +63,36 @@ class DataBaseMiddleware(BaseMiddleware):
         data: Dict[str, Any],
     ) -> Any:
         data["db"] = self.db
+
+        from_user = data.get("event_from_user")
+        if from_user is not None:
+            data["user"] = await self.db.user.get_user(from_user.id)
+
         return await handler(event, data)
 
 
 class ThrottlingMiddleware(BaseMiddleware):
     """
     Throttling middleware
+
+    Ограничивает частоту событий двумя token bucket'ами: общим на
+    пользователя (`user_rate`/`user_burst`, None — без общего лимита)
+    и на пару (пользователь, хендлер). Параметры второго можно
+    переопределить флагом хендлера:
+    `flags={"rate_limit": {"key": ..., "rate": ..., "burst": ...}}`.
     """
 
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        user_rate: Optional[float] = None,
+        user_burst: Optional[float] = None,
+    ):
+        super().__init__()
+        self.limiter = limiter
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+
     async def __call__(
         self,
         handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
@@ -70,58 +102,148 @@ class ThrottlingMiddleware(BaseMiddleware):
         if not hasattr(event, "from_user") or event.from_user is None:
             return await handler(event, data)
 
-        if event.from_user.id in caches["default"]:
+        user_id = event.from_user.id
+        if self.user_rate is not None and not await self.limiter.hit(
+            f"user:{user_id}", rate=self.user_rate, burst=self.user_burst
+        ):
+            return
+
+        options = get_flag(data, "rate_limit") or {}
+        scope = options.get("key") or self._handler_key(data)
+        allowed = await self.limiter.hit(
+            f"{scope}:{user_id}",
+            rate=options.get("rate"),
+            burst=options.get("burst"),
+        )
+        if not allowed:
             return
-        caches["default"][event.from_user.id] = None
         return await handler(event, data)
 
+    @staticmethod
+    def _handler_key(data: Dict[str, Any]) -> str:
+        """Стабильный между воркерами ключ хендлера."""
+        handler_object = data.get("handler")
+        if handler_object is None:
+            return "default"
+        callback = handler_object.callback
+        code = getattr(callback, "__code__", None)
+        line = code.co_firstlineno if code is not None else 0
+        return f"{callback.__module__}:{callback.__qualname__}:{line}"
 
-# class UserMiddleware(BaseMiddleware):
-#     """
-#     Automatic user insert to db
-#     """
 
-#     async def __call__(
-#         self,
-#         handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
-#         event: Update,
-#         data: Dict[str, Any],
-#     ) -> Any:
-#         if not hasattr(event, "from_user") or event.from_user is None:
-#             return await handler(event, data)
-
-#         user = await data["db"].users.find_one(f={"id": event.from_user.id})
-
-#         if isinstance(event, Message):
-#             if user is None:
-#                 new_user = event.from_user.model_dump()
-#                 new_user["created_at"] = int(time.time())
-#                 new_user["updated_at"] = int(time.time())
-
-#                 if event.text and "rl" in event.text:
-#                     try:
-#                         new_user["refer_id"] = int(
-#                             event.text.replace("rl", "")
-#                         )
-#                     except ValueError:
-#                         pass
-
-#                 user = User(**new_user)
-#                 await data["db"].users.insert_one(user.model_dump())
-#             elif user.blocked_at is not None:
-#                 await data["db"].users.update_one(
-#                     {"chat_id": event.from_user.id},
-#                     {"$set": {"blocked_at": None}},
-#                 )
-
-#             if user.updated_at < time.time() - 300:
-#                 await data["db"].users.update_one(
-#                     {"chat_id": event.from_user.id},
-#                     {"$set": event.from_user.model_dump()},
-#                 )
-
-#         data["user"] = user
-#         return await handler(event, data)
+class UserMiddleware(BaseMiddleware):
+    """
+    Automatic user insert to db
+
+    Пользователи, которые уже писали боту в последние `seen_ttl` секунд,
+    пропускаются без обращения к базе. Остальные регистрируются одним
+    upsert, имя обновляется не чаще раза в `refresh_after` секунд.
+    Пользователь считается зарегистрированным, только если upsert
+    удался: после ошибки базы попытка повторится со следующим событием.
+    """
+
+    def __init__(
+        self,
+        db: AsyncORM,
+        refresh_after: float = 300,
+        seen_ttl: float = 60,
+        seen_size: int = 100_000,
+    ):
+        super().__init__()
+        self.db = db
+        self.refresh_after = refresh_after
+        self.seen = TTLCache(maxsize=seen_size, ttl=seen_ttl)
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        from_user = data.get("event_from_user")
+        if from_user is None or from_user.id in self.seen:
+            return await handler(event, data)
+
+        if await self.db.user.register_user(
+            from_user.id, from_user.full_name, self.refresh_after
+        ):
+            self.seen[from_user.id] = None
+        return await handler(event, data)
+
+
+class TimedMiddleware(BaseMiddleware):
+    """
+    Timed middleware
+
+    Обёртка над middleware, записывающая в метрики его собственное
+    время: время остальной цепочки (следующих middleware и хендлера)
+    из замера вычитается.
+    """
+
+    def __init__(self, middleware: BaseMiddleware):
+        super().__init__()
+        self.middleware = middleware
+        self.name = type(middleware).__name__
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        downstream = 0.0
+
+        async def timed_handler(event: Update, data: Dict[str, Any]) -> Any:
+            nonlocal downstream
+            started = time.perf_counter()
+            try:
+                return await handler(event, data)
+            finally:
+                downstream += time.perf_counter() - started
+
+        started = time.perf_counter()
+        try:
+            return await self.middleware(timed_handler, event, data)
+        finally:
+            MIDDLEWARE_LATENCY.observe(
+                time.perf_counter() - started - downstream,
+                middleware=self.name,
+                event=type(event).__name__,
+            )
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Handler metrics middleware
+
+    Внутренний middleware, регистрируется последним: замеряет время
+    и ошибки самого хендлера.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        labels = {
+            "handler": (
+                f"{callback.__module__}.{callback.__qualname__}"
+                if callback is not None
+                else "unknown"
+            ),
+            "event": type(event).__name__,
+        }
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(**labels)
+            raise
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - started, **labels)
 
 
 # class AlbumMiddleware(BaseMiddleware):
@@ -0,0 +1,227 @@
+import asyncio
+import gzip
+import logging
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy import text
+
+from .db import AsyncORM
+from .executor import BoundedExecutor
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("journal", "bank")
+PARTITION_NAME = re.compile(
+    r"^(?P<table>\w+)_y(?P<year>\d{4})m(?P<month>\d{2})$"
+)
+
+
+def month_start(value: date, shift: int = 0) -> date:
+    """Первое число месяца, сдвинутого на `shift` месяцев от `value`."""
+    index = value.year * 12 + value.month - 1 + shift
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def is_partition(name: str) -> bool:
+    """Секция journal или bank: помесячная или DEFAULT."""
+    return bool(PARTITION_NAME.match(name)) or name in {
+        default_partition_name(table) for table in PARTITIONED_TABLES
+    }
+
+
+class PartitionManager:
+    """
+    Обслуживание помесячных секций таблиц journal и bank.
+
+    - Создаёт секции на `months_ahead` месяцев вперёд. Строки, для
+      месяца которых секции нет, попадают в DEFAULT-секцию (её создаёт
+      миграция), а не теряются с ошибкой; при создании секции месяца
+      его строки переносятся из DEFAULT в неё.
+    - Секции журнала старше `journal_retention_months` выгружает
+      в `archive_dir` (CSV, сжатый gzip), затем отсоединяет и удаляет.
+      Выгрузка идёт до удаления, поэтому повторный запуск после сбоя
+      просто перезапишет архив. Сжатие и запись файла выполняются
+      в `executor`, чтобы не блокировать цикл событий.
+    """
+
+    TABLES = PARTITIONED_TABLES
+
+    def __init__(
+        self,
+        db: AsyncORM,
+        months_ahead: int = 3,
+        journal_retention_months: int = 12,
+        archive_dir: str = "archive",
+        executor: Optional[BoundedExecutor] = None,
+    ):
+        self.db = db
+        self.executor = executor
+        self.months_ahead = months_ahead
+        self.journal_retention_months = journal_retention_months
+        self.archive_dir = Path(archive_dir)
+
+    async def ensure_partitions(self) -> None:
+        """
+        Создаёт недостающие секции на текущий и следующие месяцы, а
+        также на месяцы строк, попавших в DEFAULT-секцию.
+        """
+        current = month_start(datetime.utcnow().date())
+        ahead = {
+            month_start(current, shift)
+            for shift in range(self.months_ahead + 1)
+        }
+        for table in self.TABLES:
+            existing = set((await self._partitions(table)).values())
+            months = ahead | await self._default_months(table)
+            for month in sorted(months - existing):
+                await self._create_partition(table, month)
+
+    async def _default_months(self, table: str) -> set[date]:
+        """Месяцы строк в DEFAULT-секции (обычно она пуста)."""
+        async with self.db.engine.connect() as connection:
+            result = await connection.execute(
+                text(
+                    "SELECT DISTINCT date_trunc('month', date)::date "
+                    f"FROM {default_partition_name(table)}"
+                )
+            )
+            return {month for (month,) in result}
+
+    async def _create_partition(self, table: str, start: date) -> None:
+        """
+        Создаёт секцию месяца, перенося в неё строки этого месяца из
+        DEFAULT-секции: иначе Postgres не даст добавить секцию, чей
+        диапазон пересекается со строками DEFAULT.
+        """
+        name = partition_name(table, start)
+        default = default_partition_name(table)
+        end = month_start(start, 1)
+        async with self.db.engine.begin() as connection:
+            # Новые строки не попадут в DEFAULT, пока секция создаётся,
+            # а параллельный процесс дождётся и увидит готовую секцию.
+            await connection.execute(
+                text(f"LOCK TABLE {default} IN SHARE ROW EXCLUSIVE MODE")
+            )
+            exists = await connection.scalar(
+                text("SELECT to_regclass(:name)"), {"name": name}
+            )
+            if exists is not None:
+                return
+            await connection.execute(
+                text(
+                    f"CREATE TABLE {name} "
+                    f"(LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                )
+            )
+            moved = await connection.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM {default} "
+                    "WHERE date >= :start AND date < :end RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                ),
+                {"start": start, "end": end},
+            )
+            await connection.execute(
+                text(
+                    f"ALTER TABLE {table} ATTACH PARTITION {name} "
+                    f"FOR VALUES FROM ('{start}') TO ('{end}')"
+                )
+            )
+        if moved.rowcount:
+            logger.warning(
+                "%s rows moved from %s to new partition %s",
+                moved.rowcount,
+                default,
+                name,
+            )
+
+    async def _partitions(self, table: str) -> dict[str, date]:
+        """Секции таблицы и месяц, который каждая из них хранит."""
+        async with self.db.engine.connect() as connection:
+            result = await connection.execute(
+                text(
+                    "SELECT child.relname FROM pg_inherits "
+                    "JOIN pg_class parent ON parent.oid = inhparent "
+                    "JOIN pg_class child ON child.oid = inhrelid "
+                    "WHERE parent.relname = :table"
+                ),
+                {"table": table},
+            )
+            partitions = {}
+            for (name,) in result:
+                match = PARTITION_NAME.match(name)
+                if match and match["table"] == table:
+                    partitions[name] = date(
+                        int(match["year"]), int(match["month"]), 1
+                    )
+            return partitions
+
+    async def archive_journal(self) -> list[Path]:
+        """Выгружает и удаляет секции журнала старше срока хранения."""
+        cutoff = month_start(
+            datetime.utcnow().date(), -self.journal_retention_months
+        )
+        archived = []
+        partitions = await self._partitions("journal")
+        for name, month in sorted(partitions.items(), key=lambda p: p[1]):
+            if month >= cutoff:
+                continue
+            path = await self._export(name)
+            async with self.db.engine.begin() as connection:
+                await connection.execute(
+                    text(f"ALTER TABLE journal DETACH PARTITION {name}")
+                )
+                await connection.execute(text(f"DROP TABLE {name}"))
+            logger.info("Journal partition %s archived to %s", name, path)
+            archived.append(path)
+        return archived
+
+    async def _export(self, name: str) -> Path:
+        """Копирует секцию в сжатый CSV через COPY."""
+        path = self.archive_dir / f"{name}.csv.gz"
+        archive = await self._blocking(self._open_archive, path)
+        try:
+            async with self.db.engine.connect() as connection:
+                raw = await connection.get_raw_connection()
+
+                async def write(chunk: bytes) -> None:
+                    await self._blocking(archive.write, chunk)
+
+                await raw.driver_connection.copy_from_table(
+                    name, output=write, format="csv", header=True
+                )
+        finally:
+            await self._blocking(archive.close)
+        return path
+
+    def _open_archive(self, path: Path) -> gzip.GzipFile:
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        return gzip.open(path, "wb")
+
+    async def _blocking(self, func: Callable[..., T], *args) -> T:
+        if self.executor is None:
+            return await asyncio.to_thread(func, *args)
+        return await self.executor.run(func, *args)
+
+    async def run(self, interval: float = 24 * 3600) -> None:
+        """Периодическое обслуживание секций."""
+        while True:
+            try:
+                await self.ensure_partitions()
+                await self.archive_journal()
+            except Exception:
+                logger.exception("Partition maintenance failed")
+            await asyncio.sleep(interval)
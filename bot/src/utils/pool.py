@@ -0,0 +1,59 @@
+import time
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    waits: int = 0
+    timeouts: int = 0
+    wait_time_total: float = 0.0
+    wait_time_max: float = 0.0
+
+    # Получение соединения дольше порога считается ожиданием в очереди.
+    WAIT_THRESHOLD = 0.001
+
+    def record(self, waited: float) -> None:
+        self.checkouts += 1
+        if waited >= self.WAIT_THRESHOLD:
+            self.waits += 1
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, считающий выдачи соединений и время ожидания.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self) -> "InstrumentedPool":
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+    def snapshot(self) -> dict:
+        """Текущее состояние пула и накопленная статистика."""
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            **asdict(self.stats),
+        }
@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Optional
+from uuid import UUID, uuid4
+
+from .aeza import AezaResponse, AsyncAeza, response_items
+from .commands import CommandQueue
+from .crypto import new_proxy_identity
+from .db import AsyncORM
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProvisionRequest:
+    user_id: int
+    product_id: int
+    term: str
+    name: str
+    parameters: dict = field(default_factory=dict)
+    method: str = "balance"
+    auto_prolong: bool = False
+    backups: bool = False
+    # Цена продления; None — прокси не продлевается планировщиком.
+    price: Optional[Decimal] = None
+    # Ключ заказа в очереди команд: повтор с ним не закажет сервер снова.
+    idempotency_key: str = field(default_factory=lambda: uuid4().hex)
+
+
+@dataclass
+class ProvisionResult:
+    request: ProvisionRequest
+    ok: bool = False
+    service_id: Optional[int] = None
+    server_ip: Optional[str] = None
+    error: Optional[str] = None
+
+
+def build_link(proxy_uuid: UUID, server_ip: str, short_id: str) -> str:
+    """Собирает VLESS-ссылку для клиента."""
+    return (
+        f"vless://{proxy_uuid}@{server_ip}:443"
+        f"?type=tcp&security=reality&sid={short_id}#HamidVPN"
+    )
+
+
+def proxy_rows(
+    items: list[tuple[int, str, int, Optional[Decimal]]],
+    expires_at: datetime,
+    link_factory: Callable[[UUID, str, str], str] = build_link,
+) -> list[dict]:
+    """
+    Строки `proxies` для готовых серверов (user_id, server_ip,
+    service_id, price): идентификаторы и ссылки.
+    """
+    rows = []
+    for user_id, server_ip, service_id, price in items:
+        proxy_uuid, short_id = new_proxy_identity()
+        rows.append(
+            {
+                "uuid": proxy_uuid,
+                "short_id": short_id,
+                "user_id": user_id,
+                "server_ip": server_ip,
+                "service_id": service_id,
+                "price": price,
+                "expires_at": None if price is None else expires_at,
+                "link": link_factory(proxy_uuid, server_ip, short_id),
+            }
+        )
+    return rows
+
+
+def _service_ids(order: dict) -> list[int]:
+    """Идентификаторы услуг, созданных по заказу."""
+    ids = order.get("createdServiceIds") or order.get("serviceIds") or []
+    if not ids and order.get("serviceId"):
+        ids = [order["serviceId"]]
+    return [int(service_id) for service_id in ids]
+
+
+class ProvisioningPipeline:
+    """
+    Пакетная выдача прокси.
+
+    Заказы ставятся в очередь команд Aeza (с ключом идемпотентности
+    запроса) пулом из `concurrency` воркеров, каждая услуга
+    опрашивается до готовности, а получившиеся прокси записываются
+    в базу одним многострочным INSERT.
+    """
+
+    READY_STATUSES = {"active"}
+    FAILED_STATUSES = {"error", "deleted", "canceled"}
+
+    def __init__(
+        self,
+        aeza: AsyncAeza,
+        db: AsyncORM,
+        commands: CommandQueue,
+        concurrency: int = 10,
+        poll_interval: float = 5.0,
+        ready_timeout: float = 600.0,
+        link_factory: Callable[[UUID, str, str], str] = build_link,
+        billing_period: timedelta = timedelta(days=30),
+    ):
+        self.aeza = aeza
+        self.db = db
+        self.commands = commands
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.ready_timeout = ready_timeout
+        self.link_factory = link_factory
+        self.billing_period = billing_period
+
+    async def run(
+        self, requests: list[ProvisionRequest]
+    ) -> list[ProvisionResult]:
+        """Выполняет все заказы и возвращает результат по каждому."""
+        results = [ProvisionResult(request=request) for request in requests]
+        queue: asyncio.Queue[ProvisionResult] = asyncio.Queue()
+        for result in results:
+            queue.put_nowait(result)
+
+        workers = [
+            asyncio.create_task(self._worker(queue))
+            for _ in range(min(self.concurrency, len(results)))
+        ]
+        await queue.join()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        await self._save(results)
+        return results
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            result: ProvisionResult = await queue.get()
+            try:
+                await self._provision(result)
+            except Exception as e:
+                result.ok = False
+                result.error = f"Необработанная ошибка: {e}"
+            finally:
+                queue.task_done()
+
+    async def _provision(self, result: ProvisionResult) -> None:
+        request = result.request
+        deadline = time.monotonic() + self.ready_timeout
+        await self.commands.order_service(
+            request.idempotency_key,
+            count=1,
+            term=request.term,
+            name=request.name,
+            product_id=request.product_id,
+            parameters=request.parameters,
+            auto_prolog=request.auto_prolong,
+            method=request.method,
+            backups=request.backups,
+        )
+        command = await self.commands.wait(
+            request.idempotency_key,
+            self.ready_timeout,
+            interval=self.poll_interval,
+        )
+        if command is None or command.status != "done":
+            result.error = (
+                command.error
+                if command is not None and command.status == "failed"
+                else "Заказ не отправлен за отведённое время"
+            )
+            return
+
+        orders = response_items(command.result)
+        order = orders[0] if orders else {}
+
+        service_ids = _service_ids(order)
+        if not service_ids:
+            service_ids = await self._wait_order(order.get("id"), deadline)
+        if not service_ids:
+            result.error = "Заказ не завершился за отведённое время"
+            return
+
+        result.service_id = service_ids[0]
+        service = await self._wait_service(result.service_id, deadline)
+        if service is None:
+            result.error = "Сервер не запустился за отведённое время"
+            return
+
+        result.server_ip = service.get("ip")
+        result.ok = bool(result.server_ip)
+        if not result.ok:
+            result.error = "Сервер не получил IP-адрес"
+
+    async def _wait_order(
+        self, order_id: Optional[int], deadline: float
+    ) -> list[int]:
+        """Опрашивает список заказов, пока у заказа не появятся услуги."""
+        while order_id is not None and time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            response: AezaResponse = await self.aeza.get_order_list()
+            if response.status != "ok":
+                continue
+            for order in response_items(response.context):
+                if order.get("id") == order_id and _service_ids(order):
+                    return _service_ids(order)
+        return []
+
+    async def _wait_service(
+        self, service_id: int, deadline: float
+    ) -> Optional[dict]:
+        """Опрашивает услугу, пока она не станет активной."""
+        while time.monotonic() < deadline:
+            response = await self.aeza.get_service(service_id)
+            if response.status == "ok":
+                items = response_items(response.context)
+                service = items[0] if items else {}
+                status = service.get("status")
+                if status in self.READY_STATUSES and service.get("ip"):
+                    return service
+                if status in self.FAILED_STATUSES:
+                    return None
+            await asyncio.sleep(self.poll_interval)
+        return None
+
+    async def _save(self, results: list[ProvisionResult]) -> None:
+        """
+        Записывает все успешно созданные прокси одним запросом. Если
+        пачка не записалась, прокси записываются по одному, чтобы одна
+        плохая строка не оставила без записи уже оплаченные серверы.
+        """
+        ready = [result for result in results if result.ok]
+        if not ready:
+            return
+        rows = proxy_rows(
+            [
+                (
+                    result.request.user_id,
+                    result.server_ip,
+                    result.service_id,
+                    result.request.price,
+                )
+                for result in ready
+            ],
+            datetime.utcnow() + self.billing_period,
+            self.link_factory,
+        )
+        if await self.db.proxy.add_proxies(rows):
+            return
+        for result, row in zip(ready, rows):
+            if await self.db.proxy.add_proxies([row]):
+                continue
+            # service_id и server_ip остаются в результате: сервер
+            # создан и оплачен, его нужно привязать или удалить вручную.
+            result.ok = False
+            result.error = "Ошибка при сохранении прокси в базу"
+            logger.error(
+                "Proxy for user %s was not saved: service %s, ip %s",
+                result.request.user_id,
+                result.service_id,
+                result.server_ip,
+            )
@@ -0,0 +1,201 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Protocol
+
+
+class TokenBucket:
+    """
+    Асинхронный token bucket.
+
+    Вмещает до `burst` токенов и пополняется со скоростью `rate`
+    токенов в секунду. `acquire` ждёт, пока токен не появится.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - max(self._updated, self._paused_until))
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """Забирает токены, при необходимости дожидаясь пополнения."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Останавливает выдачу токенов (например, после RetryAfter)."""
+        self._paused_until = max(
+            self._paused_until, time.monotonic() + seconds
+        )
+        self._tokens = 0
+
+
+class RateLimitBackend(Protocol):
+    """Хранилище состояний token bucket по ключам."""
+
+    async def consume(
+        self, key: str, rate: float, burst: float, tokens: float = 1
+    ) -> float:
+        """
+        Пытается забрать токены из bucket по ключу.
+
+        Возвращает 0, если токены выданы, иначе сколько секунд
+        осталось ждать до их появления.
+        """
+        ...
+
+
+class MemoryBackend:
+    """
+    Хранение bucket'ов в памяти процесса.
+
+    Запись удаляется после `burst / rate` секунд простоя (но не раньше
+    `idle_ttl`): к этому моменту bucket снова полон и удаление не меняет
+    лимит. Записи с одинаковым сроком жизни лежат в своём OrderedDict
+    в порядке последнего обращения, поэтому просроченные снимаются
+    с начала за амортизированное O(1), и долгоживущий ключ не держит
+    в памяти короткоживущие. Различных сроков столько же, сколько
+    настроенных лимитов. Подходит для одного процесса и для тестов.
+    """
+
+    def __init__(self, idle_ttl: float = 0):
+        self.idle_ttl = idle_ttl
+        self._buckets: dict[float, OrderedDict[str, list[float]]] = {}
+
+    def _expire(self, now: float) -> None:
+        for ttl, buckets in self._buckets.items():
+            while buckets:
+                key, (_, updated) = next(iter(buckets.items()))
+                if now - updated < ttl:
+                    break
+                del buckets[key]
+
+    async def consume(
+        self, key: str, rate: float, burst: float, tokens: float = 1
+    ) -> float:
+        now = time.monotonic()
+        self._expire(now)
+
+        ttl = max(self.idle_ttl, burst / rate)
+        buckets = self._buckets.setdefault(ttl, OrderedDict())
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = [burst, now]
+        else:
+            buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= tokens:
+            bucket[0] -= tokens
+            return 0.0
+        return (tokens - bucket[0]) / rate
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for buckets in self._buckets.values())
+
+
+class RedisBackend:
+    """
+    Хранение bucket'ов в Redis: лимит общий для всех воркеров бота.
+
+    Bucket обновляется атомарно Lua-скриптом по времени сервера Redis,
+    поэтому расхождение часов между воркерами не влияет на лимит.
+    Требует пакет `redis`.
+    """
+
+    SCRIPT = """
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local wait = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+    else
+        wait = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise RuntimeError(
+                "Для RedisBackend нужен пакет redis: pip install redis"
+            ) from e
+
+        self.prefix = prefix
+        self._redis = Redis.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+
+    async def consume(
+        self, key: str, rate: float, burst: float, tokens: float = 1
+    ) -> float:
+        wait = await self._script(
+            keys=[self.prefix + key], args=[rate, burst, tokens]
+        )
+        return float(wait)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты событий по ключам поверх `RateLimitBackend`.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        rate: float = 1.0,
+        burst: float = 5,
+    ):
+        self.backend = backend
+        self.rate = rate
+        self.burst = burst
+
+    async def hit(
+        self,
+        key: str,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+    ) -> bool:
+        """Возвращает True, если событие по ключу укладывается в лимит."""
+        wait = await self.backend.consume(
+            key,
+            rate=rate if rate is not None else self.rate,
+            burst=burst if burst is not None else self.burst,
+        )
+        return wait == 0
+
+    async def close(self) -> None:
+        close = getattr(self.backend, "close", None)
+        if close is not None:
+            await close()
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+
+from .db import AsyncORM
+
+logger = logging.getLogger(__name__)
+
+
+class LedgerReconciler:
+    """
+    Периодическая сверка `bank_summary` и `bank_monthly` с таблицей bank.
+
+    Пользователи проверяются пачками по `batch_size` с паузой `pause`
+    между пачками, чтобы сверка не мешала основной нагрузке.
+    """
+
+    def __init__(
+        self,
+        db: AsyncORM,
+        batch_size: int = 500,
+        pause: float = 0.5,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.pause = pause
+
+    async def reconcile(self) -> list[int]:
+        """
+        Один полный проход. Возвращает id исправленных пользователей.
+        Если пачку сверить не удалось, проход прерывается ошибкой:
+        остальные пользователи не проверены, это не конец сверки.
+        """
+        fixed = []
+        after_id = None
+        while True:
+            result = await self.db.bank.reconcile(after_id, self.batch_size)
+            if result is None:
+                raise RuntimeError(
+                    f"batch after user {after_id} failed, "
+                    f"{len(fixed)} users fixed before it"
+                )
+            after_id, mismatched = result
+            if mismatched:
+                logger.warning(
+                    "Bank summaries rebuilt for users: %s", mismatched
+                )
+                fixed.extend(mismatched)
+            if after_id is None:
+                break
+            await asyncio.sleep(self.pause)
+        return fixed
+
+    async def run(self, interval: float = 24 * 3600) -> None:
+        """Периодическая сверка."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                fixed = await self.reconcile()
+                logger.info(
+                    "Bank reconciliation finished, %d users fixed", len(fixed)
+                )
+            except Exception:
+                logger.exception("Bank reconciliation failed")
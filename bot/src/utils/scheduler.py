@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+
+from .metrics import UPDATE_QUEUE_WAIT, UPDATES_DROPPED, UPDATES_PENDING
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[Any]]
+
+
+class KeyedScheduler:
+    """
+    Планировщик задач с упорядочиванием по ключу.
+
+    - Задачи с одним ключом выполняются строго по очереди, в порядке
+      поступления; задачи с разными ключами — параллельно.
+    - Одновременно выполняется не больше `concurrency` задач.
+    - Принятых, но не завершённых задач не больше `max_pending`:
+      `submit` ждёт освобождения места, и источник задач замедляется.
+    - Очередь одного ключа ограничена `max_per_key`; лишние задачи
+      отбрасываются, чтобы один ключ не занял все места.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 100,
+        max_pending: int = 1000,
+        max_per_key: int = 50,
+    ):
+        self.max_per_key = max_per_key
+        self._running = asyncio.Semaphore(concurrency)
+        self._slots = asyncio.Semaphore(max_pending)
+        self._queues: dict[Hashable, deque] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.pending = 0
+
+    async def submit(
+        self, key: Optional[Hashable], job: Job
+    ) -> Optional[asyncio.Future]:
+        """
+        Ставит задачу в очередь ключа (`None` — без упорядочивания).
+        Возвращает future с результатом или None, если задача отброшена.
+        """
+        queue = self._queues.get(key) if key is not None else None
+        if queue is not None and len(queue) >= self.max_per_key:
+            UPDATES_DROPPED.inc()
+            logger.warning("Queue for %s is full, update dropped", key)
+            return None
+
+        await self._slots.acquire()
+        self.pending += 1
+        UPDATES_PENDING.set(self.pending)
+        future = asyncio.get_running_loop().create_future()
+        item = (job, future, time.perf_counter())
+
+        if key is None:
+            self._spawn(self._run(item))
+            return future
+        # Очередь могла появиться, пока ждали места.
+        queue = self._queues.get(key)
+        if queue is not None:
+            queue.append(item)
+            return future
+        self._queues[key] = deque([item])
+        self._spawn(self._drain(key))
+        return future
+
+    def _spawn(self, coroutine: Awaitable[None]) -> None:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _drain(self, key: Hashable) -> None:
+        queue = self._queues[key]
+        try:
+            while queue:
+                await self._run(queue.popleft())
+        finally:
+            del self._queues[key]
+
+    async def _run(self, item: tuple) -> None:
+        job, future, queued = item
+        try:
+            async with self._running:
+                UPDATE_QUEUE_WAIT.observe(time.perf_counter() - queued)
+                result = await job()
+        except Exception as e:
+            if not future.cancelled():
+                future.set_exception(e)
+        else:
+            if not future.cancelled():
+                future.set_result(result)
+        finally:
+            self.pending -= 1
+            UPDATES_PENDING.set(self.pending)
+            self._slots.release()
+
+    async def join(self, timeout: Optional[float] = None) -> None:
+        """Ждёт завершения всех принятых задач (не дольше `timeout`)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._tasks:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(
+                        "%s updates were not processed", self.pending
+                    )
+                    return
+            await asyncio.wait(set(self._tasks), timeout=remaining)
+
+
+def update_key(update: Update) -> Optional[int]:
+    """Ключ упорядочивания: пользователь события, иначе чат."""
+    event = update.event
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return user.id
+    chat = getattr(event, "chat", None)
+    if chat is None:
+        chat = getattr(getattr(event, "message", None), "chat", None)
+    return chat.id if chat is not None else None
+
+
+class OrderedDispatcher(Dispatcher):
+    """
+    Диспетчер, обрабатывающий обновления через `KeyedScheduler`:
+    события одного пользователя идут по порядку, разные пользователи
+    обрабатываются параллельно в пределах общего лимита.
+
+    `feed_update` только ставит обновление в очередь (и ждёт, если
+    очередь переполнена), поэтому polling запускается с
+    `handle_as_tasks=False`: пока мест нет, новые обновления
+    не запрашиваются.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 100,
+        max_pending: int = 1000,
+        max_per_key: int = 50,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.scheduler = KeyedScheduler(
+            concurrency=concurrency,
+            max_pending=max_pending,
+            max_per_key=max_per_key,
+        )
+
+    async def feed_update(self, bot: Bot, update: Update, **kwargs) -> None:
+        future = await self._submit(bot, update, **kwargs)
+        if future is not None:
+            future.add_done_callback(self._log_failure)
+
+    async def feed_update_and_wait(
+        self, bot: Bot, update: Update, **kwargs
+    ) -> Any:
+        """Ставит обновление в очередь и ждёт результата обработки."""
+        future = await self._submit(bot, update, **kwargs)
+        return await future if future is not None else None
+
+    async def _submit(
+        self, bot: Bot, update: Update, **kwargs
+    ) -> Optional[asyncio.Future]:
+        async def process() -> Any:
+            response = await super(OrderedDispatcher, self).feed_update(
+                bot, update, **kwargs
+            )
+            if isinstance(response, TelegramMethod):
+                await self.silent_call_request(bot, response)
+            return response
+
+        return await self.scheduler.submit(update_key(update), process)
+
+    @staticmethod
+    def _log_failure(future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(
+                "Failed to process update", exc_info=future.exception()
+            )
+
+    async def join(self, timeout: Optional[float] = None) -> None:
+        """Дожидается обработки всех принятых обновлений."""
+        await self.scheduler.join(timeout)
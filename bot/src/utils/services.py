@@ -0,0 +1,201 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from .aeza import AsyncAeza, response_items
+from .db import AsyncORM
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ServiceState:
+    """Состояние услуги Aeza, важное для бота."""
+
+    id: int
+    name: Optional[str] = None
+    status: Optional[str] = None
+    ip: Optional[str] = None
+    product_id: Optional[int] = None
+
+    @classmethod
+    def from_api(cls, item: dict) -> "ServiceState":
+        product = item.get("product")
+        product_id = item.get("productId")
+        if product_id is None and isinstance(product, dict):
+            product_id = product.get("id")
+        return cls(
+            id=int(item["id"]),
+            name=item.get("name"),
+            status=item.get("status"),
+            ip=item.get("ip"),
+            product_id=int(product_id) if product_id is not None else None,
+        )
+
+
+@dataclass(frozen=True)
+class ServiceEvent:
+    """
+    Изменение услуги: created, removed, down, up, status_changed,
+    ip_changed.
+    """
+
+    kind: str
+    service_id: int
+    old: Optional[ServiceState]
+    new: Optional[ServiceState]
+
+
+Subscriber = Callable[[ServiceEvent], Awaitable[Any]]
+
+
+class ServiceMirror:
+    """
+    Локальная копия услуг Aeza.
+
+    Фоновая синхронизация раз в `interval` секунд забирает весь список
+    услуг одним вызовом `get_my_services`, сравнивает его со снимком в
+    памяти, записывает в `aeza_services` только изменившиеся строки и
+    рассылает подписчикам события изменений. Хендлеры читают состояние
+    из снимка, не обращаясь ни к Aeza, ни к базе.
+    """
+
+    ACTIVE_STATUS = "active"
+
+    def __init__(self, db: AsyncORM, aeza: AsyncAeza, interval: float = 60):
+        self.db = db
+        self.aeza = aeza
+        self.interval = interval
+        self._snapshot: dict[int, ServiceState] = {}
+        self._subscribers: list[Subscriber] = []
+        self.synced_at: Optional[datetime] = None
+
+    def get(self, service_id: int) -> Optional[ServiceState]:
+        """Состояние услуги из снимка."""
+        return self._snapshot.get(service_id)
+
+    def is_active(self, service_id: int) -> bool:
+        state = self._snapshot.get(service_id)
+        return state is not None and state.status == self.ACTIVE_STATUS
+
+    def subscribe(self, callback: Subscriber) -> None:
+        """Добавляет обработчик событий изменения услуг."""
+        self._subscribers.append(callback)
+
+    async def load(self) -> None:
+        """Заполняет снимок из базы, чтобы не ждать первой синхронизации."""
+        self._snapshot = {
+            service.id: ServiceState(
+                id=service.id,
+                name=service.name,
+                status=service.status,
+                ip=service.ip,
+                product_id=service.product_id,
+            )
+            for service in await self.db.aeza_service.get_all()
+        }
+
+    async def sync(self) -> list[ServiceEvent]:
+        """Одна синхронизация с Aeza. Возвращает события изменений."""
+        response = await self.aeza.get_my_services()
+        if response.status != "ok":
+            logger.warning("Aeza services sync failed: %s", response.context)
+            return []
+
+        items = {}
+        for item in response_items(response.context):
+            if isinstance(item, dict) and item.get("id") is not None:
+                items[int(item["id"])] = item
+        remote = {
+            service_id: ServiceState.from_api(item)
+            for service_id, item in items.items()
+        }
+
+        now = datetime.utcnow()
+        changed = [
+            {
+                "id": state.id,
+                "name": state.name,
+                "status": state.status,
+                "ip": state.ip,
+                "product_id": state.product_id,
+                "payload": items[state.id],
+                "updated_at": now,
+            }
+            for state in remote.values()
+            if self._snapshot.get(state.id) != state
+        ]
+        removed = [
+            service_id
+            for service_id in self._snapshot
+            if service_id not in remote
+        ]
+        if not await self.db.aeza_service.apply_changes(changed, removed):
+            return []
+
+        events = self._diff(self._snapshot, remote)
+        self._snapshot = remote
+        self.synced_at = now
+        for event in events:
+            await self._emit(event)
+        return events
+
+    def _diff(
+        self,
+        old: dict[int, ServiceState],
+        new: dict[int, ServiceState],
+    ) -> list[ServiceEvent]:
+        events = []
+        for service_id in old.keys() | new.keys():
+            before, after = old.get(service_id), new.get(service_id)
+            if before == after:
+                continue
+            if before is None:
+                events.append(ServiceEvent("created", service_id, None, after))
+                continue
+            if after is None:
+                events.append(
+                    ServiceEvent("removed", service_id, before, None)
+                )
+                continue
+            if before.status != after.status:
+                if before.status == self.ACTIVE_STATUS:
+                    kind = "down"
+                elif after.status == self.ACTIVE_STATUS:
+                    kind = "up"
+                else:
+                    kind = "status_changed"
+                events.append(ServiceEvent(kind, service_id, before, after))
+            if before.ip != after.ip:
+                events.append(
+                    ServiceEvent("ip_changed", service_id, before, after)
+                )
+        return events
+
+    async def _emit(self, event: ServiceEvent) -> None:
+        logger.info(
+            "Aeza service %s: %s (%s -> %s)",
+            event.service_id,
+            event.kind,
+            event.old,
+            event.new,
+        )
+        await self.db.journal.add_journal_record(
+            f"aeza_service_{event.kind}", f"service_id={event.service_id}"
+        )
+        for callback in self._subscribers:
+            try:
+                await callback(event)
+            except Exception:
+                logger.exception("Service event subscriber failed")
+
+    async def run(self) -> None:
+        """Периодическая синхронизация."""
+        while True:
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Aeza services sync failed")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,124 @@
+import asyncio
+import hmac
+import logging
+import signal
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.types import Update
+from aiohttp import web
+
+from .scheduler import OrderedDispatcher
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """
+    Приём обновлений Telegram через webhook на aiohttp.
+
+    - Запросы без верного секретного заголовка отклоняются,
+      некорректное тело — ответом 400.
+    - Обновление только ставится в очередь планировщика диспетчера:
+      число одновременно обрабатываемых обновлений ограничивает он.
+      Когда очередь заполнена, ответ Telegram задерживается, и он сам
+      снижает темп доставки.
+    - При остановке новые обновления не принимаются, а принятые
+      дорабатываются (не дольше `shutdown_timeout` секунд).
+    - `GET /health` отвечает для балансировщика. Метрики этот сервер
+      не отдаёт: он открыт наружу, `/metrics` обслуживает отдельный
+      `MetricsServer`.
+    """
+
+    def __init__(
+        self,
+        dp: OrderedDispatcher,
+        bot: Bot,
+        base_url: str,
+        path: str = "/webhook",
+        secret: Optional[str] = None,
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        shutdown_timeout: float = 30,
+    ):
+        self.dp = dp
+        self.bot = bot
+        self.url = base_url.rstrip("/") + path
+        self.path = path
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.shutdown_timeout = shutdown_timeout
+        self._closing = False
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get("/health", self.health)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        if self.secret is not None and not hmac.compare_digest(
+            request.headers.get(SECRET_HEADER, ""), self.secret
+        ):
+            return web.Response(status=401)
+        if self._closing:
+            return web.Response(status=503)
+
+        try:
+            update = Update.model_validate(
+                await request.json(), context={"bot": self.bot}
+            )
+        except ValueError:
+            # JSONDecodeError и ValidationError — наследники ValueError.
+            logger.warning("Malformed update rejected")
+            return web.Response(status=400)
+        await self.dp.feed_update(self.bot, update)
+        return web.Response()
+
+    async def health(self, request: web.Request) -> web.Response:
+        status = 503 if self._closing else 200
+        return web.json_response(
+            {"closing": self._closing, "pending": self.dp.scheduler.pending},
+            status=status,
+        )
+
+    async def run(self) -> None:
+        """Регистрирует webhook и обслуживает запросы до сигнала остановки."""
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass
+
+        runner = web.AppRunner(self.build_app())
+        await runner.setup()
+        site = web.TCPSite(runner, self.host, self.port)
+        await site.start()
+
+        await self.dp.emit_startup(bot=self.bot, **self.dp.workflow_data)
+        await self.bot.set_webhook(
+            url=self.url,
+            secret_token=self.secret,
+            allowed_updates=self.dp.resolve_used_update_types(),
+        )
+        logger.info("Webhook server is listening on %s", self.url)
+
+        try:
+            await stop.wait()
+        finally:
+            await self._shutdown(runner)
+
+    async def _shutdown(self, runner: web.AppRunner) -> None:
+        """Дожидается принятых обновлений и останавливает сервер."""
+        self._closing = True
+        logger.info(
+            "Waiting for %s pending updates", self.dp.scheduler.pending
+        )
+        await self.dp.join(self.shutdown_timeout)
+        await self.dp.emit_shutdown(bot=self.bot, **self.dp.workflow_data)
+        await runner.cleanup()
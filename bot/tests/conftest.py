@@ -0,0 +1,51 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import pytest
+from benchmarks.run import ThrowawayDatabase
+from src.utils.config import Settings
+from src.utils.db import AsyncORM, db
+
+BOT_ROOT = Path(__file__).resolve().parent.parent
+
+Scenario = Callable[[AsyncORM], Awaitable[None]]
+
+
+@pytest.fixture
+def run_with_db(monkeypatch) -> Callable[[Scenario], None]:
+    """
+    Выполняет сценарий на временной базе с применёнными миграциями.
+
+    Сервер PostgreSQL задаётся переменными TEST_DB_HOST, TEST_DB_PORT,
+    TEST_DB_USER, TEST_DB_PASSWORD и TEST_DB_NAME (база, в которой
+    разрешено CREATE DATABASE). Без TEST_DB_HOST тест пропускается.
+    """
+    if not os.environ.get("TEST_DB_HOST"):
+        pytest.skip("TEST_DB_HOST is not set")
+    base = Settings(
+        BOT_TOKEN="123456:TEST",
+        AEZA_TOKEN="test",
+        DB_HOST=os.environ["TEST_DB_HOST"],
+        DB_PORT=os.environ.get("TEST_DB_PORT"),
+        DB_USER=os.environ.get("TEST_DB_USER", "postgres"),
+        DB_PASSWORD=os.environ.get("TEST_DB_PASSWORD"),
+        DB_NAME=os.environ.get("TEST_DB_NAME", "postgres"),
+    )
+    # alembic.ini и migrations ищутся относительно каталога bot.
+    monkeypatch.chdir(BOT_ROOT)
+
+    def run(scenario: Scenario) -> None:
+        async def main() -> None:
+            async with ThrowawayDatabase(base) as settings:
+                await db.migrate(url=settings.DB_URL)
+                await db.start(settings)
+                try:
+                    await scenario(db)
+                finally:
+                    await db.stop()
+
+        asyncio.run(main())
+
+    return run
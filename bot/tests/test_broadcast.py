@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from src.utils import broadcast
+from src.utils.broadcast import Broadcaster, BroadcastStats, _Watermark
+
+
+def test_watermark_commits_only_contiguous_prefix():
+    watermark = _Watermark(start=None)
+    for user_id in (1, 2, 3):
+        watermark.add(user_id)
+
+    assert watermark.done(2, "sent") == []
+    assert watermark.done(3, "blocked") == []
+    assert watermark.value is None
+
+    assert watermark.done(1, "failed") == [
+        (1, "failed"),
+        (2, "sent"),
+        (3, "blocked"),
+    ]
+    assert watermark.value == 3
+
+
+class FakeDB:
+    """Пользователи 1..`users` и сохранённый прогресс рассылки."""
+
+    def __init__(self, users: int):
+        self.users = list(range(1, users + 1))
+        self.saved: list[tuple] = []
+        self.user = SimpleNamespace(
+            get_user_page=self.get_user_page, mark_blocked=self.mark_blocked
+        )
+        self.broadcast = SimpleNamespace(save_progress=self.save_progress)
+
+    async def get_user_page(self, after_id, limit, filters):
+        rows = [user_id for user_id in self.users if user_id > (after_id or 0)]
+        return [SimpleNamespace(id=user_id) for user_id in rows[:limit]]
+
+    async def mark_blocked(self, user_ids) -> None:
+        pass
+
+    async def save_progress(self, broadcast_id, last_user_id, *counts, status):
+        self.saved.append((last_user_id, *counts, status))
+
+
+class StuckBot:
+    """Отправляет первым `limit` получателям, остальные зависают."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.sent: list[int] = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        if chat_id > self.limit:
+            await asyncio.Event().wait()
+        self.sent.append(chat_id)
+
+
+def test_cancelled_broadcast_saves_progress():
+    db = FakeDB(users=50)
+    bot = StuckBot(limit=10)
+    broadcaster = Broadcaster(bot, db, rate=1000, workers=4, save_every=100)
+
+    async def scenario():
+        task = asyncio.create_task(
+            broadcaster.run(1, "hello", BroadcastStats(broadcast_id=1))
+        )
+        while len(bot.sent) < 10:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert db.saved[-1] == (10, 10, 0, 0, "running")
+
+
+def test_flood_wait_slows_down_once_per_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(broadcast.time, "monotonic", lambda: now[0])
+    broadcaster = Broadcaster(bot=None, db=None, rate=20)
+
+    for _ in range(5):
+        broadcaster._slow_down(3)
+    assert broadcaster.bucket.rate == pytest.approx(14)
+
+    now[0] += 3
+    broadcaster._slow_down(3)
+    assert broadcaster.bucket.rate == pytest.approx(9.8)
@@ -0,0 +1,74 @@
+import asyncio
+
+from src.utils import cache as cache_module
+from src.utils.cache import AsyncTTLCache
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = AsyncTTLCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(cache.get_or_fetch("key", fetch) for _ in range(10))
+        )
+        assert results == ["value"] * 10
+        assert await cache.get_or_fetch("key", fetch) == "value"
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+
+
+def test_stale_value_is_served_while_revalidating(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = AsyncTTLCache(default_ttl=10, stale_ttl=100)
+    values = iter(["first", "second", "third"])
+
+    async def fetch():
+        return next(values)
+
+    async def scenario():
+        assert await cache.get_or_fetch("key", fetch) == "first"
+
+        now[0] += 50
+        # expired but within stale_ttl: old value now, refresh in background
+        assert await cache.get_or_fetch("key", fetch) == "first"
+        await asyncio.sleep(0)
+        assert await cache.get_or_fetch("key", fetch) == "second"
+
+        now[0] += 500
+        # past stale_ttl the caller waits for a fresh value
+        assert await cache.get_or_fetch("key", fetch) == "third"
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_discards_fetch_started_before_it():
+    cache = AsyncTTLCache()
+    release = asyncio.Event()
+    values = iter(["old", "new"])
+
+    async def fetch():
+        value = next(values)
+        if value == "old":
+            await release.wait()
+        return value
+
+    async def scenario():
+        stale = asyncio.create_task(cache.get_or_fetch("key", fetch))
+        await asyncio.sleep(0)
+        cache.invalidate("key")
+        fresh = cache.get_or_fetch("key", fetch)
+        assert await asyncio.wait_for(fresh, 1) == "new"
+
+        release.set()
+        assert await stale == "old"
+        assert await cache.get_or_fetch("key", fetch) == "new"
+
+    asyncio.run(scenario())
@@ -0,0 +1,158 @@
+from src.utils import commands
+from src.utils.aeza import AezaResponse
+from src.utils.commands import CircuitBreaker, CommandQueue
+from src.utils.db import AsyncORM
+from src.utils.executor import BoundedExecutor
+
+
+class FakeAeza:
+    """Aeza, которая принимает заказ, но отвечает таймаутом."""
+
+    def __init__(self):
+        self.orders: list[dict] = []
+        self.created: list[dict] = []
+        self.reinstalled: list[dict] = []
+
+    @staticmethod
+    def _items(items: list[dict]) -> AezaResponse:
+        return AezaResponse(
+            status="ok", context={"data": {"items": items}}, http_status=200
+        )
+
+    async def create_service(self, **payload) -> AezaResponse:
+        self.created.append(payload)
+        # Заказ создаётся асинхронно: пока виден только в списке заказов.
+        self.orders.append({"id": len(self.orders) + 1, **payload})
+        return AezaResponse(status="error", context="Ошибка сети: таймаут")
+
+    async def get_my_services(self) -> AezaResponse:
+        return self._items([])
+
+    async def get_order_list(self) -> AezaResponse:
+        return self._items(self.orders)
+
+    async def reinstall_service(self, **kwargs) -> AezaResponse:
+        self.reinstalled.append(kwargs)
+        return AezaResponse(status="ok", context={}, http_status=200)
+
+
+def make_queue(db: AsyncORM, aeza: FakeAeza, **kwargs) -> CommandQueue:
+    return CommandQueue(
+        db=db,
+        aeza=aeza,
+        secret=b"test-secret",
+        base_delay=0,
+        max_delay=0,
+        **kwargs,
+    )
+
+
+ORDER = dict(
+    count=1,
+    term="month",
+    name="proxy",
+    product_id=1,
+    parameters={},
+    auto_prolog=False,
+    method="balance",
+    backups=False,
+)
+
+
+def test_order_is_not_sent_twice_after_timeout(run_with_db):
+    async def scenario(db: AsyncORM) -> None:
+        aeza = FakeAeza()
+        queue = make_queue(db, aeza)
+        await queue.order_service("order-1", **ORDER)
+        await queue.order_service("order-1", **ORDER)
+
+        await queue.drain()
+        assert (await queue.get("order-1")).status == "pending"
+        await queue.drain()
+
+        command = await queue.get("order-1")
+        assert command.status == "done"
+        assert command.result["id"] == 1
+        assert len(aeza.created) == 1
+
+    run_with_db(scenario)
+
+
+def test_sent_order_is_rechecked_before_resending(run_with_db):
+    async def scenario(db: AsyncORM) -> None:
+        aeza = FakeAeza()
+        queue = make_queue(db, aeza, recheck_interval=0)
+        await queue.order_service("order-2", **ORDER)
+        await queue.drain()
+        # Заказ ещё не появился в Aeza.
+        aeza.orders.clear()
+
+        await queue.drain()
+        command = await queue.get("order-2")
+        assert command.status == "pending"
+        assert command.attempts == 1
+        assert len(aeza.created) == 1
+
+    run_with_db(scenario)
+
+
+def test_reinstall_survives_restart_without_stored_password(run_with_db):
+    async def scenario(db: AsyncORM) -> None:
+        aeza = FakeAeza()
+        queue = make_queue(db, aeza)
+        await queue.reinstall("reinstall-1", 7, os=1)
+        password = await queue.password("reinstall-1")
+
+        # Команду выполняет другой процесс: пароль выводится заново
+        # в его пуле crypto.
+        executor = BoundedExecutor("crypto")
+        try:
+            await make_queue(db, aeza, executor=executor).drain()
+        finally:
+            executor.shutdown()
+        command = await queue.get("reinstall-1")
+        assert command.status == "done"
+        assert aeza.reinstalled == [
+            {"service_id": 7, "os": 1, "recipe": None, "password": password}
+        ]
+        assert password not in str((command.payload, command.result))
+        assert password != await queue.password("reinstall-2")
+
+    run_with_db(scenario)
+
+
+def test_circuit_breaker_opens_and_probes_once(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(commands.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=30)
+
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.remaining() == 30
+
+    now[0] += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # only one probe at a time
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
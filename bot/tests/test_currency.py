@@ -0,0 +1,61 @@
+from decimal import Decimal
+
+from src.utils.currency import PriceCatalog, parse_currencies, parse_products
+
+
+def test_catalog_skips_non_numeric_values():
+    currencies = parse_currencies(
+        {
+            "data": {
+                "USD": {"multiplier": "0.0125", "round": 2},
+                "EUR": {"multiplier": "n/a", "round": 2},
+                "BTC": {"multiplier": 1e-7, "round": "x"},
+            }
+        }
+    )
+    assert set(currencies) == {"RUB", "USD"}
+
+    products = parse_products(
+        {
+            "data": {
+                "items": [
+                    {
+                        "id": 1,
+                        "prices": {
+                            "month": 150,
+                            "year": "по запросу",
+                            "day": float("nan"),
+                            "hour": True,
+                        },
+                    },
+                    {"name": "без id"},
+                ]
+            }
+        }
+    )
+    assert [product["id"] for product in products] == [1]
+
+    catalog = PriceCatalog.build(currencies, products)
+    assert catalog.table() == {1: {"month": Decimal("150.00")}}
+    assert catalog.price(1, "month", "USD") == Decimal("1.88")
+
+
+def test_parse_currencies_accepts_item_list():
+    currencies = parse_currencies(
+        {"data": {"items": [{"code": "USD", "multiplier": 0.0125}]}}
+    )
+    assert currencies["USD"].multiplier == Decimal("0.0125")
+
+
+def test_catalog_skips_non_mapping_prices():
+    products = [
+        {"id": 1, "prices": [150, 1500]},
+        {"id": 2, "prices": None},
+        {"id": 3, "prices": {"month": 90}},
+    ]
+    catalog = PriceCatalog.build(parse_currencies({}), products)
+    assert catalog.table() == {
+        1: {},
+        2: {},
+        3: {"month": Decimal("90.00")},
+    }
@@ -0,0 +1,37 @@
+import asyncio
+
+from sqlalchemy import select
+from src.models.journal import Journal
+from src.utils.db import AsyncORM
+
+
+def test_flusher_survives_connection_errors(run_with_db):
+    async def scenario(db: AsyncORM) -> None:
+        journal = db.journal
+        write = journal._write
+        calls = 0
+
+        async def flaky(records: list[dict]) -> None:
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise ConnectionRefusedError("database is down")
+            await write(records)
+
+        journal._write = flaky
+        try:
+            await journal.add_journal_record("lost", "first batch")
+            while calls == 0:
+                await asyncio.sleep(0.01)
+            assert not journal._task.done()
+
+            await journal.add_journal_record("kept", "second batch")
+            await journal.stop()
+        finally:
+            del journal._write
+
+        async with db.engine.connect() as connection:
+            actions = await connection.scalars(select(Journal.action))
+            assert list(actions) == ["kept"]
+
+    run_with_db(scenario)
@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+from sqlalchemy import select, update
+from src.models.proxy import FREEZE_MANUAL, Proxy
+from src.models.user import User
+from src.utils.aeza import AezaResponse
+from src.utils.commands import CommandQueue
+from src.utils.db import AsyncORM
+from src.utils.lifecycle import ProxyLifecycle
+
+
+class FakeAeza:
+    """Aeza, которая запоминает порядок stop/start."""
+
+    def __init__(self):
+        self.calls: list[tuple[str, int]] = []
+        self.fail = False
+
+    async def _control(self, action: str, service_id: int) -> AezaResponse:
+        self.calls.append((action, service_id))
+        if self.fail:
+            return AezaResponse(
+                status="error", context="Bad request", http_status=400
+            )
+        return AezaResponse(status="ok", context={}, http_status=200)
+
+    async def stop_service(self, service_id: int) -> AezaResponse:
+        return await self._control("stop", service_id)
+
+    async def start_service(self, service_id: int) -> AezaResponse:
+        return await self._control("start", service_id)
+
+
+async def proxy_state(db: AsyncORM, short_id: str) -> tuple[bool, int]:
+    async with db.engine.connect() as connection:
+        row = (
+            await connection.execute(
+                select(Proxy.service_synced, Proxy.state_version).where(
+                    Proxy.short_id == short_id
+                )
+            )
+        ).one()
+    return row.service_synced, row.state_version
+
+
+def test_sync_goes_through_queue_in_order(run_with_db):
+    async def scenario(db: AsyncORM) -> None:
+        await db.user.add_user(1, "user")
+        assert await db.proxy.add_proxies(
+            [
+                {
+                    "uuid": uuid4(),
+                    "short_id": "a1",
+                    "user_id": 1,
+                    "server_ip": "10.0.0.1",
+                    "service_id": 5,
+                    "link": "vless://a1",
+                }
+            ]
+        )
+        aeza = FakeAeza()
+        queue = CommandQueue(
+            db=db, aeza=aeza, secret=b"test", base_delay=0, max_delay=0
+        )
+        lifecycle = ProxyLifecycle(db=db, commands=queue)
+
+        await db.proxy.freeze_proxy("a1")
+        await lifecycle.sync_services()
+        # Пока stop не выполнен, разморозка не ставит start.
+        await db.proxy.unfreeze_proxy("a1")
+        await lifecycle.sync_services()
+        assert aeza.calls == []
+
+        await queue.drain()
+        await lifecycle.sync_services()
+        await queue.drain()
+        assert aeza.calls == [("stop", 5), ("start", 5)]
+
+        await lifecycle.sync_services()
+        assert await proxy_state(db, "a1") == (True, 2)
+        # Повторный цикл ничего не ставит.
+        await lifecycle.sync_services()
+        await queue.drain()
+        assert len(aeza.calls) == 2
+
+    run_with_db(scenario)
+
+
+def test_failed_sync_is_retried_under_new_version(run_with_db):
+    async def scenario(db: AsyncORM) -> None:
+        await db.user.add_user(1, "user")
+        assert await db.proxy.add_proxies(
+            [
+                {
+                    "uuid": uuid4(),
+                    "short_id": "b1",
+                    "user_id": 1,
+                    "server_ip": "10.0.0.2",
+                    "service_id": 6,
+                    "link": "vless://b1",
+                }
+            ]
+        )
+        async with db.engine.begin() as connection:
+            await connection.execute(
+                update(Proxy).values(is_freeze=True, service_synced=False)
+            )
+        aeza = FakeAeza()
+        aeza.fail = True
+        queue = CommandQueue(
+            db=db, aeza=aeza, secret=b"test", base_delay=0, max_delay=0
+        )
+        lifecycle = ProxyLifecycle(db=db, commands=queue)
+
+        await lifecycle.sync_services()
+        await queue.drain()
+        await lifecycle.sync_services()
+        assert await proxy_state(db, "b1") == (False, 1)
+
+        aeza.fail = False
+        await lifecycle.sync_services()
+        await queue.drain()
+        await lifecycle.sync_services()
+        assert aeza.calls == [("stop", 6), ("stop", 6)]
+        assert await proxy_state(db, "b1") == (True, 1)
+
+    run_with_db(scenario)
+
+
+def test_manually_frozen_proxy_is_not_unfrozen_by_renewal(run_with_db):
+    async def scenario(db: AsyncORM) -> None:
+        now = datetime.utcnow()
+        await db.user.add_user(1, "user")
+        assert await db.proxy.add_proxies(
+            [
+                {
+                    "uuid": uuid4(),
+                    "short_id": short_id,
+                    "user_id": 1,
+                    "server_ip": "10.0.0.3",
+                    "link": f"vless://{short_id}",
+                    "expires_at": now - timedelta(days=1),
+                    "price": Decimal("10"),
+                }
+                for short_id in ("manual", "unpaid")
+            ]
+        )
+        await db.proxy.freeze_proxy("manual")
+        stats = await db.proxy.renew_due(now, timedelta(days=30))
+        assert (stats.renewed, stats.frozen) == (0, 1)
+
+        async with db.engine.begin() as connection:
+            await connection.execute(update(User).values(money=100))
+        stats = await db.proxy.renew_due(now, timedelta(days=30), frozen=True)
+        assert stats.renewed == 1
+
+        async with db.engine.connect() as connection:
+            rows = dict(
+                (
+                    await connection.execute(
+                        select(Proxy.short_id, Proxy.freeze_reason)
+                    )
+                ).all()
+            )
+        assert rows == {"manual": FREEZE_MANUAL, "unpaid": None}
+
+    run_with_db(scenario)
@@ -0,0 +1,31 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.utils.middlewares import UserMiddleware
+
+
+class FlakyUsers:
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def register_user(self, tg_id, tg_name, refresh_after):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+def test_failed_registration_is_retried():
+    users = FlakyUsers([False, True, True])
+    middleware = UserMiddleware(SimpleNamespace(user=users))
+    from_user = SimpleNamespace(id=1, full_name="user")
+
+    async def handler(event, data):
+        return None
+
+    async def scenario():
+        for _ in range(3):
+            await middleware(handler, None, {"event_from_user": from_user})
+
+    asyncio.run(scenario())
+    # first upsert failed, second succeeded, third event is cached
+    assert users.calls == 2
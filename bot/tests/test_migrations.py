@@ -0,0 +1,28 @@
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from src.models.base import Base
+from src.utils.db import AsyncORM
+from src.utils.partitions import is_partition
+
+
+def include_name(name, type_, parent_names) -> bool:
+    return not (type_ == "table" and is_partition(name))
+
+
+def test_migrated_schema_matches_models(run_with_db):
+    async def scenario(db: AsyncORM) -> None:
+        def compare(connection):
+            context = MigrationContext.configure(
+                connection,
+                opts={
+                    "compare_type": True,
+                    "compare_server_default": True,
+                    "include_name": include_name,
+                },
+            )
+            return compare_metadata(context, Base.metadata)
+
+        async with db.engine.connect() as connection:
+            assert await connection.run_sync(compare) == []
+
+    run_with_db(scenario)
@@ -0,0 +1,81 @@
+import gzip
+from datetime import datetime
+
+from sqlalchemy import func, insert, select, text
+from src.models.journal import Journal
+from src.utils.db import AsyncORM
+from src.utils.executor import BoundedExecutor
+from src.utils.partitions import PartitionManager, partition_name
+
+
+def test_archive_journal_exports_and_drops_old_partition(
+    run_with_db, tmp_path
+):
+    async def scenario(db: AsyncORM) -> None:
+        async with db.engine.begin() as connection:
+            await connection.execute(
+                text(
+                    "CREATE TABLE journal_y2020m01 PARTITION OF journal "
+                    "FOR VALUES FROM ('2020-01-01') TO ('2020-02-01')"
+                )
+            )
+            await connection.execute(
+                insert(Journal).values(
+                    [
+                        {"date": datetime(2020, 1, 5), "action": "old"},
+                        {"date": datetime(2020, 1, 6), "action": "older"},
+                    ]
+                )
+            )
+
+        executor = BoundedExecutor("test")
+        partitions = PartitionManager(
+            db, archive_dir=str(tmp_path), executor=executor
+        )
+        try:
+            archived = await partitions.archive_journal()
+        finally:
+            executor.shutdown()
+
+        assert archived == [tmp_path / "journal_y2020m01.csv.gz"]
+        with gzip.open(archived[0], "rt") as archive:
+            lines = archive.read().splitlines()
+        assert lines[0] == "id,date,action,description"
+        assert [line.split(",")[2] for line in lines[1:]] == ["old", "older"]
+        assert "journal_y2020m01" not in await partitions._partitions(
+            "journal"
+        )
+
+    run_with_db(scenario)
+
+
+def test_rows_without_partition_move_out_of_default(run_with_db):
+    async def scenario(db: AsyncORM) -> None:
+        future = datetime(2099, 5, 17)
+        async with db.engine.begin() as connection:
+            await connection.execute(
+                insert(Journal).values(date=future, action="future")
+            )
+            assert await connection.scalar(
+                text("SELECT count(*) FROM journal_default")
+            ) == 1
+
+        partitions = PartitionManager(db)
+        await partitions.ensure_partitions()
+        name = partition_name("journal", future.date())
+        assert name in await partitions._partitions("journal")
+
+        async with db.engine.connect() as connection:
+            assert await connection.scalar(
+                text("SELECT count(*) FROM journal_default")
+            ) == 0
+            assert await connection.scalar(
+                text(f"SELECT count(*) FROM {name}")
+            ) == 1
+            assert await connection.scalar(
+                select(func.count()).select_from(Journal)
+            ) == 1
+        # a second run finds nothing to create
+        await partitions.ensure_partitions()
+
+    run_with_db(scenario)
@@ -0,0 +1,89 @@
+from sqlalchemy import select
+from src.models.proxy import Proxy
+from src.utils.aeza import AezaResponse
+from src.utils.commands import CommandQueue
+from src.utils.db import AsyncORM
+from src.utils.provisioning import (
+    ProvisioningPipeline,
+    ProvisionRequest,
+    ProvisionResult,
+)
+
+
+def ready(user_id: int, service_id: int) -> ProvisionResult:
+    return ProvisionResult(
+        request=ProvisionRequest(
+            user_id=user_id, product_id=1, term="month", name="proxy"
+        ),
+        ok=True,
+        service_id=service_id,
+        server_ip=f"10.0.0.{service_id}",
+    )
+
+
+def test_save_keeps_rows_when_one_fails(run_with_db):
+    async def scenario(db: AsyncORM) -> None:
+        await db.user.add_user(1, "first")
+        pipeline = ProvisioningPipeline(aeza=None, db=db, commands=None)
+        # Пользователя 2 нет: его строка нарушает внешний ключ.
+        results = [ready(1, 11), ready(2, 12), ready(1, 13)]
+        await pipeline._save(results)
+
+        assert [result.ok for result in results] == [True, False, True]
+        assert results[1].service_id == 12
+        assert results[1].server_ip == "10.0.0.12"
+        async with db.engine.connect() as connection:
+            saved = await connection.scalars(
+                select(Proxy.service_id).order_by(Proxy.service_id)
+            )
+            assert list(saved) == [11, 13]
+
+    run_with_db(scenario)
+
+
+class FakeAeza:
+    """Aeza, у которой заказ сразу создаёт активную услугу."""
+
+    def __init__(self):
+        self.created: list[dict] = []
+
+    async def create_service(self, **payload) -> AezaResponse:
+        self.created.append(payload)
+        order = {"id": 1, "createdServiceIds": [21]}
+        return AezaResponse(
+            status="ok", context={"data": {"items": [order]}}, http_status=200
+        )
+
+    async def get_service(self, service_id: int) -> AezaResponse:
+        service = {"id": service_id, "status": "active", "ip": "10.0.0.21"}
+        return AezaResponse(
+            status="ok", context={"data": service}, http_status=200
+        )
+
+
+def test_order_goes_through_command_queue(run_with_db):
+    async def scenario(db: AsyncORM) -> None:
+        await db.user.add_user(1, "first")
+        aeza = FakeAeza()
+        queue = CommandQueue(
+            db=db, aeza=aeza, secret=b"test", poll_interval=0.05
+        )
+        pipeline = ProvisioningPipeline(
+            aeza=aeza, db=db, commands=queue, poll_interval=0.05
+        )
+        request = ProvisionRequest(
+            user_id=1, product_id=1, term="month", name="proxy"
+        )
+        queue.start()
+        try:
+            [result] = await pipeline.run([request])
+        finally:
+            await queue.stop()
+
+        assert result.ok
+        assert result.service_id == 21
+        assert len(aeza.created) == 1
+        command = await queue.get(request.idempotency_key)
+        assert command.status == "done"
+
+    run_with_db(scenario)
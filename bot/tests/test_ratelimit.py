@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.utils import ratelimit
+from src.utils.middlewares import ThrottlingMiddleware
+from src.utils.ratelimit import MemoryBackend, RateLimiter
+
+
+def test_memory_backend_keeps_slow_buckets(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    backend = MemoryBackend()
+
+    async def scenario():
+        for _ in range(5):
+            assert await backend.consume("slow", rate=0.01, burst=5) == 0
+        assert await backend.consume("fast", rate=1, burst=5) == 0
+
+        # fast bucket is full again after 5s, slow one needs 500s
+        now[0] += 61
+        assert await backend.consume("other", rate=1, burst=5) == 0
+        assert await backend.consume("slow", rate=0.01, burst=5) > 0
+
+        now[0] += 10
+        assert await backend.consume("other", rate=1, burst=5) == 0
+        assert len(backend) == 2
+
+    asyncio.run(scenario())
+
+
+def test_slow_bucket_does_not_pin_fast_ones(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    backend = MemoryBackend()
+
+    async def scenario():
+        await backend.consume("slow", rate=0.01, burst=5)
+        for user_id in range(1000):
+            await backend.consume(f"fast:{user_id}", rate=1, burst=5)
+
+        now[0] += 6
+        await backend.consume("fast:new", rate=1, burst=5)
+        assert len(backend) == 2
+
+    asyncio.run(scenario())
+
+
+def test_user_bucket_is_shared_between_handlers():
+    limiter = RateLimiter(MemoryBackend(), rate=100, burst=100)
+    middleware = ThrottlingMiddleware(limiter, user_rate=0.001, user_burst=3)
+    event = SimpleNamespace(from_user=SimpleNamespace(id=1))
+    handled = []
+
+    async def handler(event, data):
+        handled.append(data["scope"])
+
+    async def scenario():
+        for scope in ("a", "b", "c", "a", "b"):
+            data = {"handler": None, "scope": scope}
+            await middleware(handler, event, data)
+
+    asyncio.run(scenario())
+    assert handled == ["a", "b", "c"]
@@ -0,0 +1,75 @@
+import asyncio
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.exc import DBAPIError
+from src.models.bank_summary import BankSummary
+from src.utils.db import AsyncORM, BankManager
+from src.utils.reconcile import LedgerReconciler
+
+
+def test_reconcile_rebuilds_drifted_summary(run_with_db):
+    async def scenario(db: AsyncORM) -> None:
+        await db.user.add_user(1, "first")
+        await db.user.add_user(2, "second")
+        await db.bank.add_payment(1, Decimal("100"))
+        await db.bank.add_payment(1, Decimal("-30"))
+        await db.bank.add_payment(1, Decimal("40"))
+        await db.bank.add_payment(2, Decimal("5"), currency="USD")
+
+        assert await db.bank.reconcile() == (2, [])
+
+        async with db.engine.begin() as connection:
+            await connection.execute(
+                update(BankSummary)
+                .where(BankSummary.user_id == 1)
+                .values(total_in=0, last_topup_amount=None)
+            )
+
+        assert await db.bank.reconcile() == (2, [1])
+        summary = await db.bank.get_summary(1)
+        assert summary.total_in == Decimal("140")
+        assert summary.total_out == Decimal("30")
+        assert summary.operations == 3
+        assert summary.last_topup_amount == Decimal("40")
+        assert (await db.bank.get_summary(2, "USD")).total_in == Decimal("5")
+
+        assert await db.bank.reconcile(after_id=2) == (None, [])
+
+    run_with_db(scenario)
+
+
+class PgError(Exception):
+    def __init__(self, sqlstate):
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+
+def test_serialization_failure_retries_batch(monkeypatch):
+    bank = BankManager(session_maker=None, user_cache=None)
+    errors = [PgError("40001"), PgError("40001")]
+
+    async def batch(after_id, limit):
+        if errors:
+            raise DBAPIError("SELECT", {}, errors.pop(0))
+        return 7, [3]
+
+    monkeypatch.setattr(bank, "_reconcile_batch", batch)
+    assert asyncio.run(bank.reconcile(attempts=3)) == (7, [3])
+
+    errors.extend(PgError("40001") for _ in range(3))
+    assert asyncio.run(bank.reconcile(attempts=3)) is None
+
+
+def test_failed_batch_is_not_a_finished_pass():
+    results = [(1, [1]), None]
+
+    async def reconcile(after_id, limit):
+        return results.pop(0)
+
+    db = SimpleNamespace(bank=SimpleNamespace(reconcile=reconcile))
+    reconciler = LedgerReconciler(db, pause=0)
+    with pytest.raises(RuntimeError):
+        asyncio.run(reconciler.reconcile())
@@ -0,0 +1,78 @@
+import asyncio
+
+from src.utils.scheduler import KeyedScheduler
+
+
+def test_jobs_with_one_key_run_in_order():
+    scheduler = KeyedScheduler(concurrency=10)
+    log = []
+
+    def job(key, n, delay):
+        async def run():
+            await asyncio.sleep(delay)
+            log.append((key, n))
+
+        return run
+
+    async def scenario():
+        for n in range(5):
+            # earlier jobs sleep longer: only the key queue keeps order
+            await scheduler.submit("a", job("a", n, 0.01 * (5 - n)))
+            await scheduler.submit("b", job("b", n, 0))
+        await scheduler.join(5)
+
+    asyncio.run(scenario())
+    assert [n for key, n in log if key == "a"] == list(range(5))
+    assert [n for key, n in log if key == "b"] == list(range(5))
+    # "b" did not wait behind the slow "a" queue
+    assert log.index(("b", 4)) < log.index(("a", 0))
+
+
+def test_full_key_queue_drops_jobs():
+    scheduler = KeyedScheduler(max_per_key=2)
+    release = asyncio.Event()
+    done = []
+
+    def job(n):
+        async def run():
+            await release.wait()
+            done.append(n)
+            return n
+
+        return run
+
+    async def scenario():
+        futures = [await scheduler.submit("user", job(0))]
+        await asyncio.sleep(0)
+        for n in range(1, 4):
+            futures.append(await scheduler.submit("user", job(n)))
+        # the first job is running, two more are queued, the fourth is
+        # dropped without waiting for a slot
+        assert futures[3] is None
+        release.set()
+        assert await asyncio.gather(*futures[:3]) == [0, 1, 2]
+        assert scheduler.pending == 0
+
+    asyncio.run(scenario())
+    assert done == [0, 1, 2]
+
+
+def test_join_drains_accepted_jobs():
+    scheduler = KeyedScheduler(concurrency=2)
+    done = []
+
+    def job(n):
+        async def run():
+            await asyncio.sleep(0.01)
+            done.append(n)
+
+        return run
+
+    async def scenario():
+        for n in range(6):
+            await scheduler.submit(n % 3, job(n))
+        await scheduler.join(5)
+        assert scheduler.pending == 0
+
+    asyncio.run(scenario())
+    assert sorted(done) == list(range(6))
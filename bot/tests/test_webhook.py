@@ -0,0 +1,56 @@
+import asyncio
+
+from aiogram import Bot
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.utils.scheduler import OrderedDispatcher
+from src.utils.webhook import WebhookServer
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 7, "type": "private"},
+        "from": {"id": 7, "is_bot": False, "first_name": "u"},
+        "text": "hi",
+    },
+}
+
+
+def webhook_client(dp: OrderedDispatcher) -> TestClient:
+    server = WebhookServer(
+        dp=dp, bot=Bot("42:TEST"), base_url="https://example.com"
+    )
+    return TestClient(TestServer(server.build_app()))
+
+
+def test_malformed_update_is_rejected():
+    async def scenario():
+        async with webhook_client(OrderedDispatcher()) as client:
+            response = await client.post("/webhook", data=b"{not json")
+            assert response.status == 400
+            response = await client.post("/webhook", json={"foo": 1})
+            assert response.status == 400
+
+    asyncio.run(scenario())
+
+
+def test_update_is_handed_to_scheduler_without_metrics():
+    dp = OrderedDispatcher(concurrency=1)
+    handled = asyncio.Event()
+
+    @dp.message()
+    async def handler(message):
+        handled.set()
+
+    async def scenario():
+        async with webhook_client(dp) as client:
+            response = await client.post("/webhook", json=UPDATE)
+            assert response.status == 200
+            await asyncio.wait_for(handled.wait(), 5)
+            await dp.join(5)
+            response = await client.get("/metrics")
+            assert response.status == 404
+
+    asyncio.run(scenario())